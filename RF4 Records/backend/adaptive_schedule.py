@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Change-rate-driven scheduling for the category×region page units.
+
+Each unit keeps an exponentially weighted estimate of how many new records
+(or category updates) it produces per hour. Its next scrape is set so that
+roughly SCRAPER_TARGET_CHANGES_PER_SCRAPE changes are waiting when it is
+scraped again, clamped to [SCRAPER_MIN_INTERVAL_MINUTES,
+SCRAPER_MAX_INTERVAL_MINUTES]. Busy units stay near the minimum interval,
+stagnant ones back off towards the maximum. Everything is due again (and the
+estimates restart) at the weekly Sunday 18:00 UTC leaderboard reset.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent / "cache"
+SCHEDULE_FILE = CACHE_DIR / "unit_schedule.json"
+
+# Set SCRAPER_ADAPTIVE_SCHEDULE=false to go back to the fixed 3-minute/30-minute/1-hour tiers
+ADAPTIVE_SCHEDULE_ENABLED = os.getenv("SCRAPER_ADAPTIVE_SCHEDULE", "true").lower() not in ("0", "false", "no")
+MIN_INTERVAL_SECONDS = float(os.getenv("SCRAPER_MIN_INTERVAL_MINUTES", "3")) * 60
+MAX_INTERVAL_SECONDS = float(os.getenv("SCRAPER_MAX_INTERVAL_MINUTES", "60")) * 60
+TARGET_CHANGES_PER_SCRAPE = float(os.getenv("SCRAPER_TARGET_CHANGES_PER_SCRAPE", "1"))
+RATE_SMOOTHING = 0.5  # EWMA weight of the newest observation
+
+
+class UnitSchedule:
+    """
+    Per-unit change-rate estimates and next-due times, persisted to the cache dir.
+
+    Like the page fingerprints, observations are staged while a category is
+    scraped and only committed once its records are flushed, so a failed write
+    leaves the unit due.
+    """
+
+    def __init__(self, path=SCHEDULE_FILE, min_interval=MIN_INTERVAL_SECONDS,
+                 max_interval=MAX_INTERVAL_SECONDS, target_changes=TARGET_CHANGES_PER_SCRAPE):
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.target_changes = target_changes
+        self._state = {'week_start': None, 'units': {}}
+        self._staged = {}
+        self.load()
+
+    @staticmethod
+    def _key(category_key, region_code):
+        return f"{category_key}/{region_code}"
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            if isinstance(state.get('units'), dict):
+                self._state = state
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load unit schedule, starting fresh: {e}")
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save unit schedule: {e}")
+
+    def start_week(self, week_start):
+        """Forget last week's estimates once the leaderboards have reset"""
+        stamp = week_start.isoformat()
+        if self._state.get('week_start') != stamp:
+            if self._state.get('week_start') is not None:
+                logger.info("🔄 Weekly reset - all units due, change-rate estimates restarted")
+            self._state = {'week_start': stamp, 'units': {}}
+            self._staged.clear()
+
+    def is_due(self, category_key, region_code, now=None):
+        entry = self._state['units'].get(self._key(category_key, region_code))
+        if entry is None:
+            return True
+        return (now or time.time()) >= entry['next_due']
+
+    def due_units(self, units, now=None):
+        """Filter (category_key, region) units down to the ones due now"""
+        now = now or time.time()
+        return [(key, region) for key, region in units if self.is_due(key, region['code'], now)]
+
+    def seconds_until_next_due(self, units, now=None):
+        """Delay until the earliest unit is due (0 if one already is)"""
+        now = now or time.time()
+        next_due = min(
+            (self._state['units'].get(self._key(key, region['code']), {}).get('next_due', now)
+             for key, region in units),
+            default=now,
+        )
+        return max(0.0, next_due - now)
+
+    def _interval_for(self, rate_per_hour):
+        if rate_per_hour is None:
+            # No estimate yet - measure again soon
+            return self.min_interval
+        if rate_per_hour <= 0:
+            return self.max_interval
+        interval = self.target_changes / rate_per_hour * 3600
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def record(self, category_key, region_code, changes, now=None):
+        """Record a successful scrape of a unit that produced `changes` new rows/category updates"""
+        now = now or time.time()
+        key = self._key(category_key, region_code)
+        entry = self._staged.get(key) or self._state['units'].get(key, {})
+
+        rate = entry.get('rate')
+        last_scraped = entry.get('last_scraped')
+        if last_scraped is not None:
+            elapsed_hours = max(now - last_scraped, self.min_interval) / 3600
+            sample = changes / elapsed_hours
+            rate = sample if rate is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * rate
+        elif changes:
+            # First sighting with changes: assume they accrued over one minimum interval
+            rate = changes / (self.min_interval / 3600)
+
+        interval = self._interval_for(rate)
+        self._staged[key] = {
+            'rate': rate,
+            'last_scraped': now,
+            'interval': interval,
+            'next_due': now + interval,
+        }
+        return interval
+
+    def commit_staged(self):
+        self._state['units'].update(self._staged)
+        self._staged.clear()
+
+    def discard_staged(self):
+        self._staged.clear()
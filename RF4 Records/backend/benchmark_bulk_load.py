@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the record write paths against the configured database.
+Compares rows/sec and commit count of the batched upsert path
+(BulkRecordInserter, 25 rows per commit) with the PostgreSQL COPY staging
+loader (one savepoint per region, one commit per category).
+
+Writes synthetic rows in regions named "__benchmark__..." and deletes them
+afterwards. Usage: python benchmark_bulk_load.py [regions] [rows_per_region]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from bulk_operations import BulkRecordInserter, CopyStagingLoader
+from database import Record, SessionLocal, engine
+
+CATEGORIES = ['N', 'L', 'U', 'B', 'T']
+
+
+def synthetic_units(regions, rows_per_region, seed=42):
+    """Yield (category, region, rows) units shaped like a scrape pass"""
+    rng = random.Random(seed)
+    for category in CATEGORIES:
+        for region_index in range(regions):
+            region = f"__benchmark__{region_index}"
+            rows = []
+            for i in range(rows_per_region):
+                # Most rows repeat across categories, like real leaderboards do
+                player = f"Angler{rng.randint(0, rows_per_region * 2)}"
+                rows.append({
+                    'player': player,
+                    'fish': f"Fish{i % 40}",
+                    'weight': rng.randint(100, 50000),
+                    'waterbody': f"Lake{i % 12}",
+                    'bait': 'Worm',
+                    'bait1': 'Worm',
+                    'bait2': None,
+                    'date': '08.06.25',
+                    'created_at': datetime.now(timezone.utc),
+                    'region': region,
+                    'category': category,
+                })
+            yield category, region, rows
+
+
+def run(writer_factory, regions, rows_per_region):
+    commits = 0
+
+    def count_commit(conn):
+        nonlocal commits
+        commits += 1
+
+    event.listen(engine, "commit", count_commit)
+    db = SessionLocal()
+    rows_total = 0
+    start = time.perf_counter()
+    try:
+        writer = writer_factory(db)
+        current_category = None
+        for category, region, rows in synthetic_units(regions, rows_per_region):
+            if current_category and category != current_category:
+                writer.flush()
+                db.commit()
+            current_category = category
+            for row in rows:
+                writer.add_record(dict(row))
+            writer.end_unit()
+            rows_total += len(rows)
+        writer.flush()
+        db.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "commit", count_commit)
+        db.close()
+    return rows_total / elapsed, commits, elapsed
+
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        db.query(Record).filter(Record.region.like('\\_\\_benchmark\\_\\_%', escape='\\')).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    regions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rows_per_region = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    paths = [("batched upsert", lambda db: BulkRecordInserter(db, batch_size=25))]
+    if engine.dialect.name == 'postgresql':
+        paths.append(("COPY staging", CopyStagingLoader))
+    else:
+        print("ℹ️  COPY staging loader needs PostgreSQL - benchmarking the batched path only")
+
+    print(f"📦 {len(CATEGORIES)} categories × {regions} regions × {rows_per_region} rows")
+    for name, factory in paths:
+        cleanup()
+        try:
+            rows_per_sec, commits, elapsed = run(factory, regions, rows_per_region)
+            print(f"{name:>15}: {rows_per_sec:,.0f} rows/s, {commits} commits, {elapsed:.1f}s")
+        finally:
+            cleanup()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Long-lived browser supervisor for the Selenium fallback.
+
+Chrome runs in a child process that outlives individual scrapes, so a scrape
+that needs the fallback finds a warm driver instead of paying Chrome startup
+(and the kill-everything/sleep/memory-check dance in get_driver) every run.
+The parent sends region pages to load and gets parsed records back.
+
+Browsers are bounded instead of hunted down after the fact:
+- recycled after SCRAPER_BROWSER_MAX_PAGES page loads
+- recycled as soon as the chromedriver+Chrome tree exceeds SCRAPER_BROWSER_MAX_RSS_MB
+- replaced right after the page that triggered recycling is answered, so
+  the next request hits a warm driver
+- shut down after SCRAPER_BROWSER_IDLE_SECONDS without work; main.py asks
+  for a prewarm shortly before the next scheduled scrape
+A request that hangs past SCRAPER_BROWSER_REQUEST_TIMEOUT kills the whole
+supervisor tree; the next request starts a fresh one.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from resource_blocking import PageLoadStats
+
+logger = logging.getLogger(__name__)
+
+# Set SCRAPER_BROWSER_SUPERVISOR=false to create drivers in-process with get_driver() again
+BROWSER_SUPERVISOR_ENABLED = os.getenv("SCRAPER_BROWSER_SUPERVISOR", "true").lower() not in ("0", "false", "no")
+MAX_PAGES_PER_BROWSER = int(os.getenv("SCRAPER_BROWSER_MAX_PAGES", "40"))
+MAX_BROWSER_RSS_MB = float(os.getenv("SCRAPER_BROWSER_MAX_RSS_MB", "600"))
+IDLE_SHUTDOWN_SECONDS = float(os.getenv("SCRAPER_BROWSER_IDLE_SECONDS", "900"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_BROWSER_REQUEST_TIMEOUT", "120"))
+PREWARM_LEAD_SECONDS = 60  # How long before a scheduled scrape the browser is warmed
+PREWARM_WINDOW_SECONDS = 24 * 3600  # Only prewarm if the fallback was needed this recently
+
+# Network metrics of the pages loaded in this (supervisor) process
+_page_stats = PageLoadStats()
+
+
+def browser_tree_rss_mb(driver):
+    """Resident memory of chromedriver and every Chrome process under it"""
+    import psutil
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+    except Exception:
+        return 0.0
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / 1024 / 1024
+
+
+def create_driver():
+    from scraper import create_chrome_driver
+    return create_chrome_driver()
+
+
+def load_region_page(driver, region_info):
+    """Load one region page and parse its records tables"""
+    from scraper import parse_table_selenium
+    started = time.perf_counter()
+    driver.get(region_info['url'])
+    records = parse_table_selenium(driver, region_info)
+    _page_stats.record(driver, time.perf_counter() - started, region_info['name'])
+    return records
+
+
+def _driver_alive(driver):
+    try:
+        _ = driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _supervisor_main(conn, max_pages, max_rss_mb, idle_seconds,
+                     driver_factory=None, page_loader=None, rss_fn=None):
+    """Child process loop: own one browser, answer requests, recycle it within bounds"""
+    driver_factory = driver_factory or create_driver
+    page_loader = page_loader or load_region_page
+    rss_fn = rss_fn or browser_tree_rss_mb
+    from unified_cleanup import kill_chrome_processes, safe_driver_quit
+    # scraper registers its own SIGINT/SIGTERM handlers on import; import it before
+    # installing ours so a later create_driver()/load_region_page() can't replace them
+    import scraper  # noqa: F401
+
+    state = {'driver': None, 'pages': 0}
+    stats = {'drivers_started': 0, 'recycles': 0, 'pages': 0, 'last_start_seconds': 0.0, 'browser_rss_mb': 0.0}
+    stats.update(_page_stats.as_dict())
+
+    def start_driver():
+        started = time.perf_counter()
+        state['driver'] = driver_factory()
+        state['pages'] = 0
+        stats['drivers_started'] += 1
+        stats['last_start_seconds'] = time.perf_counter() - started
+
+    def stop_driver():
+        if state['driver'] is not None:
+            safe_driver_quit(state['driver'])
+            state['driver'] = None
+        kill_chrome_processes()  # Only this process's Chrome children
+
+    def terminate(signum, frame):
+        stop_driver()
+        os._exit(0)
+
+    # The parent owns Ctrl+C; SIGTERM (parent exit, restart) must not orphan Chrome
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, terminate)
+
+    while True:
+        timeout = idle_seconds if state['driver'] is not None else None
+        if not conn.poll(timeout):
+            logger.info(f"💤 Browser idle for {idle_seconds:.0f}s - shutting it down")
+            stop_driver()
+            continue
+        try:
+            op, payload = conn.recv()
+        except EOFError:
+            stop_driver()  # Parent went away - don't leave its Chrome behind
+            break
+
+        if op == 'stop':
+            stop_driver()
+            conn.send(('ok', None, dict(stats)))
+            break
+
+        try:
+            if state['driver'] is None:
+                start_driver()
+            elif not _driver_alive(state['driver']):
+                logger.info("Browser died - starting a fresh one")
+                stop_driver()
+                start_driver()
+                stats['recycles'] += 1
+            result = None
+            if op == 'fetch':
+                result = page_loader(state['driver'], payload)
+                state['pages'] += 1
+                stats['pages'] += 1
+            stats['browser_rss_mb'] = rss_fn(state['driver'])
+            stats.update(_page_stats.as_dict())
+            conn.send(('ok', result, dict(stats)))
+        except Exception as e:
+            stats.update(_page_stats.as_dict())
+            conn.send(('error', f"{type(e).__name__}: {e}", dict(stats)))
+            stop_driver()  # Next request starts from a clean browser
+            continue
+
+        # Recycle after answering, so the replacement starts while the parent ingests
+        reason = None
+        if state['pages'] >= max_pages:
+            reason = f"{state['pages']} pages"
+        elif stats['browser_rss_mb'] > max_rss_mb:
+            reason = f"{stats['browser_rss_mb']:.0f}MB RSS"
+        if reason:
+            logger.info(f"♻️ Recycling browser after {reason}")
+            stop_driver()
+            stats['recycles'] += 1
+            try:
+                start_driver()
+            except Exception as e:
+                logger.warning(f"Could not pre-warm replacement browser: {e}")
+                state['driver'] = None
+
+
+# Child counters that restart with each supervisor process and are summed in the parent
+COUNTER_KEYS = ('drivers_started', 'recycles', 'pages') + tuple(PageLoadStats().as_dict())
+
+
+class BrowserSupervisor:
+    """Parent-side handle to the browser child process. Thread-safe; one request at a time."""
+
+    def __init__(self, max_pages=MAX_PAGES_PER_BROWSER, max_rss_mb=MAX_BROWSER_RSS_MB,
+                 idle_seconds=IDLE_SHUTDOWN_SECONDS, request_timeout=REQUEST_TIMEOUT_SECONDS,
+                 driver_factory=None, page_loader=None, rss_fn=None):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.idle_seconds = idle_seconds
+        self.request_timeout = request_timeout
+        self._hooks = (driver_factory, page_loader, rss_fn)
+        self._process = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._child_stats = {}  # Last counters reported by the current child
+        self.last_fetch_at = None
+        self.stats = {'drivers_started': 0, 'recycles': 0, 'pages': 0, 'last_start_seconds': 0.0,
+                      'browser_rss_mb': 0.0, 'supervisor_restarts': 0}
+        self.stats.update(PageLoadStats().as_dict())
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._process is not None:
+            self.stats['supervisor_restarts'] += 1
+            self._close()
+        # spawn: forking the web process (scheduler/uvicorn threads) is not safe
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_supervisor_main,
+            args=(child_conn, self.max_pages, self.max_rss_mb, self.idle_seconds, *self._hooks),
+            name="browser-supervisor",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        from unified_cleanup import register_supervised_process
+        register_supervised_process(self._process.pid)
+        logger.info(f"🧭 Browser supervisor started (pid {self._process.pid})")
+
+    def _request(self, op, payload=None, timeout=None):
+        with self._lock:
+            self._ensure_started()
+            self._conn.send((op, payload))
+            if not self._conn.poll(timeout or self.request_timeout):
+                logger.error(f"Browser supervisor did not answer '{op}' in time - killing it")
+                self._kill()
+                raise TimeoutError(f"browser supervisor '{op}' timed out")
+            try:
+                status, result, child_stats = self._conn.recv()
+            except EOFError:
+                self._kill()
+                raise RuntimeError("browser supervisor exited unexpectedly")
+            # Child counters restart with the child; keep the parent's totals monotonic
+            for key in COUNTER_KEYS:
+                self.stats[key] += child_stats[key] - self._child_stats.get(key, 0)
+            self.stats['last_start_seconds'] = child_stats['last_start_seconds']
+            self.stats['browser_rss_mb'] = child_stats['browser_rss_mb']
+            self._child_stats = child_stats
+            if status != 'ok':
+                raise RuntimeError(result)
+            return result
+
+    def fetch(self, region_info):
+        """Load a region page in the supervised browser and return its parsed records"""
+        records = self._request('fetch', region_info)
+        self.last_fetch_at = time.time()
+        return records
+
+    def prewarm(self):
+        """Make sure a driver is up - called shortly before a scheduled scrape"""
+        started = time.perf_counter()
+        self._request('warm')
+        logger.info(f"🔥 Browser warm ({time.perf_counter() - started:.1f}s)")
+
+    def wants_prewarm(self, now=None):
+        """Only keep Chrome warm if scrapes actually needed the Selenium fallback recently"""
+        return self.last_fetch_at is not None and (now or time.time()) - self.last_fetch_at < PREWARM_WINDOW_SECONDS
+
+    def _close(self):
+        from unified_cleanup import unregister_supervised_process
+        if self._process is not None:
+            unregister_supervised_process(self._process.pid)
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+        self._child_stats = {}
+
+    def _kill(self):
+        """Kill the supervisor and every Chrome process under it"""
+        import psutil
+        if self._process is not None:
+            try:
+                root = psutil.Process(self._process.pid)
+                for proc in root.children(recursive=True) + [root]:
+                    try:
+                        proc.kill()
+                    except psutil.NoSuchProcess:
+                        pass
+            except psutil.NoSuchProcess:
+                pass
+            self._process.join(timeout=5)
+            self.stats['supervisor_restarts'] += 1
+        self._close()
+
+    def shutdown(self):
+        with self._lock:
+            if self._process is None:
+                return
+            if self._process.is_alive():
+                try:
+                    self._conn.send(('stop', None))
+                    if self._conn.poll(15):
+                        self._conn.recv()
+                except (EOFError, OSError):
+                    pass
+                self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._kill()
+            else:
+                self._close()
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_browser_supervisor():
+    """Process-wide supervisor, created on first use"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = BrowserSupervisor()
+        return _supervisor
+
+
+def set_browser_supervisor(supervisor):
+    """Install a supervisor-compatible object (e.g. the scrape worker's proxy to the API process's browser)"""
+    global _supervisor
+    with _supervisor_lock:
+        _supervisor = supervisor
+
+
+def prewarm_browser():
+    """Scheduler job: warm the browser before the next scrape if the fallback is in use"""
+    supervisor = _supervisor
+    if supervisor is None or not supervisor.wants_prewarm():
+        return
+    try:
+        supervisor.prewarm()
+    except Exception as e:
+        logger.warning(f"Browser prewarm failed: {e}")
+
+
+def shutdown_browser_supervisor():
+    if _supervisor is not None:
+        _supervisor.shutdown()
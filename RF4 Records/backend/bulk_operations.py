@@ -4,14 +4,65 @@ Optimized bulk database operations for PostgreSQL performance.
 Replaces individual inserts with efficient bulk operations.
 """
 
-from sqlalchemy import text
-from sqlalchemy.dialects.postgresql import insert
+import csv
+import io
+import os
+from sqlalchemy import Column, MetaData, Table, func, select, text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from database import Record, SessionLocal
+from dimensions import mark_dimensions_pending, with_dimension_ids
+from record_keys import (
+    CATEGORY_MASK_STRINGS,
+    category_mask,
+    category_string_sql,
+    find_existing_record,
+    merged_category_mask_sql,
+    record_key_hash,
+    stored_category_mask,
+)
+from record_partitions import pin_staged_keys, records_partitioned
+from records_parser import parse_catch_date
 from trophy_classifier import classify_trophy
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Set SCRAPER_COPY_LOADER=false to use batched upserts on PostgreSQL too
+COPY_LOADER_ENABLED = os.getenv("SCRAPER_COPY_LOADER", "true").lower() not in ("0", "false", "no")
+
+def build_record_upsert(dialect_name, rows):
+    """
+    INSERT ... ON CONFLICT (record_key) DO UPDATE for a batch of record rows.
+    An existing row only gets the new category bits ORed into its category_mask.
+    """
+    if dialect_name == 'postgresql':
+        insert_fn = pg_insert
+    elif dialect_name == 'sqlite':
+        insert_fn = sqlite_insert
+    else:
+        raise NotImplementedError(f"Record upsert not supported on {dialect_name}")
+
+    table = Record.__table__
+    # Rows may be RecordRow mappings - expanded to dicts one batch at a time
+    stmt = insert_fn(table).values([dict(row) for row in rows])
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.record_key],
+        **category_merge_clauses(table, stmt.excluded),
+    )
+
+
+def category_merge_clauses(table, excluded):
+    """ON CONFLICT set/where: OR the masks, rewrite the derived string, skip rows that already have the bits"""
+    merged = merged_category_mask_sql(table.c.category_mask, table.c.category, excluded.category_mask)
+    return {
+        'set_': {'category_mask': merged, 'category': category_string_sql(merged)},
+        # Skip the write (and the dead tuple) when the category is already there
+        'where': merged != func.coalesce(table.c.category_mask, -1),
+    }
+
+
 class BulkRecordInserter:
     """Efficient bulk record insertion with PostgreSQL UPSERT"""
     
@@ -25,6 +76,12 @@ class BulkRecordInserter:
         # Add trophy classification if not already present
         if 'trophy_class' not in record_data and 'fish' in record_data and 'weight' in record_data:
             record_data['trophy_class'] = classify_trophy(record_data['fish'], record_data['weight'])
+        if 'record_key' not in record_data:
+            record_data['record_key'] = record_key_hash(record_data)
+        if record_data.get('category_mask') is None:
+            record_data['category_mask'] = category_mask(record_data.get('category'))
+        if record_data.get('catch_date') is None:
+            record_data['catch_date'] = parse_catch_date(record_data.get('date'))
         
         self.pending_records.append(record_data)
         
@@ -32,43 +89,49 @@ class BulkRecordInserter:
         if len(self.pending_records) >= self.batch_size:
             self.flush()
     
+    def _batch_rows(self):
+        """Pending records with one row per record key (categories merged)"""
+        rows = {}
+        for record_data in self.pending_records:
+            key = record_data['record_key']
+            if key in rows:
+                # One statement can't touch the same row twice - merge in Python first
+                merged = rows[key]['category_mask'] | record_data['category_mask']
+                rows[key] = dict(rows[key], category_mask=merged, category=CATEGORY_MASK_STRINGS[merged])
+            else:
+                rows[key] = record_data
+        return list(rows.values())
+    
+    def _write_rows(self):
+        """
+        Batch rows with their dimension ids. If the ids can't be resolved the rows
+        are written without them; filters use the strings until the backfill job
+        (dimensions.backfill_missing_ids) fills them in.
+        """
+        rows = self._batch_rows()
+        try:
+            return with_dimension_ids(self.db, rows)
+        except Exception as e:
+            logger.warning(f"Dimension ids unavailable, writing {len(rows)} rows without them: {e}")
+            mark_dimensions_pending(self.db)
+            return rows
+    
     def flush(self):
-        """Insert all pending records using optimized batch processing"""
+        """Upsert all pending records in one statement"""
         if not self.pending_records:
             return 0
         
         try:
-            # Use batch duplicate checking with the composite index
-            new_records = []
-            
-            for record_data in self.pending_records:
-                # Check if record exists using the composite index (very fast now)
-                exists = self.db.query(Record).filter(
-                    Record.player == record_data['player'],
-                    Record.fish == record_data['fish'],
-                    Record.weight == record_data['weight'],
-                    Record.waterbody == record_data['waterbody'],
-                    Record.bait1 == record_data['bait1'],
-                    Record.bait2 == record_data['bait2'],
-                    Record.date == record_data['date'],
-                    Record.region == record_data['region'],
-                    Record.category == record_data['category']
-                ).first()
-                
-                if not exists:
-                    new_records.append(record_data)
+            rows = self._write_rows()
+            stmt = build_record_upsert(self.db.get_bind().dialect.name, rows)
+            result = self.db.execute(stmt)
+            self.db.commit()
             
-            # Bulk insert only new records
-            if new_records:
-                self.db.bulk_insert_mappings(Record, new_records)
-                self.db.commit()
-                logger.debug(f"Bulk inserted {len(new_records)} new records out of {len(self.pending_records)} checked")
-            else:
-                logger.debug(f"No new records to insert out of {len(self.pending_records)} checked")
+            written_count = max(result.rowcount, 0)
+            logger.debug(f"Upserted {written_count} records (inserted or category-merged) out of {len(self.pending_records)} pending")
             
-            inserted_count = len(new_records)
             self.pending_records.clear()
-            return inserted_count
+            return written_count
             
         except Exception as e:
             logger.error(f"Bulk insert failed: {e}")
@@ -84,24 +147,20 @@ class BulkRecordInserter:
         inserted_count = 0
         failed_records = []
         
-        for record_data in self.pending_records:
+        for record_data in self._write_rows():
             try:
-                # Check if record exists using the composite index
-                exists = self.db.query(Record).filter(
-                    Record.player == record_data['player'],
-                    Record.fish == record_data['fish'],
-                    Record.weight == record_data['weight'],
-                    Record.waterbody == record_data['waterbody'],
-                    Record.bait1 == record_data['bait1'],
-                    Record.bait2 == record_data['bait2'],
-                    Record.date == record_data['date'],
-                    Record.region == record_data['region'],
-                    Record.category == record_data['category']
-                ).first()
+                # Row-by-row natural-key check, merging the category like the upsert does
+                existing = find_existing_record(self.db, record_data)
                 
-                if not exists:
+                if existing is None:
                     self.db.add(Record(**record_data))
                     inserted_count += 1
+                else:
+                    existing_mask = stored_category_mask(existing)
+                    merged = existing_mask | record_data['category_mask']
+                    if merged != existing_mask or existing.category_mask is None:
+                        existing.category_mask = merged
+                        existing.category = CATEGORY_MASK_STRINGS[merged]
                     
             except Exception as e:
                 logger.error(f"Failed to insert individual record: {e}")
@@ -121,12 +180,129 @@ class BulkRecordInserter:
         
         return inserted_count
     
+    def end_unit(self):
+        """Region boundary - batches here are flushed by size only. Returns success."""
+        return True
+    
     def close(self):
         """Flush remaining records (session is managed externally)"""
         inserted = self.flush()
         # Don't close the session - it's managed by the caller
         return inserted
 
+# Columns streamed into the staging table (everything but the id)
+STAGING_COLUMNS = [
+    'player', 'fish', 'weight', 'waterbody', 'bait', 'bait1', 'bait2', 'date',
+    'created_at', 'region', 'category', 'category_mask', 'trophy_class', 'record_key', 'catch_date',
+    'player_id', 'fish_id', 'waterbody_id', 'region_id', 'bait1_id', 'bait2_id',
+]
+
+staging_table = Table(
+    'records_staging', MetaData(),
+    *(Column(name, Record.__table__.c[name].type) for name in STAGING_COLUMNS),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DELETE ROWS',
+)
+
+COPY_NULL = '\\N'
+
+
+class CopyStagingLoader(BulkRecordInserter):
+    """
+    PostgreSQL load path: a unit's rows (one region by default) are streamed into
+    a temp staging table with COPY and merged into records with one set-based
+    upsert inside a savepoint. Nothing is committed here - the caller commits (per
+    category inline, per region in the pipelined writer), and a failed unit only
+    rolls back its own savepoint.
+    """
+    
+    def __init__(self, db_session, max_unit_rows=5000):
+        # Rows are held until end_unit(); max_unit_rows only caps memory on huge pages
+        super().__init__(db_session, batch_size=max_unit_rows)
+        self.stats = {'units_loaded': 0, 'units_failed': 0, 'rows_copied': 0, 'rows_written': 0}
+        # Set by any failed flush in the current unit, including size-triggered ones from add_record
+        self.unit_failed = False
+    
+    def _ensure_staging_table(self, conn):
+        # Temp tables are per connection, and the pooled connection can change between commits
+        conn.execute(CreateTable(staging_table, if_not_exists=True))
+        conn.execute(text("TRUNCATE records_staging"))
+    
+    def _copy_rows(self, conn, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                COPY_NULL if row.get(name) is None else row[name]
+                for name in STAGING_COLUMNS
+            ])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY records_staging ({', '.join(STAGING_COLUMNS)}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+    
+    def _merge_statement(self, partitioned=False):
+        table = Record.__table__
+        stmt = pg_insert(table).from_select(
+            STAGING_COLUMNS, select(*(staging_table.c[name] for name in STAGING_COLUMNS))
+        )
+        # Weekly partitions: created_at is pinned per key (record_partitions.py), so this is still one row per key
+        conflict_columns = [table.c.record_key, table.c.created_at] if partitioned else [table.c.record_key]
+        return stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            **category_merge_clauses(table, stmt.excluded),
+        )
+    
+    def flush(self):
+        """COPY the pending unit into staging and merge it (savepoint, no commit)"""
+        if not self.pending_records:
+            return 0
+        
+        rows = self._write_rows()
+        try:
+            with self.db.begin_nested():
+                conn = self.db.connection()
+                self._ensure_staging_table(conn)
+                self._copy_rows(conn, rows)
+                partitioned = records_partitioned(self.db)
+                if partitioned:
+                    pin_staged_keys(conn)
+                written_count = max(conn.execute(self._merge_statement(partitioned)).rowcount, 0)
+            self.stats['units_loaded'] += 1
+            self.stats['rows_copied'] += len(rows)
+            self.stats['rows_written'] += written_count
+            logger.debug(f"COPY-loaded {len(rows)} rows, {written_count} inserted or category-merged")
+            return written_count
+        except Exception as e:
+            self.stats['units_failed'] += 1
+            self.unit_failed = True
+            logger.error(f"Staging load failed, unit of {len(rows)} rows rolled back: {e}")
+            return None
+        finally:
+            self.pending_records.clear()
+    
+    def end_unit(self):
+        """Load the finished unit now so a failure is isolated to it. False if any part of it failed."""
+        self.flush()
+        loaded = not self.unit_failed
+        self.unit_failed = False
+        return loaded
+
+
+def create_record_writer(db_session):
+    """COPY staging loader on PostgreSQL (unless disabled), batched upserts otherwise"""
+    if db_session.get_bind().dialect.name == 'postgresql':
+        # Partitioned records have no record_key-only conflict target - only the loader pins keys
+        if COPY_LOADER_ENABLED or records_partitioned(db_session):
+            return CopyStagingLoader(db_session)
+    return BulkRecordInserter(db_session, batch_size=25)
+
 class OptimizedRecordChecker:
     """Optimized record existence checking using bulk queries"""
     
@@ -0,0 +1,32 @@
+"""
+Shared pytest fixtures: a throwaway SQLite database file per test.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Engine on a fresh SQLite file with every model table created"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'records.db'}", connect_args={'timeout': 10})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(sqlite_engine):
+    """Session factory bound to sqlite_engine"""
+    return sessionmaker(bind=sqlite_engine)
+
+
+@pytest.fixture
+def session(sessions):
+    """One session on sqlite_engine, closed after the test"""
+    db = sessions()
+    yield db
+    db.close()
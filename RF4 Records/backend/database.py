@@ -2,12 +2,17 @@ from sqlalchemy import (
     create_engine,
     Column,
     Integer,
+    SmallInteger,
+    Boolean,
     String,
     Float,
+    Date,
     DateTime,
+    ForeignKey,
     func,
     Index,
     Text,
+    text,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -16,38 +21,100 @@ import os
 
 Base = declarative_base()
 
+# Records with a name but no dimension id yet (written while the ids could not be
+# resolved) - dimensions.backfill_missing_ids fills them in
+DIMENSION_IDS_PENDING = (
+    "(player IS NOT NULL AND player_id IS NULL) OR (fish IS NOT NULL AND fish_id IS NULL) "
+    "OR (waterbody IS NOT NULL AND waterbody_id IS NULL) OR (region IS NOT NULL AND region_id IS NULL) "
+    "OR (bait1 IS NOT NULL AND bait1_id IS NULL) OR (bait2 IS NOT NULL AND bait2_id IS NULL)"
+)
+
 
 class Record(Base):
     __tablename__ = "records"
     id = Column(Integer, primary_key=True)
-    player = Column(String, index=True)  # Index for player filtering
-    fish = Column(String, index=True)  # Index for fish filtering
+    player = Column(String)  # No filter matches on player; index_suite drops the unused ix_records_player
+    fish = Column(String)  # Filtered through fish_id
     weight = Column(Integer, index=True)  # Index for weight sorting
-    waterbody = Column(String, index=True)  # Index for waterbody filtering
+    waterbody = Column(String)  # Filtered through waterbody_id
     bait = Column(String)  # Keep for backward compatibility
-    bait1 = Column(String, index=True)  # Index for bait filtering
+    bait1 = Column(String)  # Filtered through bait1_id
     bait2 = Column(String)
-    date = Column(String, index=True)  # Index for date sorting
+    date = Column(String)  # Leaderboard date text as shown (DD.MM.YY) - filtered through catch_date
+    catch_date = Column(Date, index=True)  # date parsed at ingest - range filters and ordering
     created_at = Column(
-        DateTime, server_default=func.now(), index=True
-    )  # Index for recent records
-    region = Column(String, index=True)  # Index for region filtering
-    category = Column(String, index=True)  # Index for category filtering
+        DateTime, server_default=func.now()
+    )  # idx_created_desc; BRIN and recent-weeks indexes in index_suite.py
+    region = Column(String)
+    category = Column(String)  # "L;N" form, derived from category_mask on every merge
+    category_mask = Column(SmallInteger, index=True)  # Bit per category code (record_keys.CATEGORY_BITS)
     trophy_class = Column(
         String, index=True
     )  # Trophy classification: 'record', 'trophy', 'normal'
+    record_key = Column(
+        String(32)
+    )  # Hash of the natural key (player/fish/weight/waterbody/bait1/bait2/date/region)
+
+    # Integer keys into the dimension tables (see dimensions.py) - filters match on these.
+    # No filter uses player_id/region_id, so they are not indexed; fish_id and
+    # waterbody_id lead the composite indexes below
+    player_id = Column(Integer, ForeignKey("dim_player.id"))
+    fish_id = Column(Integer, ForeignKey("dim_fish.id"))
+    waterbody_id = Column(Integer, ForeignKey("dim_waterbody.id"))
+    region_id = Column(Integer, ForeignKey("dim_region.id"))
+    bait1_id = Column(Integer, ForeignKey("dim_bait.id"), index=True)
+    bait2_id = Column(Integer, ForeignKey("dim_bait.id"), index=True)
 
     # Composite indexes for common query patterns
     __table_args__ = (
-        Index("idx_fish_weight", "fish", "weight"),  # Fish leaderboards
-        Index("idx_waterbody_fish", "waterbody", "fish"),  # Location-specific records
-        Index("idx_region_fish", "region", "fish"),  # Region-specific records
+        Index("idx_fish_id_weight", "fish_id", "weight"),  # Fish leaderboards
+        Index("idx_waterbody_id_fish_id", "waterbody_id", "fish_id"),  # Location-specific records
         Index(
             "idx_created_desc", "created_at", postgresql_using="btree"
         ),  # Recent records
+        Index(
+            "uq_records_record_key", "record_key", unique=True
+        ),  # Upsert target - one row per natural key
+        Index(
+            "ix_records_dimension_ids_pending",
+            "id",
+            postgresql_where=text(DIMENSION_IDS_PENDING),
+            sqlite_where=text(DIMENSION_IDS_PENDING),
+        ),  # Stays (nearly) empty - makes the readiness check and the id backfill cheap
     )
 
 
+class DimPlayer(Base):
+    __tablename__ = "dim_player"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class DimFish(Base):
+    __tablename__ = "dim_fish"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class DimWaterbody(Base):
+    __tablename__ = "dim_waterbody"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class DimRegion(Base):
+    __tablename__ = "dim_region"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class DimBait(Base):
+    """Shared by bait1 and bait2"""
+    __tablename__ = "dim_bait"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
 class QADataset(Base):
     __tablename__ = "qa_dataset"
     id = Column(Integer, primary_key=True)
@@ -126,6 +193,69 @@ class PollVote(Base):
     )
 
 
+class ScrapeRun(Base):
+    """One scrape_and_update_records run (see scrape_ledger.py)"""
+    __tablename__ = "scrape_runs"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # 'scheduled' or 'replay'
+    status = Column(String, nullable=False, index=True)  # running, success, failed, interrupted
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime)
+    duration_seconds = Column(Float)
+    regions_scraped = Column(Integer)
+    regions_failed = Column(Integer)
+    new_records = Column(Integer)
+    category_updates = Column(Integer)
+    peak_rss_mb = Column(Float)
+    abort_reason = Column(String)
+
+
+class ScrapeUnit(Base):
+    """Timings and counts for one category/region page of a run"""
+    __tablename__ = "scrape_units"
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, nullable=False, index=True)
+    category = Column(String, nullable=False)
+    region = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    source = Column(String)  # http, browser or replay
+    page_load_seconds = Column(Float)  # Download (HTTP) or load + settle (browser)
+    parse_seconds = Column(Float)  # HTML parse; in-browser extraction is part of page load
+    ingest_seconds = Column(Float)  # Classify and queue the rows for writing
+    rows_seen = Column(Integer)
+    rows_new = Column(Integer)
+    category_merges = Column(Integer)
+    page_unchanged = Column(Boolean)
+    failed = Column(Boolean, nullable=False)
+    error = Column(String)
+    rss_mb = Column(Float)
+
+    __table_args__ = (
+        Index("idx_scrape_unit_region_time", "category", "region", "started_at"),
+    )
+
+
+class ScrapeJob(Base):
+    """One category/region unit on the shared scrape work queue (see scrape_queue.py)"""
+    __tablename__ = "scrape_jobs"
+    id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False)
+    region = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # queued, leased, done, failed
+    pass_id = Column(String)  # Publish that last queued it
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String)  # Worker id (hostname-pid) holding the lease
+    leased_until = Column(DateTime)
+    queued_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    last_error = Column(String)
+
+    __table_args__ = (
+        Index("uq_scrape_job_unit", "category", "region", unique=True),  # One row per unit - never queued twice
+        Index("idx_scrape_job_claim", "status", "id"),
+    )
+
+
 # Database configuration
 def get_database_url():
     """Get database URL from environment or use default SQLite"""
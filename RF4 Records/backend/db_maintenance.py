@@ -9,6 +9,7 @@ import sys
 from datetime import datetime, timezone
 from sqlalchemy import create_engine, text, inspect
 from database import get_database_url
+from record_partitions import recent_partitions, records_partitioned
 
 def run_database_maintenance():
     """Run database maintenance operations"""
@@ -46,9 +47,10 @@ def run_database_maintenance():
         with engine.connect() as conn:
             result = conn.execute(text("""
                 SELECT 
-                    pg_size_pretty(pg_total_relation_size('records')) as total_size,
-                    pg_size_pretty(pg_relation_size('records')) as table_size,
-                    pg_size_pretty(pg_indexes_size('records')) as index_size
+                    pg_size_pretty(SUM(pg_total_relation_size(relid))) as total_size,
+                    pg_size_pretty(SUM(pg_relation_size(relid))) as table_size,
+                    pg_size_pretty(SUM(pg_indexes_size(relid))) as index_size
+                FROM pg_partition_tree('records')
             """))
             size_before = result.fetchone()
             
@@ -57,18 +59,26 @@ def run_database_maintenance():
             print(f"  Table: {size_before[1]}")
             print(f"  Indexes: {size_before[2]}")
         
-        maintenance_operations = [
-            {
-                'name': 'VACUUM ANALYZE',
-                'sql': 'VACUUM ANALYZE records',
-                'description': 'Remove dead tuples and update statistics'
-            },
-            {
-                'name': 'REINDEX',
-                'sql': 'REINDEX TABLE records',
-                'description': 'Rebuild indexes for optimal performance'
-            }
-        ]
+        # Weekly partitions: only the weeks still being written get dead tuples and index bloat
+        targets = ['records']
+        if records_partitioned(engine):
+            targets = recent_partitions(engine)
+            print(f"🗂️  Partitioned records - maintaining {', '.join(targets)}")
+        
+        maintenance_operations = []
+        for target in targets:
+            maintenance_operations += [
+                {
+                    'name': f'VACUUM ANALYZE {target}',
+                    'sql': f'VACUUM ANALYZE {target}',
+                    'description': 'Remove dead tuples and update statistics'
+                },
+                {
+                    'name': f'REINDEX {target}',
+                    'sql': f'REINDEX TABLE {target}',
+                    'description': 'Rebuild indexes for optimal performance'
+                }
+            ]
         
         # Note: We need separate connections for each operation due to PostgreSQL transaction requirements
         for operation in maintenance_operations:
@@ -92,9 +102,10 @@ def run_database_maintenance():
         with engine.connect() as conn:
             result = conn.execute(text("""
                 SELECT 
-                    pg_size_pretty(pg_total_relation_size('records')) as total_size,
-                    pg_size_pretty(pg_relation_size('records')) as table_size,
-                    pg_size_pretty(pg_indexes_size('records')) as index_size
+                    pg_size_pretty(SUM(pg_total_relation_size(relid))) as total_size,
+                    pg_size_pretty(SUM(pg_relation_size(relid))) as table_size,
+                    pg_size_pretty(SUM(pg_indexes_size(relid))) as index_size
+                FROM pg_partition_tree('records')
             """))
             size_after = result.fetchone()
             
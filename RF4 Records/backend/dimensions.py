@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Dimension tables for the repeated record strings.
+
+Player, fish, waterbody, region and bait names live once in dim_* tables
+with integer surrogate keys; records carry player_id, fish_id, waterbody_id,
+region_id, bait1_id and bait2_id next to the strings. Filters match on the
+small integer columns (= ANY(ids) on PostgreSQL) instead of comparing or
+ILIKE-scanning strings row by row, and the ids are turned back into names
+through a per-process bidirectional cache.
+
+The record writers resolve ids for each batch before it is written; names
+seen for the first time are inserted on a separate connection, so a new
+dimension row never rides on (or rolls back with) a records transaction.
+If the ids can't be resolved the batch is still written, filters fall back
+to the strings until backfill_missing_ids has filled them in.
+
+Size: the string columns are still written - the natural-key hash,
+leaderboards, top-bait cache and admin SQL read them - so each row carries
+six integer ids on top of them and the heap grows by about 24 bytes a row.
+The saving is in the indexes: the player string index and the
+fish/waterbody/region string composites are gone, and the composites that
+replace them on fish_id/waterbody_id hold two integers per entry instead of
+text. Dropping the strings themselves needs those readers moved onto the ids
+first.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import DIMENSION_IDS_PENDING, DimBait, DimFish, DimPlayer, DimRegion, DimWaterbody
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_TABLES = {
+    'player': DimPlayer.__table__,
+    'fish': DimFish.__table__,
+    'waterbody': DimWaterbody.__table__,
+    'region': DimRegion.__table__,
+    'bait': DimBait.__table__,
+}
+
+# records string column -> (id column, dimension)
+ID_COLUMNS = {
+    'player': ('player_id', 'player'),
+    'fish': ('fish_id', 'fish'),
+    'waterbody': ('waterbody_id', 'waterbody'),
+    'region': ('region_id', 'region'),
+    'bait1': ('bait1_id', 'bait'),
+    'bait2': ('bait2_id', 'bait'),
+}
+
+LOOKUP_CHUNK = 500  # Names/ids per IN (...) - well under SQLite's variable limit
+READY_RECHECK_SECONDS = 300
+
+
+class DimensionCache:
+    """name <-> id maps for every dimension of one database, filled on demand"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._ids = {dimension: {} for dimension in DIMENSION_TABLES}  # name -> id
+        self._names = {dimension: {} for dimension in DIMENSION_TABLES}  # id -> name
+        self._lock = threading.Lock()
+
+    def _remember(self, dimension, pairs):
+        ids, names = self._ids[dimension], self._names[dimension]
+        for dim_id, name in pairs:
+            ids[name] = dim_id
+            names[dim_id] = name
+
+    def ids_for(self, dimension, names):
+        """{name: id} for the given names, inserting the ones not in the table yet"""
+        known = self._ids[dimension]
+        missing = sorted({name for name in names if name is not None and name not in known})
+        if missing:
+            table = DIMENSION_TABLES[dimension]
+            insert_fn = pg_insert if self.engine.dialect.name == 'postgresql' else sqlite_insert
+            with self._lock, self.engine.begin() as conn:
+                for start in range(0, len(missing), LOOKUP_CHUNK):
+                    chunk = missing[start:start + LOOKUP_CHUNK]
+                    conn.execute(insert_fn(table).values([{'name': name} for name in chunk])
+                                 .on_conflict_do_nothing(index_elements=['name']))
+                    rows = conn.execute(select(table.c.id, table.c.name).where(table.c.name.in_(chunk)))
+                    self._remember(dimension, rows)
+        return {name: known.get(name) for name in names if name is not None}
+
+    def names_for(self, dimension, ids):
+        """{id: name} for the given ids, loading the ones not cached yet"""
+        known = self._names[dimension]
+        missing = sorted({dim_id for dim_id in ids if dim_id is not None and dim_id not in known})
+        if missing:
+            table = DIMENSION_TABLES[dimension]
+            with self.engine.connect() as conn:
+                for start in range(0, len(missing), LOOKUP_CHUNK):
+                    chunk = missing[start:start + LOOKUP_CHUNK]
+                    self._remember(dimension, conn.execute(select(table.c.id, table.c.name).where(table.c.id.in_(chunk))))
+        return {dim_id: known.get(dim_id) for dim_id in ids if dim_id is not None}
+
+    def match_ids(self, db, dimension, term, exact=False):
+        """Ids whose name equals `term` (case-insensitive) or, unless exact, contains it"""
+        table = DIMENSION_TABLES[dimension]
+        if exact:
+            condition = func.lower(table.c.name) == term.lower()
+        else:
+            condition = table.c.name.ilike(f"%{term}%")
+        rows = db.execute(select(table.c.id, table.c.name).where(condition)).fetchall()
+        self._remember(dimension, rows)
+        return [row[0] for row in rows]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+_ready = {}  # engine url -> (ready, checked_at)
+
+
+def get_dimension_cache(bind):
+    """Process-wide cache for the database behind a session or engine"""
+    engine = bind.get_bind() if hasattr(bind, 'get_bind') else bind
+    key = str(engine.url)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None or cache.engine is not engine:
+            cache = _caches[key] = DimensionCache(engine)
+        return cache
+
+
+def with_dimension_ids(db, rows):
+    """Copies of the record rows with their *_id columns filled in"""
+    cache = get_dimension_cache(db)
+    resolved = {}
+    for dimension in DIMENSION_TABLES:
+        names = {row.get(column) for row in rows for column, (_, dim) in ID_COLUMNS.items() if dim == dimension}
+        resolved[dimension] = cache.ids_for(dimension, names)
+
+    result = []
+    for row in rows:
+        row = dict(row)
+        for column, (id_column, dimension) in ID_COLUMNS.items():
+            name = row.get(column)
+            row[id_column] = resolved[dimension].get(name) if name is not None else None
+        result.append(row)
+    return result
+
+
+def mark_dimensions_pending(bind):
+    """Records were just written without their ids - stop filtering on ids in this process"""
+    engine = bind.get_bind() if hasattr(bind, 'get_bind') else bind
+    _ready[str(engine.url)] = (False, time.time())
+
+
+def dimensions_ready(db):
+    """
+    True while every record has its dimension ids, so filters can use the id
+    columns alone. Either answer is rechecked every few minutes - rows another
+    process wrote without ids (ix_records_dimension_ids_pending keeps the check
+    cheap) turn it off until backfill_missing_ids catches up.
+    """
+    key = str(db.get_bind().url)
+    ready, checked_at = _ready.get(key, (False, 0.0))
+    if time.time() - checked_at < READY_RECHECK_SECONDS:
+        return ready
+    try:
+        pending = db.execute(text(f"SELECT 1 FROM records WHERE {DIMENSION_IDS_PENDING} LIMIT 1")).first()
+        ready = pending is None
+    except Exception as e:
+        logger.debug(f"Dimension ids not available yet: {e}")
+        db.rollback()
+        ready = False
+    _ready[key] = (ready, time.time())
+    return ready
+
+
+def backfill_missing_ids(engine, batch_size=1000):
+    """Fill the *_id columns of records written while the ids could not be resolved. Returns rows fixed"""
+    columns = list(ID_COLUMNS)
+    select_sql = text(
+        f"SELECT id, {', '.join(columns)} FROM records WHERE id > :last_id AND ({DIMENSION_IDS_PENDING}) "
+        "ORDER BY id LIMIT :limit"
+    )
+    update_sql = text(
+        f"UPDATE records SET {', '.join(f'{id_column} = :{id_column}' for id_column, _ in ID_COLUMNS.values())} "
+        "WHERE id = :id"
+    )
+    fixed = 0
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = [dict(row) for row in conn.execute(select_sql, {'last_id': last_id, 'limit': batch_size}).mappings()]
+        if not rows:
+            break
+        with engine.begin() as conn:
+            conn.execute(update_sql, with_dimension_ids(engine, rows))
+        fixed += len(rows)
+        last_id = rows[-1]['id']
+    if fixed:
+        _ready.pop(str(engine.url), None)  # Recheck on the next filter instead of waiting out the interval
+        logger.info(f"🔗 Backfilled dimension ids on {fixed} records")
+    return fixed
@@ -0,0 +1,99 @@
+"""
+HTTP fetch tier for the RF4 weekly records pages.
+Pulls region pages over plain HTTP with a pooled session so headless Chrome
+is only started when the served HTML does not contain the records tables.
+"""
+
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Set SCRAPER_HTTP_FETCH=false to always go straight to Selenium
+HTTP_FETCH_ENABLED = os.getenv("SCRAPER_HTTP_FETCH", "true").lower() not in ("0", "false", "no")
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "10"))
+
+# Class marker of the records tables the parser reads
+RECORDS_TABLE_MARKER = "records_subtable"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/119.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the shared pooled session, creating it on first use"""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=2,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def close_http_session():
+    """Close the shared session and release its pooled connections"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            try:
+                _session.close()
+            except Exception:
+                pass
+            _session = None
+
+
+def fetch_page_html(url, timeout=None):
+    """Fetch a page and return its HTML text, or None on any HTTP/network failure"""
+    try:
+        response = get_http_session().get(url, timeout=timeout or HTTP_TIMEOUT)
+        if response.status_code != 200:
+            logger.debug(f"HTTP fetch of {url} returned status {response.status_code}")
+            return None
+        return response.text
+    except requests.RequestException as e:
+        logger.debug(f"HTTP fetch of {url} failed: {type(e).__name__}")
+        return None
+
+
+def fetch_records_html(url, timeout=None):
+    """
+    Fetch a records page over HTTP and return its HTML.
+    Returns None when the page could not be fetched or doesn't mention the
+    records tables (they are rendered client-side), so the caller can fall
+    back to Selenium.
+    """
+    html_content = fetch_page_html(url, timeout)
+    if not html_content or RECORDS_TABLE_MARKER not in html_content:
+        return None
+    return html_content
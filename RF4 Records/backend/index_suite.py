@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Managed index set for the records filter workload (PostgreSQL).
+
+The record filters match on dimension ids (dimensions.py), so their ILIKE
+and lower(...) = lookups run against the dim_* name tables: those get pg_trgm
+GIN and lower(name) expression indexes. The one string clause left on
+records - the combined bait text of legacy rows without bait1 - gets a
+partial trigram index. created_at is append-only, so a BRIN index serves its
+range scans next to the btree that ORDER BY created_at DESC LIMIT needs, and
+the last few reset weeks (top baits, data_age, recent records) get a partial
+covering index whose cutoff moves forward every week.
+
+apply_index_suite() builds what is missing concurrently, rotates the recent
+index, and drops records indexes that only cost writes: exact duplicates of
+another index, and single-column indexes the model no longer declares that
+have not been scanned while statistics were collected for UNUSED_INDEX_DAYS.
+An invalid index left by a failed or cancelled concurrent build counts as
+missing: it is dropped and built again.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from record_partitions import list_partitions, records_partitioned, week_start
+
+logger = logging.getLogger(__name__)
+
+# Unused single-column indexes are only judged after this many days of statistics
+UNUSED_INDEX_DAYS = int(os.getenv("RECORDS_UNUSED_INDEX_DAYS", "14"))
+# Reset weeks covered by the partial recent-records index
+RECENT_INDEX_WEEKS = 4
+
+# name -> (table, definition, needs pg_trgm)
+MANAGED_INDEXES = {
+    'ix_dim_fish_name_trgm': ('dim_fish', "USING gin (name gin_trgm_ops)", True),
+    'ix_dim_waterbody_name_trgm': ('dim_waterbody', "USING gin (name gin_trgm_ops)", True),
+    'ix_dim_bait_name_trgm': ('dim_bait', "USING gin (name gin_trgm_ops)", True),
+    'ix_dim_fish_name_lower': ('dim_fish', "(lower(name))", False),  # Exact fish filter
+    'ix_records_legacy_bait_trgm': ('records', "USING gin (lower(bait) gin_trgm_ops) WHERE bait1 IS NULL", True),
+    'ix_records_created_at_brin': ('records', "USING brin (created_at)", False),
+}
+RECENT_INDEX_PREFIX = "ix_records_recent_w"
+KEEP_INDEXES = {'uq_records_id_week'}  # Partitioned records: id uniqueness instead of the primary key
+
+
+def recent_index_cutoff(now=None):
+    """Start of the oldest reset week the recent index covers"""
+    return week_start(now or datetime.now(timezone.utc)) - timedelta(days=7 * (RECENT_INDEX_WEEKS - 1))
+
+
+def recent_index(now=None):
+    """(name, definition) of the partial covering index for the current recent weeks"""
+    cutoff = recent_index_cutoff(now)
+    return (
+        f"{RECENT_INDEX_PREFIX}{cutoff:%Y%m%d}",
+        f"(created_at) INCLUDE (fish, bait1, bait2, bait, weight) "
+        f"WHERE created_at >= '{cutoff:%Y-%m-%d %H:%M:%S}'",
+    )
+
+
+def declared_indexes():
+    """Index names the Record model declares, plus the ones this module manages"""
+    from database import Record
+    return {index.name for index in Record.__table__.indexes} | set(MANAGED_INDEXES) | KEEP_INDEXES
+
+
+def schema_indexes(conn, valid=True):
+    """
+    Names of the valid (or, with valid=False, invalid) indexes in the schema.
+    An invalid index is what a failed or cancelled CREATE INDEX CONCURRENTLY
+    leaves behind: it is maintained on writes but never used, so it counts as missing.
+    """
+    return {row[0] for row in conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relnamespace = current_schema()::regnamespace AND i.indisvalid = :valid"
+    ), {'valid': valid})}
+
+
+def drop_invalid_index(engine, index_name, invalid):
+    """Drop a leftover invalid build of index_name so it can be built again"""
+    if index_name in invalid:
+        drop_records_index(engine, index_name)
+        logger.warning(f"🗑️ Dropped invalid index {index_name} (failed or cancelled build) - rebuilding it")
+
+
+def create_records_index(engine, index_name, definition):
+    """
+    CREATE INDEX {index_name} ON records {definition} without blocking writers:
+    CONCURRENTLY on PostgreSQL and, when records is partitioned, one concurrent
+    build per partition attached to a parent index created ON ONLY records.
+    Invalid leftovers of an earlier failed build are dropped first.
+    """
+    if engine.dialect.name != 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON records {definition}"))
+        return
+    with engine.connect() as conn:
+        invalid = schema_indexes(conn, valid=False)
+    drop_invalid_index(engine, index_name, invalid)
+    if not records_partitioned(engine):
+        with engine.connect() as conn:
+            # CONCURRENT index creation cannot run inside a transaction
+            conn.execute(text("COMMIT"))
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON records {definition}"))
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON ONLY records {definition}"))
+    for partition in list_partitions(engine):
+        if not partition['attached']:
+            continue
+        child_name = f"{partition['name']}_{index_name}"[:63]
+        drop_invalid_index(engine, child_name, invalid)
+        with engine.connect() as conn:
+            conn.execute(text("COMMIT"))
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child_name} ON {partition['name']} {definition}"))
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER INDEX {index_name} ATTACH PARTITION {child_name}"))
+
+
+def drop_records_index(engine, index_name):
+    """DROP INDEX CONCURRENTLY (a partitioned parent index can only be dropped plainly)"""
+    with engine.connect() as conn:
+        conn.execute(text("COMMIT"))
+        concurrently = "" if records_partitioned(engine) else "CONCURRENTLY "
+        conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {index_name}"))
+
+
+def records_indexes(conn):
+    """Every index on records with its definition, scan count and size"""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique OR i.indisprimary, "
+        "i.indnatts = 1 AND i.indexprs IS NULL AND i.indpred IS NULL AND am.amname = 'btree', "
+        "(SELECT COALESCE(SUM(s.idx_scan), 0) FROM pg_partition_tree(i.indexrelid::regclass) t "
+        " JOIN pg_stat_user_indexes s ON s.indexrelid = t.relid), "
+        "(SELECT COALESCE(SUM(pg_relation_size(t.relid)), 0) FROM pg_partition_tree(i.indexrelid::regclass) t) "
+        "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am am ON am.oid = c.relam "
+        "WHERE i.indrelid = to_regclass('records') ORDER BY c.relname"
+    )).fetchall()
+    return [
+        {'name': name, 'definition': definition, 'unique': unique, 'single_column': single, 'scans': scans, 'size_bytes': size}
+        for name, definition, unique, single, scans, size in rows
+    ]
+
+
+def statistics_days(conn):
+    """Days the index usage counters have been collecting (since reset or server start)"""
+    return conn.execute(text(
+        "SELECT EXTRACT(EPOCH FROM now() - COALESCE(stats_reset, pg_postmaster_start_time())) / 86400 "
+        "FROM pg_stat_database WHERE datname = current_database()"
+    )).scalar() or 0
+
+
+def redundant_indexes(indexes, declared, stats_days):
+    """
+    (name, reason) for indexes to drop: duplicates of another index (the
+    declared or alphabetically first copy stays) and never-scanned single-column
+    btree indexes the model no longer declares. Unique indexes always stay.
+    """
+    redundant = []
+    by_shape = {}
+    for index in indexes:
+        shape = re.sub(r"INDEX \S+ ON (ONLY )?", "INDEX ON ", index['definition'])
+        by_shape.setdefault(shape, []).append(index)
+    for copies in by_shape.values():
+        keeper = min(copies, key=lambda index: (not index['unique'], index['name'] not in declared, index['name']))
+        redundant += [(index['name'], f"duplicate of {keeper['name']}")
+                      for index in copies if index is not keeper and not index['unique']]
+
+    duplicates = {name for name, _ in redundant}
+    if stats_days >= UNUSED_INDEX_DAYS:
+        redundant += [
+            (index['name'], f"not scanned in {int(stats_days)} days")
+            for index in indexes
+            if index['single_column'] and not index['unique'] and index['scans'] == 0
+            and index['name'] not in declared and index['name'] not in duplicates
+        ]
+    return redundant
+
+
+def apply_index_suite(engine, now=None, drop=True):
+    """Create the managed indexes, rotate the recent-weeks index, drop redundant ones"""
+    if engine.dialect.name != 'postgresql':
+        return {'postgresql': False}
+
+    result = {'postgresql': True, 'created': [], 'dropped': [], 'skipped': []}
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        trigram = True
+    except Exception as e:
+        logger.warning(f"⚠️ pg_trgm unavailable, skipping trigram indexes: {e}")
+        trigram = False
+
+    recent_name, recent_definition = recent_index(now)
+    wanted = dict(MANAGED_INDEXES)
+    wanted[recent_name] = ('records', recent_definition, False)
+    with engine.connect() as conn:
+        existing = schema_indexes(conn)
+        invalid = schema_indexes(conn, valid=False)
+
+    for name, (table, definition, needs_trigram) in wanted.items():
+        if name in existing:
+            continue
+        if needs_trigram and not trigram:
+            result['skipped'].append(name)
+            continue
+        try:
+            if table == 'records':
+                create_records_index(engine, name, definition)
+            else:
+                drop_invalid_index(engine, name, invalid)
+                with engine.connect() as conn:
+                    conn.execute(text("COMMIT"))
+                    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}"))
+            result['created'].append(name)
+            logger.info(f"🔧 Created index {name}")
+        except Exception as e:
+            logger.error(f"❌ Failed to create index {name}: {e}")
+            result['skipped'].append(name)
+
+    # The previous weeks' recent index goes once the current one is built
+    if recent_name in existing or recent_name in result['created']:
+        for name in sorted(existing):
+            if name.startswith(RECENT_INDEX_PREFIX) and name != recent_name:
+                drop_records_index(engine, name)
+                result['dropped'].append({'name': name, 'reason': 'superseded recent-weeks index'})
+
+    if drop:
+        with engine.connect() as conn:
+            candidates = redundant_indexes(records_indexes(conn), declared_indexes(), statistics_days(conn))
+        for name, reason in candidates:
+            if name.startswith(RECENT_INDEX_PREFIX):
+                continue
+            try:
+                drop_records_index(engine, name)
+                result['dropped'].append({'name': name, 'reason': reason})
+                logger.info(f"🗑️ Dropped index {name} ({reason})")
+            except Exception as e:
+                logger.error(f"❌ Failed to drop index {name}: {e}")
+    return result
+
+
+def index_report(engine, now=None):
+    """Managed indexes present/missing, every records index with its usage, and the drop candidates"""
+    if engine.dialect.name != 'postgresql':
+        return {'postgresql': False}
+    recent_name, _ = recent_index(now)
+    with engine.connect() as conn:
+        existing = schema_indexes(conn)
+        invalid = schema_indexes(conn, valid=False)
+        indexes = records_indexes(conn)
+        stats_days = statistics_days(conn)
+    return {
+        'postgresql': True,
+        'managed': {name: name in existing for name in [*MANAGED_INDEXES, recent_name]},
+        'invalid_indexes': sorted(invalid),
+        'records_indexes': indexes,
+        'statistics_days': round(float(stats_days), 1),
+        'drop_candidates': [
+            {'name': name, 'reason': reason} for name, reason in redundant_indexes(indexes, declared_indexes(), stats_days)
+        ],
+    }
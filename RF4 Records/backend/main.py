@@ -17,13 +17,24 @@ from database import (
     PollVote,
     create_tables,
 )
-from scraper import scrape_and_update_records, should_stop_scraping
+from scraper import should_stop_scraping, CATEGORIES
+from scrape_worker import SCRAPE_WORKER_ENABLED, get_scrape_progress, run_scrape, stop_scrape_worker
+from scrape_scheduler import build_units
+from adaptive_schedule import ADAPTIVE_SCHEDULE_ENABLED, UnitSchedule
+from browser_supervisor import (
+    BROWSER_SUPERVISOR_ENABLED,
+    PREWARM_LEAD_SECONDS,
+    prewarm_browser,
+    shutdown_browser_supervisor,
+)
+from optimized_records import get_last_record_reset_date
 from unified_cleanup import periodic_cleanup, get_memory_usage
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from scheduler import get_current_schedule_period, get_next_schedule_change
 import logging
 import gc
+import math
 import signal
 import sys
 import time
@@ -220,6 +231,30 @@ async def lifespan(app: FastAPI):
             periodic_memory_cleanup, "interval", seconds=90, id="memory_cleanup_job"
         )
 
+        # Dimension ids for records written while they could not be resolved
+        scheduler.add_job(
+            backfill_dimension_ids, "interval", minutes=10, id="dimension_ids_job"
+        )
+
+        # Weekly records partitions are created ahead of each Sunday reset
+        scheduler.add_job(
+            maintain_record_partitions, "interval", hours=6, id="record_partitions_job"
+        )
+
+        # Managed index suite: missing indexes, the weekly recent index, redundant ones dropped
+        scheduler.add_job(
+            maintain_record_indexes,
+            "interval",
+            hours=12,
+            id="record_indexes_job",
+            next_run_time=datetime.now(timezone.utc) + timedelta(minutes=10),
+        )
+
+        # Weeks past RECORDS_ARCHIVE_RETAIN_WEEKS move to the cold-tier archive files
+        scheduler.add_job(
+            archive_record_weeks, "interval", hours=24, id="record_archive_job"
+        )
+
         print(
             "Dynamic scheduler started - frequency based on weekly schedule", flush=True
         )
@@ -282,6 +317,8 @@ async def lifespan(app: FastAPI):
     logger.info("=== SERVER SHUTDOWN ===")
     scheduler.shutdown()
     logger.info("Scheduler shutdown complete")
+    stop_scrape_worker()
+    shutdown_browser_supervisor()
 
     # Stop memory monitoring
     try:
@@ -422,6 +459,7 @@ def signal_handler(signum, frame):
     # Stop any ongoing scraping
     global should_stop_scraping
     should_stop_scraping = True
+    stop_scrape_worker()
 
     # Wait for any ongoing scraping to finish (with timeout)
     with scraping_lock:
@@ -440,11 +478,6 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
-signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
-
-
 def scheduled_scrape():
     """Wrapper function for scheduled scraping with error handling and memory management"""
     global is_scraping
@@ -464,7 +497,8 @@ def scheduled_scrape():
         memory_before_cleanup = get_memory_usage()
 
         # PRE-SCRAPE CLEANUP: Clear memory accumulated during idle period
-        if memory_before_cleanup > 300:  # Significant memory accumulation
+        # (not needed when the scrape runs in its own worker process)
+        if not SCRAPE_WORKER_ENABLED and memory_before_cleanup > 300:  # Significant memory accumulation
             logger.info(
                 f"🧹 Pre-scrape cleanup: Memory at {memory_before_cleanup:.1f}MB - clearing idle accumulation"
             )
@@ -516,7 +550,7 @@ def scheduled_scrape():
         logger.info(
             f"Starting {frequency} scheduled scrape (Memory: {memory_before:.1f} MB)"
         )
-        result = scrape_and_update_records()
+        result = run_scrape(only_due_units=ADAPTIVE_SCHEDULE_ENABLED)
 
         # Log memory after scrape
         memory_after = get_memory_usage()
@@ -589,6 +623,26 @@ def scheduled_scrape():
         schedule_next_scrape()
 
 
+def get_adaptive_delay_minutes():
+    """Minutes until the next unit is due on the adaptive schedule (at least 1)"""
+    unit_schedule = UnitSchedule()
+    unit_schedule.start_week(get_last_record_reset_date())
+    seconds = unit_schedule.seconds_until_next_due(build_units(CATEGORIES))
+    return max(1, math.ceil(seconds / 60))
+
+
+def schedule_browser_prewarm(run_time):
+    """Warm the supervised browser shortly before a scrape (if the Selenium fallback is in use)"""
+    if not BROWSER_SUPERVISOR_ENABLED:
+        return
+    prewarm_time = run_time - timedelta(seconds=PREWARM_LEAD_SECONDS)
+    if prewarm_time > datetime.now(timezone.utc):
+        scheduler.add_job(
+            prewarm_browser, "date", run_date=prewarm_time, id="browser_prewarm_job",
+            replace_existing=True,
+        )
+
+
 def schedule_next_scrape():
     """Schedule the next scrape based on current time period"""
     try:
@@ -597,7 +651,11 @@ def schedule_next_scrape():
             scheduler.remove_job("scrape_job")
 
         current_period = get_current_schedule_period()
-        if current_period == "3-minute":
+        if ADAPTIVE_SCHEDULE_ENABLED:
+            # Adaptive: wake up when the earliest category/region unit is due
+            delay_minutes = get_adaptive_delay_minutes()
+            frequency = "adaptive"
+        elif current_period == "3-minute":
             # High frequency: 3 minutes after completion
             delay_minutes = 3
             frequency = "3-minute"
@@ -615,6 +673,7 @@ def schedule_next_scrape():
         scheduler.add_job(
             scheduled_scrape, "date", run_date=next_run_time, id="scrape_job"
         )
+        schedule_browser_prewarm(next_run_time)
 
         print(
             f"Next {frequency} scrape scheduled for {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}",
@@ -644,7 +703,9 @@ def update_schedule():
 
         # Schedule the first scrape based on current frequency period
         current_period = get_current_schedule_period()
-        if current_period == "3-minute":
+        if ADAPTIVE_SCHEDULE_ENABLED:
+            delay_minutes = get_adaptive_delay_minutes()
+        elif current_period == "3-minute":
             delay_minutes = 3
         elif current_period == "30-minute":
             delay_minutes = 30
@@ -655,6 +716,7 @@ def update_schedule():
         scheduler.add_job(
             scheduled_scrape, "date", run_date=first_run_time, id="scrape_job"
         )
+        schedule_browser_prewarm(first_run_time)
 
         print(
             f"First scrape scheduled for {first_run_time.strftime('%Y-%m-%d %H:%M:%S')} ({delay_minutes}-minute delay)",
@@ -752,6 +814,68 @@ def periodic_memory_cleanup():
         logger.debug(f"Periodic cleanup error: {type(e).__name__}")
 
 
+def backfill_dimension_ids():
+    """Fill dimension ids the record writers had to skip (dimensions.py) while not scraping"""
+    if is_scraping:
+        return
+    try:
+        from database import engine
+        from dimensions import backfill_missing_ids
+
+        backfill_missing_ids(engine)
+    except Exception as e:
+        logger.error(f"Dimension id backfill failed: {e}")
+
+
+def maintain_record_partitions():
+    """Create the coming weeks' records partitions and detach weeks past retention"""
+    try:
+        from database import engine
+        from record_partitions import maintain_partitions
+
+        result = maintain_partitions(engine)
+        if result.get("detached"):
+            logger.info(f"📦 Detached records partitions: {', '.join(result['detached'])}")
+    except Exception as e:
+        logger.error(f"Records partition maintenance failed: {e}")
+
+
+def maintain_record_indexes():
+    """Apply the managed records index suite (index_suite.py) while not scraping"""
+    if is_scraping:
+        return
+    try:
+        from database import engine
+        from index_suite import apply_index_suite
+
+        result = apply_index_suite(engine)
+        if result.get("created") or result.get("dropped"):
+            logger.info(
+                f"🔧 Index suite: created {result['created']}, dropped {[d['name'] for d in result['dropped']]}"
+            )
+    except Exception as e:
+        logger.error(f"Records index maintenance failed: {e}")
+
+
+def archive_record_weeks():
+    """Move reset weeks past retention into the cold-tier archive (record_archive.py) while not scraping"""
+    if is_scraping:
+        return
+    try:
+        from database import engine
+        from record_archive import ARCHIVE_RETAIN_WEEKS, archive_old_weeks
+
+        if ARCHIVE_RETAIN_WEEKS <= 0:
+            return
+        result = archive_old_weeks(engine)
+        if result["archived_weeks"]:
+            logger.info(
+                f"🧊 Archived {result['archived_records']} records: {', '.join(result['archived_weeks'])}"
+            )
+    except Exception as e:
+        logger.error(f"Records archiving failed: {e}")
+
+
 @app.get("/health")
 def health_check():
     """Enhanced health check endpoint for Railway and monitoring"""
@@ -960,8 +1084,11 @@ def get_filtered_records_endpoint(
     data_age: str = None,
     limit: int = None,
     offset: int = None,
+    category: str = None,
+    caught_from: str = None,
+    caught_to: str = None,
 ):
-    """Get filtered records based on criteria"""
+    """Get filtered records based on criteria (caught_from/caught_to: inclusive YYYY-MM-DD catch dates)"""
     import time
 
     api_start = time.time()
@@ -973,6 +1100,12 @@ def get_filtered_records_endpoint(
         fish_list = fish.split(",") if fish else None
         waterbody_list = waterbody.split(",") if waterbody else None
         bait_list = bait.split(",") if bait else None
+        category_list = category.split(",") if category else None  # Codes (N,L) or keys (normal,light)
+        try:
+            caught_from_date = date.fromisoformat(caught_from) if caught_from else None
+            caught_to_date = date.fromisoformat(caught_to) if caught_to else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="caught_from/caught_to must be YYYY-MM-DD dates")
 
         result = get_filtered_records_optimized(
             fish=fish_list,
@@ -981,6 +1114,9 @@ def get_filtered_records_endpoint(
             data_age=data_age,
             limit=limit,
             offset=offset,
+            category=category_list,
+            caught_from=caught_from_date,
+            caught_to=caught_to_date,
         )
 
         api_time = time.time() - api_start
@@ -990,7 +1126,8 @@ def get_filtered_records_endpoint(
             f"  Retrieved {result['showing_count']} of {result['total_filtered']} filtered records"
         )
         logger.info(
-            f"  Filters: fish={fish}, waterbody={waterbody}, bait={bait}, data_age={data_age}"
+            f"  Filters: fish={fish}, waterbody={waterbody}, bait={bait}, data_age={data_age}, category={category}, "
+            f"caught={caught_from}..{caught_to}"
         )
         logger.info(f"  Total API time: {api_time:.3f}s")
         logger.info(f"  DB time: {result['performance']['query_time']}s")
@@ -998,6 +1135,8 @@ def get_filtered_records_endpoint(
 
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         api_time = time.time() - api_start
         logger.error(f"Error retrieving filtered records after {api_time:.3f}s: {e}")
@@ -1381,7 +1520,7 @@ def refresh(request: Request, token: str = Depends(verify_admin_token)):
 
     logger.info("=== MANUAL SCRAPE TRIGGERED ===")
     try:
-        result = scrape_and_update_records()
+        result = run_scrape()
         return {
             "message": "Scraping completed",
             "success": result["success"],
@@ -1516,8 +1655,8 @@ def migrate_trophy_classification(token: str = Depends(verify_admin_token)):
 
 
 @app.post("/vacuum")
-def vacuum_database(token: str = Depends(verify_admin_token)):
-    """Manually run VACUUM to reclaim space from deleted records"""
+def vacuum_database(week: str = None, token: str = Depends(verify_admin_token)):
+    """Manually run VACUUM to reclaim space from deleted records (one reset week's partition with week=YYYY-MM-DD)"""
     try:
         from database import get_database_url
         from sqlalchemy import create_engine, text
@@ -1533,6 +1672,11 @@ def vacuum_database(token: str = Depends(verify_admin_token)):
                 "database_type": "SQLite",
             }
 
+        # A weekly partition (see record_partitions.py) or the whole table
+        from record_partitions import parse_week, partition_name
+
+        target = partition_name(parse_week(week)) if week else "records"
+
         # Capture output
         import io
         import sys
@@ -1549,8 +1693,8 @@ def vacuum_database(token: str = Depends(verify_admin_token)):
             with engine.connect() as conn:
                 # Get size before VACUUM
                 result = conn.execute(
-                    text("""
-                    SELECT pg_size_pretty(pg_total_relation_size('records')) as size_before
+                    text(f"""
+                    SELECT pg_size_pretty((SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree('{target}'))) as size_before
                 """)
                 )
                 size_before = result.fetchone()[0]
@@ -1558,12 +1702,12 @@ def vacuum_database(token: str = Depends(verify_admin_token)):
 
                 # Run VACUUM
                 conn.execute(text("COMMIT"))
-                conn.execute(text("VACUUM records"))
+                conn.execute(text(f"VACUUM {target}"))
 
                 # Get size after VACUUM
                 result = conn.execute(
-                    text("""
-                    SELECT pg_size_pretty(pg_total_relation_size('records')) as size_after
+                    text(f"""
+                    SELECT pg_size_pretty((SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree('{target}'))) as size_after
                 """)
                 )
                 size_after = result.fetchone()[0]
@@ -1590,8 +1734,8 @@ def vacuum_database(token: str = Depends(verify_admin_token)):
 
 
 @app.post("/vacuum/full")
-def vacuum_full_database(token: str = Depends(verify_admin_token)):
-    """Run VACUUM FULL to completely rebuild the database and reclaim maximum space"""
+def vacuum_full_database(week: str = None, token: str = Depends(verify_admin_token)):
+    """Run VACUUM FULL to completely rebuild the database and reclaim maximum space (week=YYYY-MM-DD locks one partition only)"""
     try:
         from database import get_database_url
         from sqlalchemy import create_engine, text
@@ -1607,6 +1751,11 @@ def vacuum_full_database(token: str = Depends(verify_admin_token)):
                 "database_type": "SQLite",
             }
 
+        # A weekly partition (see record_partitions.py) or the whole table
+        from record_partitions import parse_week, partition_name
+
+        target = partition_name(parse_week(week)) if week else "records"
+
         # Capture output
         import io
         import sys
@@ -1628,10 +1777,10 @@ def vacuum_full_database(token: str = Depends(verify_admin_token)):
             with engine.connect() as conn:
                 # Get sizes before VACUUM FULL
                 result = conn.execute(
-                    text("""
+                    text(f"""
                     SELECT 
                         pg_size_pretty(pg_database_size(current_database())) as total_db_size,
-                        pg_size_pretty(pg_total_relation_size('records')) as table_size
+                        pg_size_pretty((SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree('{target}'))) as table_size
                 """)
                 )
                 before = result.fetchone()
@@ -1640,15 +1789,15 @@ def vacuum_full_database(token: str = Depends(verify_admin_token)):
 
                 # Run VACUUM FULL
                 conn.execute(text("COMMIT"))
-                logger.info("Running VACUUM FULL records...")
-                conn.execute(text("VACUUM FULL records"))
+                logger.info(f"Running VACUUM FULL {target}...")
+                conn.execute(text(f"VACUUM FULL {target}"))
 
                 # Get sizes after VACUUM FULL
                 result = conn.execute(
-                    text("""
+                    text(f"""
                     SELECT 
                         pg_size_pretty(pg_database_size(current_database())) as total_db_size,
-                        pg_size_pretty(pg_total_relation_size('records')) as table_size
+                        pg_size_pretty((SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree('{target}'))) as table_size
                 """)
                 )
                 after = result.fetchone()
@@ -2001,6 +2150,7 @@ def get_status():
             "server_status": "running",
             "scheduler_active": scheduler.running,
             "is_scraping": is_scraping,
+            "scrape_progress": get_scrape_progress(),
             "total_records": total_records,
             "current_frequency": frequency,
             "next_schedule_change": next_change.isoformat(),
@@ -3244,6 +3394,170 @@ def get_all_memory_snapshots(token: str = Depends(verify_admin_token)):
         return {"error": str(e)}
 
 
+@app.get("/admin/scrape-ledger/runs")
+def get_scrape_ledger_runs(
+    limit: int = 50, run_id: int = None, token: str = Depends(verify_admin_token)
+):
+    """Recent scrape runs (time series), or the per-region units of one run"""
+    try:
+        from scrape_ledger import recent_runs, run_units
+
+        db = SessionLocal()
+        try:
+            if run_id is not None:
+                units = run_units(db, run_id)
+                return {"run_id": run_id, "units": units, "count": len(units)}
+            runs = recent_runs(db, min(max(limit, 1), 500))
+            return {"runs": runs, "count": len(runs)}
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error reading scrape ledger runs: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/admin/scrape-ledger/summary")
+def get_scrape_ledger_summary(
+    days: int = 7,
+    category: str = None,
+    region: str = None,
+    token: str = Depends(verify_admin_token),
+):
+    """p50/p90/p99 run durations and per category/region timings, slowest regions first"""
+    try:
+        from scrape_ledger import SUMMARY_MAX_DAYS, ledger_summary
+
+        db = SessionLocal()
+        try:
+            days = min(max(days, 1), SUMMARY_MAX_DAYS)
+            return ledger_summary(db, days=days, category=category, region=region)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error summarizing scrape ledger: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/admin/scrape-queue")
+def get_scrape_queue(token: str = Depends(verify_admin_token)):
+    """Shared scrape work queue: jobs by status, leases per worker, failed units"""
+    try:
+        from scrape_queue import SCRAPE_QUEUE_ENABLED, queue_status
+
+        db = SessionLocal()
+        try:
+            return {"enabled": SCRAPE_QUEUE_ENABLED, **queue_status(db)}
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error reading scrape queue: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/admin/record-partitions")
+def get_record_partitions(token: str = Depends(verify_admin_token)):
+    """Weekly records partitions with bounds, sizes and row estimates"""
+    try:
+        from database import engine
+        from record_partitions import list_partitions, records_partitioned
+
+        if not records_partitioned(engine):
+            return {"partitioned": False, "partitions": []}
+        partitions = list_partitions(engine)
+        return {"partitioned": True, "partitions": partitions, "count": len(partitions)}
+    except Exception as e:
+        logger.error(f"Error listing records partitions: {e}")
+        return {"error": str(e)}
+
+
+@app.post("/admin/record-partitions/maintain")
+def run_record_partition_maintenance(token: str = Depends(verify_admin_token)):
+    """Create the weeks ahead now and detach weeks past RECORDS_PARTITION_RETAIN_WEEKS"""
+    try:
+        from database import engine
+        from record_partitions import maintain_partitions
+
+        return maintain_partitions(engine)
+    except Exception as e:
+        logger.error(f"Error maintaining records partitions: {e}")
+        return {"error": str(e)}
+
+
+@app.post("/admin/record-partitions/{action}")
+def change_record_partition(
+    action: str, week: str, token: str = Depends(verify_admin_token)
+):
+    """Detach or re-attach one reset week (week = any date in it, YYYY-MM-DD)"""
+    try:
+        from database import engine
+        from record_partitions import attach_partition, detach_partition, parse_week
+
+        if action not in ("attach", "detach"):
+            raise HTTPException(status_code=404, detail=f"Unknown partition action: {action}")
+        change = attach_partition if action == "attach" else detach_partition
+        return {"action": action, "partition": change(engine, parse_week(week))}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error trying to {action} records partition for {week}: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/admin/indexes")
+def get_index_report(token: str = Depends(verify_admin_token)):
+    """Managed index suite status, every records index with scans/size, and drop candidates"""
+    try:
+        from database import engine
+        from index_suite import index_report
+
+        return index_report(engine)
+    except Exception as e:
+        logger.error(f"Error building index report: {e}")
+        return {"error": str(e)}
+
+
+@app.post("/admin/indexes/apply")
+def apply_index_suite_endpoint(drop: bool = True, token: str = Depends(verify_admin_token)):
+    """Create missing managed indexes concurrently and (unless drop=false) drop redundant ones"""
+    try:
+        from database import engine
+        from index_suite import apply_index_suite
+
+        return apply_index_suite(engine, drop=drop)
+    except Exception as e:
+        logger.error(f"Error applying index suite: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/admin/records-archive")
+def get_records_archive(token: str = Depends(verify_admin_token)):
+    """Archived reset weeks with their row counts and file sizes"""
+    try:
+        from record_archive import archive_summary
+
+        return archive_summary()
+    except Exception as e:
+        logger.error(f"Error reading records archive: {e}")
+        return {"error": str(e)}
+
+
+@app.post("/admin/records-archive/run")
+def run_records_archive(retain_weeks: int, token: str = Depends(verify_admin_token)):
+    """Archive every reset week older than the newest retain_weeks weeks"""
+    if is_scraping:
+        return {"error": "Scrape in progress - try again once it finishes"}
+    try:
+        from database import engine
+        from record_archive import archive_old_weeks
+
+        if retain_weeks < 1:
+            return {"error": "retain_weeks must be at least 1"}
+        return archive_old_weeks(engine, retain_weeks=retain_weeks)
+    except Exception as e:
+        logger.error(f"Error archiving records: {e}")
+        return {"error": str(e)}
+
+
 @app.post("/api/cafe-orders/confirm")
 async def confirm_cafe_orders(orders: list[dict]):
     """Confirm and save cafe orders to database"""
@@ -4299,6 +4613,11 @@ def check_fish_name_matches():
 if __name__ == "__main__":
     import uvicorn
 
+    # Registered here, not at import: spawned children (scrape worker, browser,
+    # parse/replay pools) re-import this file as __mp_main__ and keep their own handlers
+    signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
+    signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
+
     # Get port from environment or use default
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
@@ -6,8 +6,18 @@ Eliminates the need for frontend deduplication by storing combined categories.
 
 import os
 import sys
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text, inspect, update
 from database import get_database_url, Record, SessionLocal
+from record_keys import (
+    CATEGORY_BITS,
+    CATEGORY_MASK_STRINGS,
+    KEY_FIELDS,
+    category_mask,
+    category_string_sql,
+    merged_category_mask_sql,
+    record_key_hash,
+    stored_category_mask,
+)
 import logging
 
 # Set up logging
@@ -105,28 +115,29 @@ def merge_duplicate_records(batch_size=5000):
         
         for key, group_records in batch_to_process:
             try:
-                # Collect all categories for this group
-                categories = []
+                # OR together the group's category masks (legacy strings for rows without one)
+                combined_mask = 0
                 for record in group_records:
-                    if record.category:
-                        category_normalized = record.category.lower().strip()
-                        if category_normalized in category_mapping:
-                            category_code = category_mapping[category_normalized]
-                            if category_code not in categories:
-                                categories.append(category_code)
+                    combined_mask |= stored_category_mask(record)
+                combined_mask = combined_mask or CATEGORY_BITS['N']  # Default to Normal if no valid categories
                 
-                # Sort categories for consistent ordering
-                categories.sort()
-                combined_category = ';'.join(categories) if categories else 'N'  # Default to Normal if no valid categories
-                
-                # Keep the first record and update its category
-                primary_record = group_records[0]
-                primary_record.category = combined_category
+                # Keep the record holding the record key (else the first); the string follows the mask
+                primary_record = next((r for r in group_records if r.record_key), group_records[0])
+                primary_record.category_mask = combined_mask
+                primary_record.category = CATEGORY_MASK_STRINGS[combined_mask]
                 
                 # Delete the duplicate records
-                for duplicate_record in group_records[1:]:
-                    db.delete(duplicate_record)
-                    deleted_count += 1
+                for duplicate_record in group_records:
+                    if duplicate_record is not primary_record:
+                        db.delete(duplicate_record)
+                        deleted_count += 1
+                
+                # Make sure the survivor is the upsert target for its natural key
+                if not primary_record.record_key:
+                    db.flush()
+                    primary_record.record_key = record_key_hash({
+                        field: getattr(primary_record, field) for field in KEY_FIELDS
+                    })
                 
                 merged_count += 1
                 
@@ -147,21 +158,23 @@ def merge_duplicate_records(batch_size=5000):
         
         # Use a direct query to update remaining single category records efficiently
         try:
-            # Update records that still have old category format
+            # Update records that still have old category format - mask and string in one statement
+            table = Record.__table__
             for old_cat, new_cat in category_mapping.items():
-                result = db.execute(text(f"""
-                    UPDATE records 
-                    SET category = :new_cat 
-                    WHERE category = :old_cat
-                """), {"new_cat": new_cat, "old_cat": old_cat})
+                merged = merged_category_mask_sql(table.c.category_mask, table.c.category, category_mask(new_cat))
+                result = db.execute(
+                    update(table)
+                    .where(table.c.category == old_cat)
+                    .values(category_mask=merged, category=category_string_sql(merged))
+                )
                 updated_singles += result.rowcount
             
             # Set null categories to Normal
             result = db.execute(text("""
                 UPDATE records 
-                SET category = 'N' 
-                WHERE category IS NULL
-            """))
+                SET category = 'N', category_mask = :normal 
+                WHERE category IS NULL AND COALESCE(category_mask, 0) = 0
+            """), {"normal": CATEGORY_BITS['N']})
             updated_singles += result.rowcount
             
             print(f"  Updated {updated_singles:,} single records with SQL batch update")
@@ -2,9 +2,13 @@
 Database migrations for RF4 Records
 """
 
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
-from database import SessionLocal, CafeOrder
+from database import SessionLocal, CafeOrder, engine
+from record_keys import KEY_FIELDS, record_key_hash
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +44,329 @@ def migrate_yana_to_yama():
     finally:
         db.close()
 
+def add_record_key_column(batch_size=5000):
+    """
+    Migration: Add the natural-key hash column and its unique index (the upsert target).
+    Rows are backfilled in id order; for duplicate groups only the oldest row keeps
+    the key (merge_duplicate_records.py folds the rest in).
+    """
+    from record_partitions import records_partitioned
+    
+    inspector = inspect(engine)
+    if 'records' not in inspector.get_table_names():
+        return
+    if any(index['name'] == 'uq_records_record_key' for index in inspector.get_indexes('records')):
+        return
+    if records_partitioned(engine):
+        return  # Keys are unique through record_key_registry (record_partitions.py)
+    
+    is_postgres = engine.dialect.name == 'postgresql'
+    try:
+        columns = [column['name'] for column in inspector.get_columns('records')]
+        if 'record_key' not in columns:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE records ADD COLUMN record_key VARCHAR(32)"))
+            print("Migration: Added records.record_key column", flush=True)
+        
+        # Backfill in keyset-paginated batches
+        select_sql = text(
+            f"SELECT id, {', '.join(KEY_FIELDS)} FROM records "
+            "WHERE id > :last_id AND record_key IS NULL ORDER BY id LIMIT :limit"
+        )
+        update_sql = text("UPDATE records SET record_key = :record_key WHERE id = :id")
+        last_id = 0
+        backfilled = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(select_sql, {'last_id': last_id, 'limit': batch_size}).fetchall()
+                if not rows:
+                    break
+                conn.execute(update_sql, [
+                    {'id': row[0], 'record_key': record_key_hash(dict(zip(KEY_FIELDS, row[1:])))}
+                    for row in rows
+                ])
+            last_id = rows[-1][0]
+            backfilled += len(rows)
+            if backfilled % (batch_size * 20) == 0:
+                print(f"Migration: Backfilled {backfilled} record keys...", flush=True)
+        print(f"Migration: Backfilled {backfilled} record keys", flush=True)
+        
+        # Duplicates (same natural key) keep the key on their oldest row only
+        with engine.begin() as conn:
+            cleared = conn.execute(text(
+                "UPDATE records SET record_key = NULL WHERE record_key IS NOT NULL AND id NOT IN "
+                "(SELECT MIN(id) FROM records WHERE record_key IS NOT NULL GROUP BY record_key)"
+            )).rowcount
+        if cleared:
+            print(f"Migration: {cleared} duplicate records left without a key - run merge_duplicate_records.py", flush=True)
+        
+        if is_postgres:
+            with engine.connect() as conn:
+                # CONCURRENT index creation cannot run inside a transaction
+                conn.execute(text("COMMIT"))
+                conn.execute(text("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_records_record_key ON records (record_key)"))
+        else:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_records_record_key ON records (record_key)"))
+        print("Migration: Created unique index uq_records_record_key", flush=True)
+        
+    except Exception as e:
+        logger.error(f"Record key migration failed: {e}")
+        print(f"Migration: Error adding record key column: {e}", flush=True)
+
+def add_dimension_columns(batch_size=5000):
+    """
+    Migration: Dimension tables and the records.*_id columns that reference them.
+    Dimension rows are filled from the distinct record strings, then record ids
+    are backfilled in id-range batches (rows written since then already carry
+    them). Only the id columns the filters match on are indexed, and the
+    composite indexes move from the strings to the integer ids; the string
+    indexes they replace are dropped.
+    """
+    from database import DIMENSION_IDS_PENDING, Base, DimBait, DimFish, DimPlayer, DimRegion, DimWaterbody
+    from dimensions import ID_COLUMNS
+    from index_suite import create_records_index, drop_records_index
+    
+    inspector = inspect(engine)
+    if 'records' not in inspector.get_table_names():
+        return
+    
+    is_postgres = engine.dialect.name == 'postgresql'
+    try:
+        Base.metadata.create_all(engine, tables=[
+            DimPlayer.__table__, DimFish.__table__, DimWaterbody.__table__, DimRegion.__table__, DimBait.__table__,
+        ])
+        
+        columns = [column['name'] for column in inspector.get_columns('records')]
+        for column, (id_column, dimension) in ID_COLUMNS.items():
+            if id_column not in columns:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE records ADD COLUMN {id_column} INTEGER REFERENCES dim_{dimension}(id)"))
+                print(f"Migration: Added records.{id_column} column", flush=True)
+        
+        # Every distinct name gets its dimension row
+        with engine.begin() as conn:
+            for column, (_, dimension) in ID_COLUMNS.items():
+                conn.execute(text(
+                    f"INSERT INTO dim_{dimension} (name) SELECT DISTINCT {column} FROM records "
+                    f"WHERE {column} IS NOT NULL ON CONFLICT (name) DO NOTHING"
+                ))
+        
+        # Backfill ids in id ranges; the scalar subqueries hit the unique name indexes
+        assignments = ', '.join(
+            f"{id_column} = (SELECT id FROM dim_{dimension} WHERE name = records.{column})"
+            for column, (id_column, dimension) in ID_COLUMNS.items()
+        )
+        missing = ' OR '.join(
+            f"({column} IS NOT NULL AND {id_column} IS NULL)" for column, (id_column, _) in ID_COLUMNS.items()
+        )
+        with engine.connect() as conn:
+            bounds = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM records WHERE {missing}")).first()
+        if bounds[0] is not None:
+            backfilled = 0
+            for low in range(bounds[0], bounds[1] + 1, batch_size):
+                with engine.begin() as conn:
+                    backfilled += conn.execute(
+                        text(f"UPDATE records SET {assignments} WHERE id >= :low AND id < :high AND ({missing})"),
+                        {'low': low, 'high': low + batch_size},
+                    ).rowcount
+            print(f"Migration: Backfilled dimension ids on {backfilled} records", flush=True)
+        
+        existing_indexes = {index['name'] for index in inspect(engine).get_indexes('records')}
+        id_indexes = {
+            'ix_records_bait1_id': '(bait1_id)',
+            'ix_records_bait2_id': '(bait2_id)',
+            'idx_fish_id_weight': '(fish_id, weight)',
+            'idx_waterbody_id_fish_id': '(waterbody_id, fish_id)',
+            # Rows written without their ids (see dimensions.backfill_missing_ids)
+            'ix_records_dimension_ids_pending': f"(id) WHERE {DIMENSION_IDS_PENDING}",
+        }
+        for index_name, definition in id_indexes.items():
+            if index_name not in existing_indexes:
+                create_records_index(engine, index_name, definition)
+        
+        # String indexes the integer ones replace (no filter compares the strings with = any more),
+        # and the single-column id indexes that lead a composite or that no filter uses
+        for index_name in ('idx_fish_weight', 'idx_waterbody_fish', 'idx_region_fish',
+                           'ix_records_fish', 'ix_records_waterbody', 'ix_records_region',
+                           'ix_records_fish_id', 'ix_records_waterbody_id',
+                           'ix_records_player_id', 'ix_records_region_id'):
+            if index_name in existing_indexes:
+                if is_postgres:
+                    drop_records_index(engine, index_name)
+                else:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+                print(f"Migration: Dropped redundant index {index_name}", flush=True)
+        
+    except Exception as e:
+        logger.error(f"Dimension table migration failed: {e}")
+        print(f"Migration: Error adding dimension columns: {e}", flush=True)
+
+def add_category_mask_column(batch_size=5000):
+    """
+    Migration: records.category_mask, the category bitmask the upsert ORs into.
+    Runs online: each id-range batch is its own short transaction, and rows the
+    backfill has not reached yet are still merged correctly (the upsert falls
+    back to their legacy string). The string index is dropped once the mask
+    index exists.
+    """
+    from sqlalchemy import update
+    from database import Record
+    from record_keys import legacy_category_mask_sql
+    
+    inspector = inspect(engine)
+    if 'records' not in inspector.get_table_names():
+        return
+    
+    is_postgres = engine.dialect.name == 'postgresql'
+    try:
+        columns = [column['name'] for column in inspector.get_columns('records')]
+        if 'category_mask' not in columns:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE records ADD COLUMN category_mask SMALLINT"))
+            print("Migration: Added records.category_mask column", flush=True)
+        
+        with engine.connect() as conn:
+            bounds = conn.execute(text("SELECT MIN(id), MAX(id) FROM records WHERE category_mask IS NULL")).first()
+        if bounds[0] is not None:
+            table = Record.__table__
+            converted = 0
+            for low in range(bounds[0], bounds[1] + 1, batch_size):
+                with engine.begin() as conn:
+                    converted += conn.execute(
+                        update(table)
+                        .where(table.c.id >= low, table.c.id < low + batch_size, table.c.category_mask.is_(None))
+                        .values(category_mask=legacy_category_mask_sql(table.c.category))
+                    ).rowcount
+                if converted and converted % (batch_size * 20) == 0:
+                    print(f"Migration: Converted {converted} category masks...", flush=True)
+            print(f"Migration: Converted {converted} records to category masks", flush=True)
+        
+        existing_indexes = {index['name'] for index in inspect(engine).get_indexes('records')}
+        if 'ix_records_category_mask' not in existing_indexes:
+            if is_postgres:
+                with engine.connect() as conn:
+                    # CONCURRENT index creation cannot run inside a transaction
+                    conn.execute(text("COMMIT"))
+                    conn.execute(text("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_records_category_mask ON records (category_mask)"))
+            else:
+                with engine.begin() as conn:
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_records_category_mask ON records (category_mask)"))
+            print("Migration: Created index ix_records_category_mask", flush=True)
+        if 'ix_records_category' in existing_indexes:
+            with engine.begin() as conn:
+                conn.execute(text("DROP INDEX IF EXISTS ix_records_category"))
+            print("Migration: Dropped index ix_records_category (category filters use the mask)", flush=True)
+        
+    except Exception as e:
+        logger.error(f"Category mask migration failed: {e}")
+        print(f"Migration: Error adding category mask column: {e}", flush=True)
+
+def partition_records_table(batch_size=5000):
+    """
+    Migration: Weekly created_at partitions for records (PostgreSQL, opt-in with
+    RECORDS_PARTITIONING=true). Once partitioned, only makes sure the coming
+    weeks' partitions exist.
+    """
+    from record_partitions import (
+        PARTITIONING_ENABLED,
+        convert_records_table,
+        ensure_partitions,
+        ensure_registry,
+        ensure_unique_ids,
+        records_partitioned,
+    )
+    
+    if engine.dialect.name != 'postgresql' or 'records' not in inspect(engine).get_table_names():
+        return
+    try:
+        if not records_partitioned(engine):
+            if not PARTITIONING_ENABLED:
+                return
+            convert_records_table(engine, batch_size=batch_size)
+            print("Migration: Partitioned records by reset week", flush=True)
+        ensure_unique_ids(engine)
+        ensure_registry(engine)
+        ensure_partitions(engine)
+    except Exception as e:
+        logger.error(f"Records partitioning migration failed: {e}")
+        print(f"Migration: Error partitioning records: {e}", flush=True)
+
+def backfill_catch_dates(batch_size=2000, pause_seconds=0.1):
+    """
+    Fill records.catch_date from the date text in id-range batches, pausing
+    between batches so the backfill never crowds out scrapes or API queries.
+    The date texts are few (one per day), so each one is parsed once and the
+    batches apply the mapping with a CASE.
+    """
+    from sqlalchemy import case, update
+    from database import Record
+    from index_suite import create_records_index
+    from records_parser import parse_catch_date
+    
+    table = Record.__table__
+    try:
+        with engine.connect() as conn:
+            date_texts = [row[0] for row in conn.execute(text(
+                "SELECT DISTINCT date FROM records WHERE catch_date IS NULL AND date IS NOT NULL"
+            ))]
+        mapping = {date_text: parse_catch_date(date_text) for date_text in date_texts}
+        mapping = {date_text: parsed for date_text, parsed in mapping.items() if parsed is not None}
+        if len(mapping) < len(date_texts):
+            print(f"Migration: {len(date_texts) - len(mapping)} date texts could not be parsed - catch_date left empty", flush=True)
+        
+        if mapping:
+            with engine.connect() as conn:
+                bounds = conn.execute(text(
+                    "SELECT MIN(id), MAX(id) FROM records WHERE catch_date IS NULL AND date IS NOT NULL"
+                )).first()
+            filled = 0
+            for low in range(bounds[0], bounds[1] + 1, batch_size):
+                with engine.begin() as conn:
+                    filled += conn.execute(
+                        update(table)
+                        .where(table.c.id >= low, table.c.id < low + batch_size,
+                               table.c.catch_date.is_(None), table.c.date.in_(list(mapping)))
+                        .values(catch_date=case(mapping, value=table.c.date))
+                    ).rowcount
+                if filled and filled % (batch_size * 50) == 0:
+                    print(f"Migration: Backfilled {filled} catch dates...", flush=True)
+                time.sleep(pause_seconds)
+            print(f"Migration: Backfilled {filled} catch dates", flush=True)
+        
+        if 'ix_records_catch_date' not in {index['name'] for index in inspect(engine).get_indexes('records')}:
+            create_records_index(engine, 'ix_records_catch_date', '(catch_date)')
+            print("Migration: Created index ix_records_catch_date", flush=True)
+    except Exception as e:
+        logger.error(f"Catch date backfill failed: {e}")
+        print(f"Migration: Error backfilling catch dates: {e}", flush=True)
+
+def add_catch_date_column(background=True):
+    """
+    Migration: records.catch_date, the typed catch date parsed from the date
+    text. New rows get it at ingest; existing rows are backfilled by a
+    throttled background thread so startup isn't held up by it.
+    """
+    inspector = inspect(engine)
+    if 'records' not in inspector.get_table_names():
+        return
+    try:
+        columns = [column['name'] for column in inspector.get_columns('records')]
+        if 'catch_date' not in columns:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE records ADD COLUMN catch_date DATE"))
+            print("Migration: Added records.catch_date column", flush=True)
+    except Exception as e:
+        logger.error(f"Catch date migration failed: {e}")
+        print(f"Migration: Error adding catch date column: {e}", flush=True)
+        return
+    
+    if background:
+        threading.Thread(target=backfill_catch_dates, name="catch-date-backfill", daemon=True).start()
+    else:
+        backfill_catch_dates()
+
 def run_migrations():
     """
     Run all pending migrations
@@ -49,4 +376,19 @@ def run_migrations():
     # Run the Yana to Yama migration
     migrate_yana_to_yama()
     
+    # Natural-key hash column + unique index for record upserts
+    add_record_key_column()
+    
+    # Integer dimension keys for player/fish/waterbody/region/bait filters
+    add_dimension_columns()
+    
+    # Category bitmask replacing the "N;L;U" string for merges and filters
+    add_category_mask_column()
+    
+    # Weekly created_at partitions (opt-in) and the partitions for the weeks ahead
+    partition_records_table()
+    
+    # Typed catch date parsed from the date text (throttled background backfill)
+    add_catch_date_column()
+    
     print("Database migrations completed", flush=True)
\ No newline at end of file
@@ -4,9 +4,12 @@ High-performance record loading with database-level optimizations.
 Replaces simplified_records.py with much faster queries.
 """
 
-from database import Record, SessionLocal
+from database import DimFish, DimWaterbody, Record, SessionLocal
 from bait_utils import normalize_bait_display, get_normalized_bait_for_filtering
-from sqlalchemy import func, distinct, text, or_
+from dimensions import dimensions_ready, get_dimension_cache
+from record_archive import archive_needed, query_archive
+from record_keys import category_list, masks_including
+from sqlalchemy import bindparam, func, distinct, select, text, or_
 from datetime import datetime, timedelta, timezone
 import logging
 import time
@@ -244,11 +247,7 @@ def get_initial_records_optimized(limit: int = 1000):
             else:
                 bait_display = record.bait1 or record.bait or ""
 
-            # Parse combined categories
-            if record.category and ";" in record.category:
-                categories = record.category.split(";")
-            else:
-                categories = [record.category] if record.category else ["N"]
+            categories = category_list(record.category_mask, record.category)
 
             result.append(
                 {
@@ -313,11 +312,7 @@ def get_remaining_records_optimized(skip: int = 1000):
             else:
                 bait_display = record.bait1 or record.bait or ""
 
-            # Parse combined categories
-            if record.category and ";" in record.category:
-                categories = record.category.split(";")
-            else:
-                categories = [record.category] if record.category else ["N"]
+            categories = category_list(record.category_mask, record.category)
 
             result.append(
                 {
@@ -375,11 +370,7 @@ def get_all_records_optimized():
             else:
                 bait_display = record.bait1 or record.bait or ""
 
-            # Parse combined categories
-            if record.category and ";" in record.category:
-                categories = record.category.split(";")
-            else:
-                categories = [record.category] if record.category else ["N"]
+            categories = category_list(record.category_mask, record.category)
 
             result.append(
                 {
@@ -418,11 +409,19 @@ def get_leaderboard_optimized(
     try:
         query = db.query(Record).order_by(Record.weight.desc())
 
-        # Use indexed filters
-        if fish:
-            query = query.filter(Record.fish == fish)
-        if waterbody:
-            query = query.filter(Record.waterbody == waterbody)
+        # Use indexed filters (idx_fish_id_weight / idx_waterbody_id_fish_id once every record has its ids)
+        if dimensions_ready(db):
+            if fish:
+                query = query.filter(Record.fish_id.in_(select(DimFish.id).where(DimFish.name == fish)))
+            if waterbody:
+                query = query.filter(
+                    Record.waterbody_id.in_(select(DimWaterbody.id).where(DimWaterbody.name == waterbody))
+                )
+        else:
+            if fish:
+                query = query.filter(Record.fish == fish)
+            if waterbody:
+                query = query.filter(Record.waterbody == waterbody)
 
         records = query.limit(limit).all()
 
@@ -436,10 +435,7 @@ def get_leaderboard_optimized(
             else:
                 bait_display = record.bait1 or record.bait or ""
 
-            if record.category and ";" in record.category:
-                categories = record.category.split(";")
-            else:
-                categories = [record.category] if record.category else ["N"]
+            categories = category_list(record.category_mask, record.category)
 
             result.append(
                 {
@@ -532,7 +528,7 @@ def get_recent_records_optimized(limit: int = 1000):
         # Get limited records using SQL LIMIT (not Python slicing)
         sql = """
             SELECT id, player, fish, weight, waterbody, bait, bait1, bait2,
-                   date, region, category, created_at, trophy_class
+                   date, region, category, created_at, trophy_class, category_mask
             FROM records
             WHERE created_at >= :last_reset
             ORDER BY id DESC
@@ -554,10 +550,7 @@ def get_recent_records_optimized(limit: int = 1000):
 
             bait_display = normalize_bait_display(bait1, bait2, bait_val)
 
-            if category and ";" in category:
-                categories = category.split(";")
-            else:
-                categories = [category] if category else ["N"]
+            categories = category_list(row[13], category)
 
             result.append({
                 "player": row[1],
@@ -621,7 +614,7 @@ def get_all_recent_records_optimized():
         query_start = time.time()
         sql = """
             SELECT id, player, fish, weight, waterbody, bait, bait1, bait2,
-                   date, region, category, created_at, trophy_class
+                   date, region, category, created_at, trophy_class, category_mask
             FROM records
             WHERE created_at >= :last_reset
             ORDER BY id DESC
@@ -647,10 +640,7 @@ def get_all_recent_records_optimized():
 
             bait_display = normalize_bait_display(bait1, bait2, bait_val)
 
-            if category and ";" in category:
-                categories = category.split(";")
-            else:
-                categories = [category] if category else ["N"]
+            categories = category_list(row[13], category)
 
             result.append({
                 "player": row[1],
@@ -747,11 +737,7 @@ def get_older_records_optimized():
                 record.bait1, record.bait2, record.bait
             )
 
-            # Parse combined categories
-            if record.category and ";" in record.category:
-                categories = record.category.split(";")
-            else:
-                categories = [record.category] if record.category else ["N"]
+            categories = category_list(record.category_mask, record.category)
 
             result.append(
                 {
@@ -821,7 +807,8 @@ def get_older_records_optimized():
 
 
 def get_filtered_records_optimized(
-    fish=None, waterbody=None, bait=None, data_age=None, limit=None, offset=None
+    fish=None, waterbody=None, bait=None, data_age=None, limit=None, offset=None, category=None,
+    caught_from=None, caught_to=None,
 ):
     """
     Get filtered records from database based on criteria - MEMORY OPTIMIZED VERSION
@@ -836,18 +823,41 @@ def get_filtered_records_optimized(
         # Build dynamic SQL query with parameters
         where_clauses = []
         params = {}
+        expanding = []  # List parameters rendered as IN (...) outside PostgreSQL
+        archive_filters = {}  # The same criteria for weeks moved to the cold archive
+
+        # Once every record has its dimension ids, filter on the integer columns
+        use_ids = dimensions_ready(db)
+        dims = get_dimension_cache(db) if use_ids else None
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+
+        def ids_condition(columns, param_name, ids):
+            """column = ANY(:ids) on PostgreSQL, an expanding IN elsewhere"""
+            if not ids:
+                return "1 = 0"
+            params[param_name] = sorted(set(ids))
+            if is_postgres:
+                return " OR ".join(f"{column} = ANY(:{param_name})" for column in columns)
+            expanding.append(param_name)
+            return " OR ".join(f"{column} IN :{param_name}" for column in columns)
 
         # Fish filter
         if fish:
             available_fish = get_cached_fish_names(db)
             fish_list = fish if isinstance(fish, list) else [fish]
             fish_conditions = []
+            fish_ids = []
+            archive_filters["fish_terms"] = []
 
             for i, f in enumerate(fish_list):
                 if f and f.strip():
                     param_name = f"fish_{i}"
                     search_term_lower = f.strip().lower()
-                    if search_term_lower in available_fish:
+                    exact = search_term_lower in available_fish
+                    archive_filters["fish_terms"].append((search_term_lower, exact))
+                    if use_ids:
+                        fish_ids.extend(dims.match_ids(db, "fish", f.strip(), exact=exact))
+                    elif exact:
                         # Exact match (case insensitive)
                         fish_conditions.append(f"LOWER(fish) = LOWER(:{param_name})")
                         params[param_name] = f.strip()
@@ -856,43 +866,68 @@ def get_filtered_records_optimized(
                         fish_conditions.append(f"fish ILIKE :{param_name}")
                         params[param_name] = f"%{f.strip()}%"
 
-            if fish_conditions:
+            if use_ids and any(f and f.strip() for f in fish_list):
+                where_clauses.append(f"({ids_condition(['fish_id'], 'fish_ids', fish_ids)})")
+            elif fish_conditions:
                 where_clauses.append(f"({' OR '.join(fish_conditions)})")
 
         # Waterbody filter
         if waterbody:
             waterbody_list = waterbody if isinstance(waterbody, list) else [waterbody]
             waterbody_conditions = []
+            waterbody_ids = []
 
             for i, w in enumerate(waterbody_list):
                 if w and w.strip():
                     param_name = f"waterbody_{i}"
-                    waterbody_conditions.append(f"waterbody ILIKE :{param_name}")
-                    params[param_name] = f"%{w.strip()}%"
+                    archive_filters.setdefault("waterbody_terms", []).append(w.strip().lower())
+                    if use_ids:
+                        waterbody_ids.extend(dims.match_ids(db, "waterbody", w.strip()))
+                    else:
+                        waterbody_conditions.append(f"waterbody ILIKE :{param_name}")
+                        params[param_name] = f"%{w.strip()}%"
 
-            if waterbody_conditions:
+            if use_ids and any(w and w.strip() for w in waterbody_list):
+                where_clauses.append(f"({ids_condition(['waterbody_id'], 'waterbody_ids', waterbody_ids)})")
+            elif waterbody_conditions:
                 where_clauses.append(f"({' OR '.join(waterbody_conditions)})")
 
         # Bait filter (check bait1, bait2, and bait fields)
         if bait:
             bait_list = bait if isinstance(bait, list) else [bait]
             bait_conditions = []
+            bait_ids = []
 
             for i, b in enumerate(bait_list):
                 if b and b.strip():
                     param_name = f"bait_{i}"
                     params[param_name] = f"%{b.strip()}%"
-                    bait_conditions.append(
-                        f"(bait1 ILIKE :{param_name} OR bait2 ILIKE :{param_name} OR bait ILIKE :{param_name})"
-                    )
+                    archive_filters.setdefault("bait_terms", []).append(b.strip().lower())
+                    if use_ids:
+                        bait_ids.extend(dims.match_ids(db, "bait", b.strip()))
+                        # Legacy rows that only have the combined bait string
+                        bait_conditions.append(f"(bait1 IS NULL AND LOWER(bait) LIKE LOWER(:{param_name}))")
+                    else:
+                        bait_conditions.append(
+                            f"(bait1 ILIKE :{param_name} OR bait2 ILIKE :{param_name} OR bait ILIKE :{param_name})"
+                        )
 
+            if bait_conditions and use_ids:
+                bait_conditions.insert(0, ids_condition(["bait1_id", "bait2_id"], "bait_ids", bait_ids))
             if bait_conditions:
                 where_clauses.append(f"({' OR '.join(bait_conditions)})")
 
+        # Category filter: the mask values holding any requested bit (uses the category_mask index)
+        if category:
+            category_terms = category if isinstance(category, list) else [category]
+            masks = masks_including(c.strip() for c in category_terms if c and c.strip())
+            archive_filters["category_masks"] = masks
+            where_clauses.append(f"({ids_condition(['category_mask'], 'category_masks', masks)})")
+
         # Date filter
+        cutoff = None
         if data_age:
             now = datetime.now(timezone.utc)
-            cutoff = None
 
             if data_age == "since-reset":
                 cutoff = get_last_record_reset_date()
@@ -915,12 +950,29 @@ def get_filtered_records_optimized(
                 where_clauses.append("created_at >= :cutoff")
                 params["cutoff"] = cutoff
 
+        # Catch date range, inclusive (typed column parsed from the date text - ix_records_catch_date)
+        if caught_from:
+            where_clauses.append("catch_date >= :caught_from")
+            params["caught_from"] = caught_from
+        if caught_to:
+            where_clauses.append("catch_date <= :caught_to")
+            params["caught_to"] = caught_to
+        archive_filters.update(cutoff=cutoff, caught_from=caught_from, caught_to=caught_to)
+
         # Build final SQL query - select only needed columns (not full ORM objects)
-        sql = """
-            SELECT id, player, fish, weight, waterbody, bait, bait1, bait2,
-                   date, region, category, created_at, trophy_class
-            FROM records
-        """
+        if use_ids:
+            # Integer keys instead of the repeated strings - names come from the dimension cache
+            sql = """
+                SELECT id, player_id, fish_id, weight, waterbody_id, bait, bait1_id, bait2_id,
+                       date, region_id, category, created_at, trophy_class, category_mask, catch_date, record_key
+                FROM records
+            """
+        else:
+            sql = """
+                SELECT id, player, fish, weight, waterbody, bait, bait1, bait2,
+                       date, region, category, created_at, trophy_class, category_mask, catch_date, record_key
+                FROM records
+            """
 
         if where_clauses:
             sql += " WHERE " + " AND ".join(where_clauses)
@@ -929,10 +981,40 @@ def get_filtered_records_optimized(
 
         # Execute raw SQL query
         query_start = time.time()
-        result = db.execute(text(sql), params)
+        statement = text(sql)
+        if expanding:
+            statement = statement.bindparams(*(bindparam(name, expanding=True) for name in expanding))
+        result = db.execute(statement, params)
         rows = result.fetchall()
         query_time = time.time() - query_start
 
+        if use_ids:
+            # One cache lookup per dimension for the whole result
+            players = dims.names_for("player", {row[1] for row in rows})
+            fishes = dims.names_for("fish", {row[2] for row in rows})
+            waterbodies = dims.names_for("waterbody", {row[4] for row in rows})
+            baits = dims.names_for("bait", {row[6] for row in rows} | {row[7] for row in rows})
+            regions = dims.names_for("region", {row[9] for row in rows})
+            rows = [
+                (row[0], players.get(row[1]), fishes.get(row[2]), row[3], waterbodies.get(row[4]), row[5],
+                 baits.get(row[6]), baits.get(row[7]), row[8], regions.get(row[9]), row[10], row[11], row[12], row[13],
+                 row[14], row[15])
+                for row in rows
+            ]
+
+        # Windows reaching back past the retained weeks also read the archived ones
+        if archive_needed(cutoff, caught_from, caught_to):
+            archive_start = time.time()
+            # A key archived and later scraped again is served once - the database row (or newest archived one) wins
+            seen_keys = {row[15] for row in rows}
+            archived = []
+            for row in query_archive(**archive_filters):
+                if row[15] is None or row[15] not in seen_keys:
+                    seen_keys.add(row[15])
+                    archived.append(row)
+            rows = sorted(list(rows) + archived, key=lambda row: row[0], reverse=True)
+            query_time += time.time() - archive_start
+
         # Process raw rows into dicts (much smaller than ORM objects)
         process_start = time.time()
         filtered_records = []
@@ -948,11 +1030,7 @@ def get_filtered_records_optimized(
             # Format bait display
             bait_display = normalize_bait_display(bait1, bait2, bait_val)
 
-            # Parse combined categories
-            if category and ";" in category:
-                categories = category.split(";")
-            else:
-                categories = [category] if category else ["N"]
+            categories = category_list(row[13], category)
 
             filtered_records.append({
                 "player": row[1],
@@ -964,6 +1042,7 @@ def get_filtered_records_optimized(
                 "region": row[9],
                 "categories": categories,
                 "created_at": created_at.isoformat() if created_at else None,
+                "catch_date": str(row[14]) if row[14] else None,  # YYYY-MM-DD
                 "trophy_class": row[12],
             })
 
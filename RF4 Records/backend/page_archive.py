@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Raw page capture archive and offline replay for the records scraper.
+
+With SCRAPER_ARCHIVE_PAGES=true every fetched page is written gzip-compressed
+to <archive>/<YYYY-MM-DD>/<category>/<region>/<HHMMSS.ffffff>.<kind>.gz, where
+kind is "html" (HTTP tier / page_source) or "rows" (JSON rows returned by the
+in-browser extraction script).
+
+Replay feeds archived pages back through scrape_and_update_records with the
+parsing done in worker processes, so parser changes can be benchmarked and
+the database rebuilt without hitting rf4game.com.
+
+Usage:
+    python page_archive.py replay [--archive DIR] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+    python page_archive.py bench  [--archive DIR] [--workers N]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from records_parser import parse_records_html, records_from_rows
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ENABLED = os.getenv("SCRAPER_ARCHIVE_PAGES", "false").lower() in ("1", "true", "yes")
+ARCHIVE_DIR = Path(os.getenv("SCRAPER_ARCHIVE_DIR", str(Path(__file__).parent / "archive")))
+REPLAY_WORKERS = int(os.getenv("SCRAPER_REPLAY_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+ArchivedPage = namedtuple("ArchivedPage", "path category_key region_code fetched_at kind")
+
+
+def archive_page(category_key, region_code, content, kind="html", fetched_at=None, archive_dir=None):
+    """Write one fetched page to the archive. Never raises - archiving must not break a scrape."""
+    try:
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        directory = Path(archive_dir or ARCHIVE_DIR) / fetched_at.strftime("%Y-%m-%d") / category_key / region_code
+        directory.mkdir(parents=True, exist_ok=True)
+        payload = content if kind == "html" else json.dumps(content, ensure_ascii=False)
+        path = directory / f"{fetched_at.strftime('%H%M%S.%f')}.{kind}.gz"
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(payload)
+        return path
+    except Exception as e:
+        logger.warning(f"Could not archive {category_key}/{region_code} page: {e}")
+        return None
+
+
+def archived_pages(archive_dir=None, since=None, until=None, category_key=None, region_code=None):
+    """Yield archived pages in capture order, optionally filtered by date range and unit"""
+    root = Path(archive_dir or ARCHIVE_DIR)
+    if not root.is_dir():
+        return
+    for day_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        try:
+            day = datetime.strptime(day_dir.name, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        if (since and day < since) or (until and day > until):
+            continue
+        category_dirs = [day_dir / category_key] if category_key else sorted(day_dir.iterdir())
+        for category_dir in category_dirs:
+            region_dirs = [category_dir / region_code] if region_code else sorted(category_dir.glob("*"))
+            for region_dir in region_dirs:
+                if not region_dir.is_dir():
+                    continue
+                for path in sorted(region_dir.glob("*.gz")):
+                    stamp, kind, _ = path.name.rsplit(".", 2)
+                    try:
+                        clock = datetime.strptime(stamp, "%H%M%S.%f").time()
+                    except ValueError:
+                        continue
+                    fetched_at = datetime.combine(day, clock, tzinfo=timezone.utc)
+                    yield ArchivedPage(path, category_dir.name, region_dir.name, fetched_at, kind)
+
+
+def read_page(page):
+    """Return the HTML string or the extracted rows list of an archived page"""
+    with gzip.open(page.path, "rt", encoding="utf-8") as f:
+        payload = f.read()
+    return payload if page.kind == "html" else json.loads(payload)
+
+
+def parse_archived_page(page, region_info):
+    """Parse an archived page with the current parser; records carry their capture time"""
+    content = read_page(page)
+    if page.kind == "html":
+        records = parse_records_html(content, region_info)
+    else:
+        records = records_from_rows(content, region_info)
+    for record in records:
+        record['scraped_at'] = page.fetched_at
+    return records
+
+
+def load_archived_unit(archive_dir, since, until, category_key, region_info):
+    """
+    Replay fetch function (runs in a worker process): all archived snapshots of
+    one category/region, parsed and de-duplicated, earliest capture first.
+    """
+    records = []
+    seen = set()
+    for page in archived_pages(archive_dir, since, until, category_key, region_info['code']):
+        try:
+            page_records = parse_archived_page(page, region_info)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable archive page {page.path}: {e}")
+            continue
+        for record in page_records:
+            key = tuple((k, v) for k, v in record.items() if k != 'scraped_at')
+            if key not in seen:
+                seen.add(key)
+                records.append(record)
+    return records
+
+
+def create_replay_executor(workers=None):
+    # spawn: forking the web process (scheduler/uvicorn threads) is not safe
+    return ProcessPoolExecutor(max_workers=workers or REPLAY_WORKERS,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def _bench_page(page):
+    records = parse_archived_page(page, {'code': page.region_code, 'name': page.region_code})
+    return len(records)
+
+
+def benchmark(archive_dir=None, since=None, until=None, workers=None):
+    """Parse every archived page in worker processes and report throughput (no DB)"""
+    pages = list(archived_pages(archive_dir, since, until))
+    if not pages:
+        print("No archived pages found")
+        return None
+    start = time.perf_counter()
+    with create_replay_executor(workers) as executor:
+        rows = sum(executor.map(_bench_page, pages, chunksize=8))
+    elapsed = time.perf_counter() - start
+    print(f"📦 {len(pages)} pages, {rows} records in {elapsed:.2f}s "
+          f"({len(pages) / elapsed:.1f} pages/s, {rows / elapsed:,.0f} records/s)")
+    return {'pages': len(pages), 'records': rows, 'seconds': elapsed}
+
+
+def _parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay or benchmark archived records pages")
+    parser.add_argument("mode", choices=["replay", "bench"])
+    parser.add_argument("--archive", default=str(ARCHIVE_DIR))
+    parser.add_argument("--since", type=_parse_day)
+    parser.add_argument("--until", type=_parse_day)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.mode == "bench":
+        benchmark(args.archive, args.since, args.until, args.workers)
+    else:
+        from scraper import scrape_and_update_records
+        result = scrape_and_update_records(replay_dir=args.archive, replay_since=args.since,
+                                           replay_until=args.until, replay_workers=args.workers)
+        print(result)
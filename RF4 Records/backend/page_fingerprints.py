@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Page-content fingerprints for the category×region records pages.
+A page whose extracted rows hash to the same value as on the last successful
+scrape has nothing new to write, so the scraper skips its DB work entirely.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent / "cache"
+FINGERPRINT_FILE = CACHE_DIR / "page_fingerprints.json"
+
+# Re-verify a page against the DB at least this often even if it never changes
+FINGERPRINT_MAX_AGE_SECONDS = int(os.getenv("SCRAPER_FINGERPRINT_MAX_AGE_HOURS", "24")) * 3600
+
+
+def compute_page_fingerprint(records):
+    """Hash the extracted rows of a page (order-sensitive, like the page itself)"""
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(dict(record), sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class PageFingerprintStore:
+    """
+    Last committed fingerprint per (category, region), persisted to the cache dir.
+
+    New fingerprints are staged while a category is being scraped and only
+    committed once its records are flushed, so a failed write is retried on
+    the next run instead of being skipped as "unchanged".
+    """
+
+    def __init__(self, path=FINGERPRINT_FILE, max_age_seconds=FINGERPRINT_MAX_AGE_SECONDS):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self._fingerprints = {}
+        self._staged = {}
+        self.load()
+
+    @staticmethod
+    def _key(category_key, region_code):
+        return f"{category_key}/{region_code}"
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self._fingerprints = json.load(f)
+        except FileNotFoundError:
+            self._fingerprints = {}
+        except Exception as e:
+            logger.warning(f"Could not load page fingerprints, starting fresh: {e}")
+            self._fingerprints = {}
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._fingerprints, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save page fingerprints: {e}")
+
+    def is_unchanged(self, category_key, region_code, fingerprint):
+        entry = self._fingerprints.get(self._key(category_key, region_code))
+        if not entry or entry.get("hash") != fingerprint:
+            return False
+        return time.time() - entry.get("verified_at", 0) < self.max_age_seconds
+
+    def stage(self, category_key, region_code, fingerprint):
+        self._staged[self._key(category_key, region_code)] = {
+            "hash": fingerprint,
+            "verified_at": time.time(),
+        }
+
+    def commit_staged(self):
+        self._fingerprints.update(self._staged)
+        self._staged.clear()
+
+    def discard_staged(self):
+        self._staged.clear()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Event-driven readiness for region pages loaded in Chrome.
+
+Instead of fixed sleeps and a cascade of 15-second WebDriverWait fallbacks,
+one async script watches the DOM with a MutationObserver and returns as soon
+as the records tables exist and the document has been quiet for
+SCRAPER_READY_QUIET_MS. Its timeout adapts per page: an EWMA of past ready
+times (persisted in cache/page_ready_times.json) times a safety factor,
+clamped to [SCRAPER_READY_MIN_TIMEOUT, SCRAPER_READY_MAX_TIMEOUT].
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+READY_TIMES_FILE = Path(__file__).parent / "cache" / "page_ready_times.json"
+QUIET_MS = int(os.getenv("SCRAPER_READY_QUIET_MS", "300"))
+MIN_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_READY_MIN_TIMEOUT", "5"))
+MAX_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_READY_MAX_TIMEOUT", "30"))
+DEFAULT_TIMEOUT_SECONDS = 15.0  # Pages we have no history for
+TIMEOUT_FACTOR = 3.0  # Timeout = factor × typical ready time + slack
+TIMEOUT_SLACK_SECONDS = 2.0
+TIMING_SMOOTHING = 0.3  # EWMA weight of the newest ready time
+
+# Primary records table selector first, then the historical fallbacks
+TABLE_SELECTORS = ["div.records_subtable.flex_table", "div.flex_table", "[class*='record']"]
+
+WAIT_FOR_TABLES_SCRIPT = """
+const selectors = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+let lastMutation = start;
+const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+const find = () => {
+    for (const selector of selectors) {
+        const count = document.querySelectorAll(selector).length;
+        if (count) return [selector, count];
+    }
+    return [null, 0];
+};
+const timer = setInterval(() => {
+    const now = performance.now();
+    const [selector, tables] = find();
+    const quiet = tables > 0 && document.readyState !== 'loading' && now - lastMutation >= quietMs;
+    if (quiet || now - start >= timeoutMs) {
+        clearInterval(timer);
+        observer.disconnect();
+        done({ready: tables > 0, quiet: quiet, selector: selector, tables: tables, elapsed_ms: now - start});
+    }
+}, 50);
+"""
+
+
+class ReadyTimes:
+    """Per-page EWMA of how long the tables took to settle, used to size the wait timeout"""
+
+    def __init__(self, path=READY_TIMES_FILE):
+        self.path = Path(path)
+        self._times = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._times = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load page ready times, starting fresh: {e}")
+
+    def timeout_for(self, key):
+        typical = self._times.get(key)
+        if typical is None:
+            return DEFAULT_TIMEOUT_SECONDS
+        timeout = typical * TIMEOUT_FACTOR + TIMEOUT_SLACK_SECONDS
+        return min(MAX_TIMEOUT_SECONDS, max(MIN_TIMEOUT_SECONDS, timeout))
+
+    def observe(self, key, seconds, ready):
+        with self._lock:
+            typical = self._times.get(key)
+            if not ready:
+                # Timed out: assume the page is at least this slow so the next wait is longer
+                seconds = max(seconds, typical or 0)
+            self._times[key] = seconds if typical is None else TIMING_SMOOTHING * seconds + (1 - TIMING_SMOOTHING) * typical
+            self._save()
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._times, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.debug(f"Could not save page ready times: {e}")
+
+
+_ready_times = None
+
+
+def get_ready_times():
+    global _ready_times
+    if _ready_times is None:
+        _ready_times = ReadyTimes()
+    return _ready_times
+
+
+def wait_for_tables(driver, region_info, ready_times=None):
+    """
+    Block until the records tables exist and the DOM has stopped mutating.
+    Returns the script's result dict; result['ready'] is False if no table appeared in time.
+    """
+    ready_times = ready_times or get_ready_times()
+    key = region_info.get('url') or region_info['code']
+    timeout = ready_times.timeout_for(key)
+    started = time.perf_counter()
+    try:
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(WAIT_FOR_TABLES_SCRIPT, TABLE_SELECTORS, QUIET_MS, int(timeout * 1000))
+    except Exception as e:
+        # Not a slow page - the script itself could not run; the caller falls back to WebDriverWait
+        logger.debug(f"Readiness script failed for {region_info['name']}: {type(e).__name__}")
+        return {'ready': False, 'quiet': False, 'selector': None, 'tables': 0, 'error': True,
+                'elapsed_s': time.perf_counter() - started, 'timeout_s': timeout}
+    if not isinstance(result, dict):
+        result = {'ready': False, 'quiet': False, 'selector': None, 'tables': 0}
+    elapsed = time.perf_counter() - started
+    result['elapsed_s'] = elapsed
+    result['timeout_s'] = timeout
+    ready_times.observe(key, elapsed, result['ready'])
+    if result['ready'] and not result['quiet']:
+        logger.debug(f"{region_info['name']}: tables present but still mutating after {timeout:.0f}s")
+    return result
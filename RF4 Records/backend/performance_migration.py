@@ -21,38 +21,16 @@ def add_performance_indexes():
         
         # Check if indexes already exist to avoid errors
         if 'postgresql' in database_url.lower():
-            # PostgreSQL index creation - CONCURRENT indexes cannot be in transaction
-            indexes_to_create = [
-                ("idx_records_player", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_player ON records (player)"),
-                ("idx_records_fish", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_fish ON records (fish)"),
-                ("idx_records_weight", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_weight ON records (weight)"),
-                ("idx_records_waterbody", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_waterbody ON records (waterbody)"),
-                ("idx_records_bait1", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_bait1 ON records (bait1)"),
-                ("idx_records_date", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_date ON records (date)"),
-                ("idx_records_created_at", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_created_at ON records (created_at)"),
-                ("idx_records_region", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_region ON records (region)"),
-                ("idx_records_category", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_category ON records (category)"),
-                # Composite indexes for common queries
-                ("idx_records_fish_weight", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_fish_weight ON records (fish, weight)"),
-                ("idx_records_waterbody_fish", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_waterbody_fish ON records (waterbody, fish)"),
-                ("idx_records_region_fish", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_region_fish ON records (region, fish)"),
-                ("idx_records_created_desc", "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_records_created_desc ON records (created_at DESC)"),
-            ]
+            # The managed index suite replaces the old per-column list, which only
+            # duplicated the model's own indexes (see index_suite.py)
+            from index_suite import apply_index_suite
             
-            # Create indexes one by one WITHOUT transaction (required for CONCURRENT)
-            for index_name, create_sql in indexes_to_create:
-                try:
-                    with engine.connect() as conn:
-                        # Set autocommit mode for concurrent index creation
-                        conn.execute(text("COMMIT"))
-                        logger.info(f"Creating index: {index_name}")
-                        conn.execute(text(create_sql))
-                        logger.info(f"✅ Created index: {index_name}")
-                except Exception as e:
-                    if "already exists" in str(e).lower():
-                        logger.info(f"ℹ️  Index {index_name} already exists")
-                    else:
-                        logger.error(f"❌ Failed to create index {index_name}: {e}")
+            result = apply_index_suite(engine)
+            logger.info(f"✅ Created indexes: {', '.join(result['created']) or 'none needed'}")
+            for dropped in result['dropped']:
+                logger.info(f"🗑️  Dropped index {dropped['name']} ({dropped['reason']})")
+            for skipped in result['skipped']:
+                logger.warning(f"⚠️  Skipped index {skipped}")
         
         else:
             # SQLite index creation - can use transaction
@@ -122,19 +100,15 @@ def verify_indexes():
         
         with engine.connect() as conn:
             if 'postgresql' in database_url.lower():
-                # PostgreSQL index verification
-                result = conn.execute(text("""
-                    SELECT indexname, tablename 
-                    FROM pg_indexes 
-                    WHERE tablename = 'records' 
-                    AND indexname LIKE 'idx_records_%'
-                    ORDER BY indexname
-                """))
+                # PostgreSQL: the managed index suite
+                from index_suite import index_report
                 
-                indexes = result.fetchall()
-                logger.info(f"📋 Found {len(indexes)} performance indexes:")
-                for idx in indexes:
-                    logger.info(f"  - {idx[0]}")
+                report = index_report(engine)
+                logger.info("📋 Managed indexes:")
+                for name, present in report['managed'].items():
+                    logger.info(f"  {'✅' if present else '❌'} {name}")
+                for candidate in report['drop_candidates']:
+                    logger.info(f"  🗑️  {candidate['name']}: {candidate['reason']}")
                 
             else:
                 # SQLite index verification
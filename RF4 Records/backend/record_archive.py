@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Cold-tier archive for old reset weeks of records.
+
+Weeks older than RECORDS_ARCHIVE_RETAIN_WEEKS are moved out of the records
+table into one compressed columnar file per week on the volume
+(<archive>/records_w20250608.rfa), then deleted from the database - or, when
+records is partitioned, their partition is detached and dropped.
+
+File format (stdlib only): b"RF4A", a 4-byte manifest length, a JSON
+manifest (row count, week, per-column offset/length/encoding), then one
+zlib block per column. String columns are dictionary-encoded (distinct
+values + a uint32 code per row, 0 = NULL); integers, timestamps and dates
+are packed int64/int32 arrays with a NULL sentinel. A filter only decodes
+the columns it tests, and string predicates run once per distinct value.
+
+get_filtered_records_optimized unions in the archived weeks when the caller
+asks for a window (data_age cutoff or catch-date range) that reaches back
+past the newest archived week; all-time queries stay on the database.
+Decoded columns are cached per week file, keyed on its path and mtime, so
+repeated queries don't re-read and re-inflate the files.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import bindparam, text
+
+from record_partitions import list_partitions, partition_name, records_partitioned, week_start
+
+logger = logging.getLogger(__name__)
+
+_default_dir = (
+    Path(os.environ["RAILWAY_VOLUME_MOUNT_PATH"]) / "records_archive"
+    if "RAILWAY_VOLUME_MOUNT_PATH" in os.environ
+    else Path(__file__).parent / "records_archive"
+)
+ARCHIVE_DIR = Path(os.getenv("RECORDS_ARCHIVE_DIR", str(_default_dir)))
+# Reset weeks kept in the database; older weeks are archived by the scheduled job (0 = never)
+ARCHIVE_RETAIN_WEEKS = int(os.getenv("RECORDS_ARCHIVE_RETAIN_WEEKS", "0"))
+DELETE_BATCH_SIZE = 5000
+# Week files whose decoded columns stay in memory between queries
+CACHED_WEEKS = int(os.getenv("RECORDS_ARCHIVE_CACHED_WEEKS", "8"))
+
+MAGIC = b"RF4A"
+NULL_INT = -(2 ** 63)
+NULL_DAY = -(2 ** 31)
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DAY = date(1970, 1, 1)
+
+# Archived columns, in the row order the filtered-records serializer expects
+COLUMNS = [
+    ('id', 'int'), ('player', 'dict'), ('fish', 'dict'), ('weight', 'int'), ('waterbody', 'dict'),
+    ('bait', 'dict'), ('bait1', 'dict'), ('bait2', 'dict'), ('date', 'dict'), ('region', 'dict'),
+    ('category', 'dict'), ('created_at', 'timestamp'), ('trophy_class', 'dict'), ('category_mask', 'int'),
+    ('catch_date', 'date'), ('record_key', 'dict'),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+ENCODINGS = dict(COLUMNS)
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _as_datetime(value):
+    # Raw SQL hands SQLite datetimes back as strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def encode_column(encoding, values):
+    if encoding == 'dict':
+        distinct = {}
+        codes = array('I', (0 if value is None else distinct.setdefault(value, len(distinct) + 1) for value in values))
+        strings = json.dumps(list(distinct), ensure_ascii=False).encode('utf-8')
+        payload = struct.pack('<I', len(strings)) + strings + _little_endian(codes).tobytes()
+    elif encoding == 'int':
+        payload = _little_endian(array('q', (NULL_INT if value is None else int(value) for value in values))).tobytes()
+    elif encoding == 'timestamp':
+        payload = _little_endian(array('q', (
+            NULL_INT if value is None else (_as_datetime(value) - EPOCH) // timedelta(microseconds=1)
+            for value in values
+        ))).tobytes()
+    else:  # date
+        payload = _little_endian(array('i', (
+            NULL_DAY if value is None else (_as_date(value) - EPOCH_DAY).days for value in values
+        ))).tobytes()
+    return zlib.compress(payload, 9)
+
+
+def number_value(encoding, n):
+    """Python value of one packed int/timestamp/date entry"""
+    if encoding == 'date':
+        return None if n == NULL_DAY else EPOCH_DAY + timedelta(days=n)
+    if n == NULL_INT:
+        return None
+    return n if encoding == 'int' else EPOCH + timedelta(microseconds=n)
+
+
+def decode_column(encoding, block, packed=False):
+    """dict columns -> (values, codes); the rest -> list of Python values (packed: the array itself)"""
+    payload = zlib.decompress(block)
+    if encoding == 'dict':
+        strings_length = struct.unpack_from('<I', payload)[0]
+        values = [None] + json.loads(payload[4:4 + strings_length].decode('utf-8'))
+        codes = array('I')
+        codes.frombytes(payload[4 + strings_length:])
+        return values, _little_endian(codes)
+    numbers = array('i' if encoding == 'date' else 'q')
+    numbers.frombytes(payload)
+    _little_endian(numbers)
+    if packed:
+        return numbers
+    return [number_value(encoding, n) for n in numbers]
+
+
+def archive_path(start, archive_dir=None):
+    return Path(archive_dir or ARCHIVE_DIR) / f"{partition_name(start)}.rfa"
+
+
+def write_week(path, start, rows):
+    """Write rows (tuples in COLUMNS order) as one week file, atomically"""
+    blocks, manifest_columns, offset = [], {}, 0
+    for index, (name, encoding) in enumerate(COLUMNS):
+        block = encode_column(encoding, [row[index] for row in rows])
+        manifest_columns[name] = {'encoding': encoding, 'offset': offset, 'length': len(block)}
+        blocks.append(block)
+        offset += len(block)
+    manifest = json.dumps({
+        'version': 1, 'week_start': week_start(start).isoformat(), 'rows': len(rows), 'columns': manifest_columns,
+    }).encode('utf-8')
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix('.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(manifest)) + manifest)
+        for block in blocks:
+            f.write(block)
+    os.replace(temp_path, path)
+    return path
+
+
+class ArchivedWeek:
+    """
+    One week file. Columns are read and inflated on demand and kept in their
+    compact form (string codes, packed numbers); Python values are only built
+    for the rows a query touches.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{self.path} is not a records archive file")
+            manifest_length = struct.unpack('<I', f.read(4))[0]
+            self.manifest = json.loads(f.read(manifest_length))
+        self.data_offset = 8 + manifest_length
+        self.rows = self.manifest['rows']
+        self.week_start = datetime.fromisoformat(self.manifest['week_start'])
+        self._columns = {}
+
+    def column(self, name):
+        """dict columns -> (values, codes); the rest -> the packed number array"""
+        if name not in self._columns:
+            spec = self.manifest['columns'][name]
+            with open(self.path, 'rb') as f:
+                f.seek(self.data_offset + spec['offset'])
+                self._columns[name] = decode_column(spec['encoding'], f.read(spec['length']), packed=True)
+        return self._columns[name]
+
+    def values(self, name, positions=None):
+        """Column as a plain list of values, for the given row positions or all rows"""
+        positions = range(self.rows) if positions is None else positions
+        encoding = ENCODINGS[name]
+        if encoding == 'dict':
+            values, codes = self.column(name)
+            return [values[codes[position]] for position in positions]
+        column = self.column(name)
+        return [number_value(encoding, column[position]) for position in positions]
+
+    def matching(self, name, predicate, selected):
+        """Narrow the selected row positions to those whose `name` satisfies predicate"""
+        encoding = ENCODINGS[name]
+        if encoding == 'dict':
+            values, codes = self.column(name)
+            accepted = {code for code, value in enumerate(values) if predicate(value)}
+            return [position for position in selected if codes[position] in accepted]
+        column = self.column(name)
+        return [position for position in selected if predicate(number_value(encoding, column[position]))]
+
+    def read_rows(self, positions=None):
+        """Rows (tuples in COLUMNS order) at the given positions, or all rows"""
+        positions = range(self.rows) if positions is None else positions
+        return list(zip(*(self.values(name, positions) for name in COLUMN_NAMES)))
+
+
+_open_weeks = OrderedDict()  # path -> ((mtime_ns, size, inode), ArchivedWeek), least recently used first
+_open_weeks_lock = threading.Lock()
+
+
+def open_week(path):
+    """ArchivedWeek for a file, reused (with its decoded columns) until the file changes"""
+    path = Path(path)
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _open_weeks_lock:
+        cached = _open_weeks.get(path)
+        if cached is not None and cached[0] == version:
+            _open_weeks.move_to_end(path)
+            return cached[1]
+    week = ArchivedWeek(path)
+    with _open_weeks_lock:
+        _open_weeks[path] = (version, week)
+        _open_weeks.move_to_end(path)
+        while len(_open_weeks) > CACHED_WEEKS:
+            _open_weeks.popitem(last=False)
+    return week
+
+
+def archived_weeks(archive_dir=None):
+    """Week start -> file path for every archived week, oldest first"""
+    weeks = {}
+    for path in sorted(Path(archive_dir or ARCHIVE_DIR).glob("records_w*.rfa")):
+        try:
+            weeks[datetime.strptime(path.stem[len("records_w"):], "%Y%m%d").replace(hour=18, tzinfo=timezone.utc)] = path
+        except ValueError:
+            continue
+    return weeks
+
+
+def archive_horizon(archive_dir=None):
+    """End of the newest archived week (queries reaching back before it need the archive), or None"""
+    weeks = archived_weeks(archive_dir)
+    return max(weeks) + timedelta(days=7) if weeks else None
+
+
+def archive_needed(cutoff=None, caught_from=None, caught_to=None, archive_dir=None):
+    """
+    True when the query asks for a window that reaches into archived weeks: a
+    created_at >= cutoff or a catch-date range whose start is before the newest
+    archived week ends. Unbounded (all-time) queries only read the database.
+    """
+    if cutoff is None and caught_from is None and caught_to is None:
+        return False
+    horizon = archive_horizon(archive_dir)
+    if horizon is None:
+        return False
+    horizon = horizon.replace(tzinfo=None)
+    if cutoff is not None and _as_datetime(cutoff) >= horizon:
+        return False
+    # Archived rows were scraped before the horizon, so they were caught by then too
+    return caught_from is None or caught_from <= horizon.date()
+
+
+def query_archive(cutoff=None, fish_terms=(), waterbody_terms=(), bait_terms=(), category_masks=None,
+                  caught_from=None, caught_to=None, archive_dir=None):
+    """
+    Archived rows matching the filtered-records criteria, in COLUMNS order,
+    newest first. fish_terms are (lowercase term, exact) pairs; the other
+    terms match as case-insensitive substrings, like the SQL filters.
+    """
+    cutoff_naive = _as_datetime(cutoff) if cutoff else None
+    result = []
+    for start, path in archived_weeks(archive_dir).items():
+        if cutoff_naive and (start + timedelta(days=7)).replace(tzinfo=None) <= cutoff_naive:
+            continue
+        week = open_week(path)
+        selected = list(range(week.rows))
+        if cutoff_naive:
+            selected = week.matching('created_at', lambda value: value is not None and value >= cutoff_naive, selected)
+        if fish_terms and selected:
+            selected = week.matching('fish', lambda value: value is not None and any(
+                value.lower() == term if exact else term in value.lower() for term, exact in fish_terms
+            ), selected)
+        if waterbody_terms and selected:
+            selected = week.matching('waterbody', lambda value: value is not None and any(
+                term in value.lower() for term in waterbody_terms
+            ), selected)
+        if bait_terms and selected:
+            def has_bait(value):
+                return value is not None and any(term in value.lower() for term in bait_terms)
+            # bait1 OR bait2 OR the combined text
+            matched = set()
+            for name in ('bait1', 'bait2', 'bait'):
+                matched.update(week.matching(name, has_bait, selected))
+            selected = sorted(matched)
+        if category_masks is not None and selected:
+            masks = set(category_masks)
+            selected = week.matching('category_mask', lambda value: value in masks, selected)
+        if caught_from and selected:
+            selected = week.matching('catch_date', lambda value: value is not None and value >= caught_from, selected)
+        if caught_to and selected:
+            selected = week.matching('catch_date', lambda value: value is not None and value <= caught_to, selected)
+        if selected:
+            result.extend(week.read_rows(selected))
+    result.sort(key=lambda row: row[0], reverse=True)
+    return result
+
+
+def _week_rows(conn, start):
+    end = start + timedelta(days=7)
+    return [tuple(row) for row in conn.execute(text(
+        f"SELECT {', '.join(COLUMN_NAMES)} FROM records WHERE created_at >= :start AND created_at < :end ORDER BY id"
+    ), {'start': start.replace(tzinfo=None), 'end': end.replace(tzinfo=None)})]
+
+
+def archive_week(engine, start, archive_dir=None):
+    """
+    Move one reset week into its archive file. Rows already in an existing file
+    for the week (an earlier run) are kept; the file is read back and checked
+    before anything is deleted from the database, and only the rows that were
+    read are deleted - rows inserted or stamped into the week meanwhile stay.
+    Returns the archived row count.
+    """
+    start = week_start(start)
+    path = archive_path(start, archive_dir)
+    with engine.connect() as conn:
+        rows = _week_rows(conn, start)
+    if not rows:
+        return 0
+    ids = [row[0] for row in rows]
+    if path.exists():
+        archived_ids = {row[0] for row in rows}
+        rows = [row for row in ArchivedWeek(path).read_rows() if row[0] not in archived_ids] + rows
+        rows.sort(key=lambda row: row[0])
+    write_week(path, start, rows)
+
+    written = ArchivedWeek(path)
+    if written.rows != len(rows) or written.values('id') != [row[0] for row in rows]:
+        raise RuntimeError(f"Archive file {path} did not read back correctly - nothing deleted")
+
+    partition = partition_name(start)
+    if not _drop_partition(engine, start, ids):
+        # Row deletes release their registry keys through the records delete trigger
+        delete = text("DELETE FROM records WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+        for offset in range(0, len(ids), DELETE_BATCH_SIZE):
+            with engine.begin() as conn:
+                conn.execute(delete, {'ids': ids[offset:offset + DELETE_BATCH_SIZE]})
+
+    logger.info(f"🧊 Archived {len(rows)} records of week {partition} to {path}")
+    return len(rows)
+
+
+def _drop_partition(engine, start, ids):
+    """
+    Drop the week's partition when it holds exactly the archived ids. The check
+    runs after DETACH, which locks the partition against writers; any other
+    content rolls the detach back and the caller deletes the ids row by row.
+    """
+    partition = partition_name(start)
+    if not records_partitioned(engine) or not any(
+        p['name'] == partition and p['attached'] for p in list_partitions(engine)
+    ):
+        return False
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            conn.execute(text(f"ALTER TABLE records DETACH PARTITION {partition}"))
+            total, archived = conn.execute(text(
+                f"SELECT COUNT(*), COUNT(*) FILTER (WHERE id = ANY(:ids)) FROM {partition}"
+            ), {'ids': ids}).first()
+            if total != len(ids) or archived != len(ids):
+                transaction.rollback()
+                return False
+            conn.execute(text(f"DROP TABLE {partition}"))
+            # Dropping a table fires no row triggers, so the week's keys are released here
+            conn.execute(text(
+                "DELETE FROM record_key_registry WHERE created_at >= :start AND created_at < :end"
+            ), {'start': start.replace(tzinfo=None), 'end': (start + timedelta(days=7)).replace(tzinfo=None)})
+    return True
+
+
+def archive_old_weeks(engine, retain_weeks=None, now=None, archive_dir=None):
+    """Archive every reset week older than the newest `retain_weeks` weeks"""
+    retain_weeks = ARCHIVE_RETAIN_WEEKS if retain_weeks is None else retain_weeks
+    if retain_weeks <= 0:
+        return {'archived_weeks': [], 'archived_records': 0}
+    cutoff = week_start(now or datetime.now(timezone.utc)) - timedelta(days=7 * (retain_weeks - 1))
+    with engine.connect() as conn:
+        oldest = conn.execute(text("SELECT MIN(created_at) FROM records")).scalar()
+    archived, total = [], 0
+    if oldest is not None:
+        start = week_start(_as_datetime(oldest))
+        while start < cutoff:
+            count = archive_week(engine, start, archive_dir)
+            if count:
+                archived.append(partition_name(start))
+                total += count
+            start += timedelta(days=7)
+    return {'archived_weeks': archived, 'archived_records': total}
+
+
+def archive_summary(archive_dir=None):
+    """Archived weeks with row counts and file sizes"""
+    weeks = []
+    for start, path in archived_weeks(archive_dir).items():
+        week = ArchivedWeek(path)
+        weeks.append({'week': partition_name(start), 'rows': week.rows, 'size_bytes': path.stat().st_size})
+    return {
+        'archive_dir': str(archive_dir or ARCHIVE_DIR),
+        'weeks': weeks,
+        'total_rows': sum(week['rows'] for week in weeks),
+        'total_bytes': sum(week['size_bytes'] for week in weeks),
+    }
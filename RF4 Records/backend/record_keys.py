@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Natural-key helpers and the scrape-session record-key index.
+
+A record is identified by player/fish/weight/waterbody/bait1/bait2/date/region;
+the category is not part of the key but merged into the category_mask bitmask
+(one bit per code, ORed together on upsert; the compact "N;L;U;B;T" string is
+derived from it). RecordKeyIndex answers "exists / needs category merge / new" from
+memory: the current week's keys are preloaded in one query, older history is
+covered by a Bloom filter, and only Bloom hits fall back to a DB lookup.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+from sqlalchemy import and_, case, func, literal, or_
+
+from database import Record
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent / "cache"
+BLOOM_FILE = CACHE_DIR / "record_key_bloom.bin"
+
+BLOOM_ERROR_RATE = float(os.getenv("RECORD_KEY_BLOOM_ERROR_RATE", "0.01"))
+
+KEY_FIELDS = ('player', 'fish', 'weight', 'waterbody', 'bait1', 'bait2', 'date', 'region')
+
+# Scraper category keys and display names -> compact category code
+CATEGORY_CODES = {
+    'normal': 'N',
+    'light': 'L',
+    'ultralight': 'U',
+    'bottomlight': 'B',
+    'telescopic': 'T',
+    'Normal': 'N',
+    'Light': 'L',
+    'Ultralight': 'U',
+    'BottomLight': 'B',
+    'Bottom Light': 'B',
+    'Telescopic': 'T',
+}
+
+
+# Compact code -> every spelling that may be stored for it (for SQL-side merges)
+CATEGORY_ALIASES = {}
+for _name, _code in CATEGORY_CODES.items():
+    CATEGORY_ALIASES.setdefault(_code, [_code]).append(_name)
+
+# Compact code -> bit in records.category_mask
+CATEGORY_BITS = {'N': 1, 'L': 2, 'U': 4, 'B': 8, 'T': 16}
+CATEGORY_MASK_VALUES = range(1 << len(CATEGORY_BITS))
+
+# Precomputed decode tables: mask -> "B;L;N" (merge_category's form) and -> ('B', 'L', 'N')
+CATEGORY_MASK_LISTS = tuple(
+    tuple(code for code in sorted(CATEGORY_BITS) if mask & CATEGORY_BITS[code]) for mask in CATEGORY_MASK_VALUES
+)
+CATEGORY_MASK_STRINGS = tuple(';'.join(codes) for codes in CATEGORY_MASK_LISTS)
+DEFAULT_CATEGORIES = ('N',)  # Shown for rows without any category
+
+
+def category_code(category):
+    """Compact code for a category key, display name or code"""
+    return CATEGORY_CODES.get(category, category)
+
+
+def parse_category_codes(category):
+    """Set of compact codes stored in a category field (legacy values normalized)"""
+    if not category:
+        return set()
+    return {category_code(part) for part in category.split(';') if part}
+
+
+def merge_category(existing_category, category):
+    """
+    Merge a category into a stored category field.
+    Returns (merged_value, changed).
+    """
+    codes = parse_category_codes(existing_category)
+    codes.add(category_code(category))
+    merged = ';'.join(sorted(codes))
+    return merged, merged != existing_category
+
+
+def category_mask(category):
+    """Bitmask of a category key, display name, code or stored "N;L" field"""
+    if not category:
+        return 0
+    bit = CATEGORY_BITS.get(CATEGORY_CODES.get(category, category))
+    if bit is not None:
+        return bit
+    mask = 0
+    for code in parse_category_codes(category):
+        mask |= CATEGORY_BITS.get(code, 0)
+    return mask
+
+
+def category_list(mask, category=None):
+    """
+    Category codes for a serializer, decoded from the mask. Rows the
+    category_mask backfill has not reached yet have no mask, so the legacy
+    "N;L;U" string is split instead.
+    """
+    if mask:
+        return CATEGORY_MASK_LISTS[mask]
+    if category:
+        return category.split(';')
+    return DEFAULT_CATEGORIES
+
+
+def masks_including(categories):
+    """Every mask value containing at least one of the categories (an index-friendly IN list)"""
+    wanted = 0
+    for category in categories:
+        wanted |= category_mask(category)
+    return [mask for mask in CATEGORY_MASK_VALUES if mask & wanted]
+
+
+def legacy_category_mask_sql(category_column):
+    """SQL mask of a stored category string, for rows the mask backfill has not reached"""
+    mask = literal(0)
+    for code in sorted(CATEGORY_ALIASES):
+        wrapped = literal(';') + func.coalesce(category_column, '') + literal(';')
+        matches = [wrapped.like(f"%;{alias};%") for alias in CATEGORY_ALIASES[code]]
+        mask = mask + case((or_(*matches), literal(CATEGORY_BITS[code])), else_=literal(0))
+    return mask
+
+
+def merged_category_mask_sql(existing_mask, existing_category, incoming_mask):
+    """Bitwise OR of a row's mask (or its legacy string) with the incoming mask"""
+    return func.coalesce(existing_mask, legacy_category_mask_sql(existing_category)).op('|')(incoming_mask)
+
+
+def category_string_sql(mask):
+    """The "B;L;N" string for a mask expression, from the precomputed table"""
+    return case({value: CATEGORY_MASK_STRINGS[value] for value in CATEGORY_MASK_VALUES}, value=mask, else_=None)
+
+
+def record_key_digest(data):
+    """16-byte digest of a record's natural key"""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in KEY_FIELDS:
+        value = data.get(field)
+        # Keep NULL distinct from an empty string, like the SQL comparison does
+        digest.update(b'\x00' if value is None else str(value).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.digest()
+
+
+def record_key_hash(data):
+    """Hex form of record_key_digest()"""
+    return record_key_digest(data).hex()
+
+
+def natural_key_filter(data):
+    """SQLAlchemy filter matching a record's natural key"""
+    return and_(*(getattr(Record, field) == data[field] for field in KEY_FIELDS))
+
+
+def stored_category_mask(record):
+    """A Record's category mask (from its legacy string until the backfill reaches it)"""
+    return record.category_mask if record.category_mask is not None else category_mask(record.category)
+
+
+def find_existing_record(db, data):
+    """Look up a record by its natural key (category ignored)"""
+    return db.query(Record).filter(natural_key_filter(data)).first()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over record key digests (double hashing)"""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE, size_bits=None, hash_count=None, bits=None):
+        capacity = max(int(capacity), 1000)
+        self.size_bits = size_bits or int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hash_count = hash_count or max(1, round(self.size_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size_bits for i in range(self.hash_count))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def save(self, path, meta):
+        header = dict(meta, size_bits=self.size_bits, hash_count=self.hash_count, count=self.count)
+        path = Path(path)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Return (filter, header) or (None, None) if the file is missing/unreadable"""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                bits = bytearray(f.read())
+            bloom = cls(header['count'], size_bits=header['size_bits'],
+                        hash_count=header['hash_count'], bits=bits)
+            bloom.count = header['count']
+            if len(bits) != (bloom.size_bits + 7) // 8:
+                return None, None
+            return bloom, header
+        except FileNotFoundError:
+            return None, None
+        except Exception as e:
+            logger.warning(f"Could not load record key Bloom filter, rebuilding: {e}")
+            return None, None
+
+
+class RecordKeyIndex:
+    """
+    Scrape-session index of record natural keys.
+
+    Current-week keys map to [record_id, category_mask]; record_id is None for rows
+    this session queued for insert. Older history is only in the Bloom filter.
+    """
+
+    def __init__(self, week_start, bloom_path=BLOOM_FILE):
+        self.week_start = week_start
+        self.bloom_path = Path(bloom_path)
+        self.current = {}
+        self.bloom = None
+        self.stats = {
+            'preloaded_keys': 0,
+            'history_keys': 0,
+            'memory_hits': 0,
+            'bloom_checks': 0,
+            'db_fallbacks': 0,
+        }
+
+    @staticmethod
+    def _key_columns():
+        return [getattr(Record, field) for field in KEY_FIELDS]
+
+    def load(self, db):
+        """Preload current-week keys in one query and load/build the history Bloom filter"""
+        start = time.time()
+        rows = db.query(Record.id, Record.category_mask, Record.category, *self._key_columns()).filter(
+            Record.created_at >= self.week_start
+        ).all()
+        for row in rows:
+            data = dict(zip(KEY_FIELDS, row[3:]))
+            mask = row[1] if row[1] is not None else category_mask(row[2])
+            self.current[record_key_digest(data)] = [row[0], mask]
+        self.stats['preloaded_keys'] = len(self.current)
+        del rows
+
+        self.bloom = self._load_or_build_bloom(db)
+        self.stats['history_keys'] = self.bloom.count
+        logger.info(f"🔑 Record key index: {len(self.current)} current-week keys, "
+                    f"{self.bloom.count} history keys ({time.time() - start:.1f}s)")
+        return self
+
+    def _load_or_build_bloom(self, db):
+        # History before the weekly reset is immutable, so the filter is reused until the next reset
+        week_stamp = self.week_start.isoformat()
+        bloom, header = BloomFilter.load(self.bloom_path)
+        if bloom is not None and header.get('week_start') == week_stamp:
+            return bloom
+
+        history = Record.created_at < self.week_start
+        history = or_(history, Record.created_at.is_(None))
+        total = db.query(Record.id).filter(history).count()
+        bloom = BloomFilter(int(total * 1.1))
+        for row in db.query(*self._key_columns()).filter(history).yield_per(10000):
+            bloom.add(record_key_digest(dict(zip(KEY_FIELDS, row))))
+        try:
+            bloom.save(self.bloom_path, {'week_start': week_stamp})
+        except Exception as e:
+            logger.warning(f"Could not save record key Bloom filter: {e}")
+        return bloom
+
+    def exists_or_update(self, db, data):
+        """
+        Drop-in for record_exists_or_update(): returns (exists, updated_record_id).
+        Nothing is written here - the caller queues both new rows and category
+        merges for the upsert. A merge on a row inserted by this session (id not
+        known) returns True as the updated id.
+        """
+        digest = record_key_digest(data)
+        entry = self.current.get(digest)
+
+        if entry is None:
+            self.stats['bloom_checks'] += 1
+            if self.bloom is None or digest in self.bloom:
+                # Maybe in older history - ask the DB
+                self.stats['db_fallbacks'] += 1
+                existing = find_existing_record(db, data)
+                if existing is not None:
+                    entry = [existing.id, stored_category_mask(existing)]
+                    self.current[digest] = entry
+            if entry is None:
+                self.current[digest] = [None, category_mask(data['category'])]
+                return False, None
+        else:
+            self.stats['memory_hits'] += 1
+
+        merged = entry[1] | category_mask(data['category'])
+        if merged == entry[1]:
+            return True, None
+        entry[1] = merged
+        return True, entry[0] or True
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Weekly range partitions for the records table (PostgreSQL only).
+
+records is partitioned on created_at at the Sunday 18:00 UTC record resets, one
+partition per reset week (records_w20250608 holds the week starting 2025-06-08
+18:00 UTC). Rows without a created_at, and rows outside every attached week,
+land in records_default. Queries bounded on created_at (top baits, recent
+records, data_age filters) prune to the weeks they touch, and VACUUM, VACUUM
+FULL and index bloat are per partition instead of per table.
+
+Every unique index on a partitioned table must contain the partition key, so
+records can't keep its primary key on id or its unique index on record_key
+alone. id stays unique through uq_records_id_week on (id, created_at) - a
+primary key would make created_at NOT NULL, and legacy rows without one live
+in records_default. Global key uniqueness
+moves to record_key_registry (record_key -> created_at of the row that owns
+the key): the COPY loader registers each staged key and pins the staged row's
+created_at to the registered one before its upsert, so ON CONFLICT
+(record_key, created_at) finds the existing row whatever week it lives in.
+An AFTER DELETE trigger releases the key of every deleted row that owned one,
+whichever code path deleted it; detaching a week releases its keys too.
+
+The conversion is opt-in (RECORDS_PARTITIONING=true) and runs from
+run_migrations(); the old table is kept as records_unpartitioned until it is
+dropped by hand. SQLite databases are never partitioned.
+"""
+
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Set RECORDS_PARTITIONING=true to convert records to weekly partitions at startup
+PARTITIONING_ENABLED = os.getenv("RECORDS_PARTITIONING", "false").lower() in ("1", "true", "yes")
+# Reset weeks created ahead of the current one
+PARTITION_WEEKS_AHEAD = int(os.getenv("RECORDS_PARTITION_WEEKS_AHEAD", "2"))
+# Weeks kept attached by the maintenance job; older ones are detached (0 = keep all)
+PARTITION_RETAIN_WEEKS = int(os.getenv("RECORDS_PARTITION_RETAIN_WEEKS", "0"))
+
+DEFAULT_PARTITION = "records_default"
+UNPARTITIONED_TABLE = "records_unpartitioned"
+UNIQUE_KEY_INDEX = "uq_records_record_key_week"
+UNIQUE_ID_INDEX = "uq_records_id_week"
+MIN_SERVER_VERSION = 150000  # UNIQUE NULLS NOT DISTINCT (rows with no created_at)
+READY_RECHECK_SECONDS = 300
+
+_partitioned = {}  # engine url -> (partitioned, checked_at)
+
+
+def week_start(moment):
+    """The Sunday 18:00 UTC reset that starts the week containing `moment` (naive = UTC)"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    days_since_sunday = (moment.weekday() + 1) % 7
+    start = (moment - timedelta(days=days_since_sunday)).replace(hour=18, minute=0, second=0, microsecond=0)
+    if start > moment:
+        start -= timedelta(days=7)
+    return start
+
+
+def partition_name(start):
+    return f"records_w{week_start(start):%Y%m%d}"
+
+
+def partition_weeks(first, last):
+    """Week starts from the week containing `first` through the one containing `last`"""
+    start, end = week_start(first), week_start(last)
+    weeks = []
+    while start <= end:
+        weeks.append(start)
+        start += timedelta(days=7)
+    return weeks
+
+
+def _bound(moment):
+    # created_at is timestamp without time zone holding UTC
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def partition_bounds(start):
+    start = week_start(start)
+    return f"FROM ('{_bound(start)}') TO ('{_bound(start + timedelta(days=7))}')"
+
+
+def partition_ddl(start, parent="records"):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+        f"PARTITION OF {parent} FOR VALUES {partition_bounds(start)}"
+    )
+
+
+def parse_week(week):
+    """'2025-06-08' or '20250608' (any day of the week) -> that week's start"""
+    day = datetime.strptime(week.replace("-", ""), "%Y%m%d")
+    return week_start(day.replace(hour=23, tzinfo=timezone.utc))
+
+
+def records_partitioned(bind):
+    """
+    True when records is a partitioned table. A positive answer is kept for the
+    life of the process; a negative one is rechecked every few minutes.
+    """
+    engine = bind.get_bind() if hasattr(bind, 'get_bind') else getattr(bind, 'engine', bind)
+    if engine.dialect.name != 'postgresql':
+        return False
+    key = str(engine.url)
+    partitioned, checked_at = _partitioned.get(key, (False, 0.0))
+    if partitioned or time.time() - checked_at < READY_RECHECK_SECONDS:
+        return partitioned
+    with engine.connect() as conn:
+        partitioned = bool(conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('records'))"
+        )).scalar())
+    _partitioned[key] = (partitioned, time.time())
+    return partitioned
+
+
+def pin_staged_keys(conn):
+    """
+    Register the staged keys and give every staged row the created_at of the row
+    that owns its key, so the (record_key, created_at) upsert merges into it.
+    """
+    conn.execute(text(
+        "INSERT INTO record_key_registry (record_key, created_at) "
+        "SELECT DISTINCT ON (record_key) record_key, created_at FROM records_staging "
+        "WHERE record_key IS NOT NULL ORDER BY record_key, created_at "
+        "ON CONFLICT (record_key) DO NOTHING"
+    ))
+    conn.execute(text(
+        "UPDATE records_staging s SET created_at = r.created_at FROM record_key_registry r "
+        "WHERE r.record_key = s.record_key AND s.created_at IS DISTINCT FROM r.created_at"
+    ))
+
+
+def registry_ddl(table="records"):
+    """Statements creating record_key_registry and the trigger that releases keys of rows deleted from `table`"""
+    return [
+        "CREATE TABLE IF NOT EXISTS record_key_registry (record_key VARCHAR(32) PRIMARY KEY, created_at TIMESTAMP)",
+        "CREATE INDEX IF NOT EXISTS ix_record_key_registry_created_at ON record_key_registry (created_at)",
+        "CREATE OR REPLACE FUNCTION release_record_key() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        "DELETE FROM record_key_registry WHERE record_key = OLD.record_key "
+        "AND created_at IS NOT DISTINCT FROM OLD.created_at; RETURN NULL; END $$",
+        f"CREATE OR REPLACE TRIGGER records_release_record_key AFTER DELETE ON {table} "
+        "FOR EACH ROW WHEN (OLD.record_key IS NOT NULL) EXECUTE FUNCTION release_record_key()",
+    ]
+
+
+def ensure_registry(engine):
+    """Registry table and release trigger for tables partitioned before the trigger existed"""
+    with engine.begin() as conn:
+        for statement in registry_ddl():
+            conn.execute(text(statement))
+
+
+def ensure_partitions(engine, now=None, weeks_ahead=None):
+    """Create the current week's partition and the next `weeks_ahead`; returns the new names"""
+    now = now or datetime.now(timezone.utc)
+    weeks_ahead = PARTITION_WEEKS_AHEAD if weeks_ahead is None else weeks_ahead
+    existing = {row['name'] for row in list_partitions(engine)}
+    created = []
+    with engine.begin() as conn:
+        for start in partition_weeks(now, now + timedelta(days=7 * weeks_ahead)):
+            if partition_name(start) not in existing:
+                conn.execute(text(partition_ddl(start)))
+                created.append(partition_name(start))
+    for name in created:
+        logger.info(f"📅 Created records partition {name}")
+    return created
+
+
+def list_partitions(engine):
+    """Weekly partitions (attached and detached) with their bounds, size and row estimate"""
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhparent IS NOT NULL, "
+            "pg_total_relation_size(c.oid), c.reltuples::bigint "
+            "FROM pg_class c LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = to_regclass('records') "
+            "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace "
+            "AND (c.relname LIKE 'records\\_w%' OR c.relname = :default) ORDER BY c.relname"
+        ), {'default': DEFAULT_PARTITION}).fetchall()
+    return [
+        {'name': name, 'bounds': bounds, 'attached': attached, 'size_bytes': size, 'estimated_rows': max(estimate, 0)}
+        for name, bounds, attached, size, estimate in rows
+    ]
+
+
+def recent_partitions(engine, weeks=2, now=None):
+    """Attached partitions for the last `weeks` reset weeks plus the default one"""
+    now = now or datetime.now(timezone.utc)
+    wanted = {partition_name(start) for start in partition_weeks(now - timedelta(days=7 * (weeks - 1)), now)}
+    wanted.add(DEFAULT_PARTITION)
+    return [row['name'] for row in list_partitions(engine) if row['attached'] and row['name'] in wanted]
+
+
+def detach_partition(engine, start):
+    """
+    Detach one week from records; its table stays for re-attaching. Its keys are
+    released, so a re-scraped key starts a new row in the current week instead of
+    being pinned to a week that is no longer attached.
+    """
+    start = week_start(start)
+    name = partition_name(start)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE records DETACH PARTITION {name}"))
+        conn.execute(text(
+            "DELETE FROM record_key_registry WHERE created_at >= :start AND created_at < :end"
+        ), {'start': start.replace(tzinfo=None), 'end': (start + timedelta(days=7)).replace(tzinfo=None)})
+    logger.info(f"📦 Detached records partition {name}")
+    return name
+
+
+def attach_partition(engine, start):
+    """Attach a previously detached week back to records (keys re-scraped meanwhile stay with the newer row)"""
+    start = week_start(start)
+    name = partition_name(start)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE records ATTACH PARTITION {name} FOR VALUES {partition_bounds(start)}"))
+        conn.execute(text(
+            f"INSERT INTO record_key_registry (record_key, created_at) SELECT record_key, created_at FROM {name} "
+            "WHERE record_key IS NOT NULL ON CONFLICT (record_key) DO NOTHING"
+        ))
+    logger.info(f"📎 Attached records partition {name}")
+    return name
+
+
+def maintain_partitions(engine, now=None):
+    """Scheduled job: create the weeks ahead and detach weeks past the retention window"""
+    if not records_partitioned(engine):
+        return {'partitioned': False}
+    now = now or datetime.now(timezone.utc)
+    created = ensure_partitions(engine, now)
+    detached = []
+    if PARTITION_RETAIN_WEEKS > 0:
+        oldest_kept = week_start(now) - timedelta(days=7 * (PARTITION_RETAIN_WEEKS - 1))
+        for partition in list_partitions(engine):
+            if partition['attached'] and partition['name'] != DEFAULT_PARTITION and partition['name'] < partition_name(oldest_kept):
+                detached.append(detach_partition(engine, parse_week(partition['name'][len("records_w"):])))
+    return {'partitioned': True, 'created': created, 'detached': detached}
+
+
+def ensure_unique_ids(engine):
+    """
+    Tables converted before uq_records_id_week existed only had the plain
+    ix_records_id: build the unique index (blocking writes while it builds -
+    a partitioned parent can't be indexed concurrently) and drop the old one.
+    """
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {'name': UNIQUE_ID_INDEX}).scalar()
+    if exists:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE UNIQUE INDEX {UNIQUE_ID_INDEX} ON records (id, created_at) NULLS NOT DISTINCT"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_records_id"))
+    logger.info(f"🔑 Created {UNIQUE_ID_INDEX} on the partitioned records table")
+    return True
+
+
+def convert_records_table(engine, batch_size=5000, now=None):
+    """
+    Rebuild records as a weekly-partitioned table. Rows are copied in id-range
+    batches while writers keep going; the final catch-up, the re-copy of rows
+    changed since they were copied (category merges, id/key backfills) and the
+    table swap run under an EXCLUSIVE lock that still lets readers through.
+    """
+    from dimensions import ID_COLUMNS
+
+    now = now or datetime.now(timezone.utc)
+    with engine.connect() as conn:
+        version = int(conn.execute(text("SHOW server_version_num")).scalar())
+        if version < MIN_SERVER_VERSION:
+            logger.warning(f"⚠️ Records partitioning needs PostgreSQL 15+, server is {version}")
+            return False
+        bounds = conn.execute(text("SELECT MIN(created_at), MIN(id), MAX(id) FROM records")).first()
+        index_defs = conn.execute(text(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'records' "
+            "AND indexname NOT IN ('records_pkey', 'uq_records_record_key')"
+        )).fetchall()
+
+    logger.info("🗂️ Partitioning records by reset week...")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS records_new CASCADE"))
+        conn.execute(text(
+            "CREATE TABLE records_new (LIKE records INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            "PARTITION BY RANGE (created_at)"
+        ))
+        for start in partition_weeks(bounds[0] or now, now + timedelta(days=7 * PARTITION_WEEKS_AHEAD)):
+            conn.execute(text(partition_ddl(start, parent="records_new")))
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF records_new DEFAULT"))
+        for _, (id_column, dimension) in ID_COLUMNS.items():
+            conn.execute(text(f"ALTER TABLE records_new ADD FOREIGN KEY ({id_column}) REFERENCES dim_{dimension}(id)"))
+        # The old table's index names move aside so the new table can take them over
+        for name, definition in index_defs:
+            original = name[:-len("_unpartitioned")] if name.endswith("_unpartitioned") else name
+            if name == original:
+                conn.execute(text(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned"))
+            conn.execute(text(re.sub(rf"INDEX {name} ON (\w+\.)?records ", f"INDEX {original} ON records_new ", definition)))
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX {UNIQUE_ID_INDEX} ON records_new (id, created_at) NULLS NOT DISTINCT"
+        ))
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX {UNIQUE_KEY_INDEX} ON records_new (record_key, created_at) NULLS NOT DISTINCT"
+        ))
+        # Deletes on records_new (the catch-up below, everything after the swap) release their keys
+        for statement in registry_ddl("records_new"):
+            conn.execute(text(statement))
+
+    def copy_rows(conn, where, params=None):
+        copied = conn.execute(text(f"INSERT INTO records_new SELECT * FROM records WHERE {where}"), params).rowcount
+        conn.execute(text(
+            "INSERT INTO record_key_registry (record_key, created_at) SELECT record_key, created_at FROM records "
+            f"WHERE {where} AND record_key IS NOT NULL ON CONFLICT (record_key) DO NOTHING"
+        ), params)
+        return copied
+
+    def copy_range(conn, low, high):
+        return copy_rows(conn, "id >= :low AND id < :high", {'low': low, 'high': high})
+
+    copied = 0
+    copied_through = 0
+    if bounds[1] is not None:
+        for low in range(bounds[1], bounds[2] + 1, batch_size):
+            with engine.begin() as conn:
+                copied += copy_range(conn, low, low + batch_size)
+            copied_through = low + batch_size
+            if copied and copied % (batch_size * 20) == 0:
+                logger.info(f"🗂️ Copied {copied} records into partitions...")
+
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE records IN EXCLUSIVE MODE"))
+        newest = conn.execute(text("SELECT MAX(id) FROM records")).scalar()
+        if newest is not None and newest >= copied_through:
+            copied += copy_range(conn, copied_through, newest + 1)
+        # Deletes and updates that hit already-copied rows during the copy: changed rows are
+        # deleted (the trigger releases their keys) and copied again with their registry entries
+        conn.execute(text("DELETE FROM records_new n WHERE NOT EXISTS (SELECT 1 FROM records o WHERE o.id = n.id)"))
+        conn.execute(text(
+            "CREATE TEMP TABLE changed_records ON COMMIT DROP AS SELECT o.id FROM records o "
+            "JOIN records_new n ON n.id = o.id WHERE ROW(o.*) IS DISTINCT FROM ROW(n.*)"
+        ))
+        conn.execute(text("DELETE FROM records_new WHERE id IN (SELECT id FROM changed_records)"))
+        recopied = copy_rows(conn, "id IN (SELECT id FROM changed_records)")
+        conn.execute(text(f"ALTER TABLE records RENAME TO {UNPARTITIONED_TABLE}"))
+        conn.execute(text("ALTER TABLE records_new RENAME TO records"))
+        conn.execute(text("ALTER SEQUENCE records_id_seq OWNED BY records.id"))
+
+    _partitioned[str(engine.url)] = (True, time.time())
+    logger.info(f"✅ Partitioned records: {copied} rows copied, {recopied} re-copied after changes; "
+                f"old table kept as {UNPARTITIONED_TABLE}")
+    return True
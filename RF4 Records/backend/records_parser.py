@@ -0,0 +1,483 @@
+"""
+Fast lxml parser for the RF4 weekly records tables.
+
+Produces the same records as the BeautifulSoup reference parser in
+scraper.py (parse_all_records_from_soup / parse_single_table /
+parse_single_row), but works on an lxml tree with a precompiled plan:
+each row's descendant divs are walked once and bucketed by their class
+string instead of issuing one find() per column.
+
+Records are RecordRow objects: fixed __slots__ rows that behave like the
+old dicts (same keys, ==, get, item assignment) without a per-row dict.
+The scrape loop fills in the write columns in place (normalize_record), so
+one object per row goes from parser to inserter, and the repeated fish,
+waterbody, bait, date and region strings are interned.
+"""
+
+import logging
+import re
+import sys
+from collections.abc import MutableMapping
+from datetime import date
+from functools import lru_cache
+
+from lxml import etree
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# Precompiled selectors - built once at import time
+_RECORDS_TABLES_XPATH = etree.XPath(
+    "//div[normalize-space(@class)='records_subtable flex_table']"
+)
+_DETAIL_ROWS_XPATH = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' row ')]"
+)
+
+# Exact (whitespace-normalized) class strings of the row columns we read
+_COLUMN_CLASSES = {
+    'col overflow nowrap fish': 'fish',
+    'col overflow nowrap weight': 'weight',
+    'col overflow nowrap location': 'location',
+    'col overflow nowrap bait': 'bait',
+    'col overflow nowrap gamername': 'gamername',
+    'col overflow nowrap gamername has_overflow': 'gamername_overflow',
+    'col overflow nowrap player': 'player',
+    'col overflow nowrap username': 'username',
+    'col overflow nowrap data': 'data',
+}
+
+# Player column fallbacks for different language versions, in priority order
+_GAMERNAME_COLUMNS = ('gamername', 'gamername_overflow', 'player', 'username')
+
+
+class RecordRow(MutableMapping):
+    """
+    One record row. Keys are the slot names; a slot that was never set is a
+    missing key, so a freshly parsed row compares equal to the parser's old
+    7-key dict and gains bait1/bait2/category/... keys as it is normalized.
+    """
+
+    __slots__ = (
+        'fish', 'weight', 'waterbody', 'bait', 'player', 'date', 'region',
+        'bait1', 'bait2', 'created_at', 'category', 'category_mask', 'trophy_class', 'record_key',
+        'catch_date', 'scraped_at',
+    )
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            self[name] = value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for name in self.__slots__:
+            if hasattr(self, name):
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        # Pickled as a compact name/value tuple (parse pool and replay workers)
+        return (_restore_row, (tuple(self.items()),))
+
+    def __repr__(self):
+        return f"RecordRow({dict(self)!r})"
+
+
+def _restore_row(items):
+    row = RecordRow()
+    for name, value in items:
+        setattr(row, name, value)
+    return row
+
+
+def _intern(value):
+    return sys.intern(value) if value else value
+
+
+def split_bait_string(bait_string):
+    """Split a bait string into primary and secondary baits"""
+    if not bait_string:
+        return None, None
+    
+    # Check if it's a sandwich bait (contains semicolon or plus sign)
+    if ';' in bait_string:
+        parts = bait_string.split(';', 1)  # Split on first semicolon
+        bait1 = parts[0].strip()
+        bait2 = parts[1].strip() if len(parts) > 1 else None
+        return bait1, bait2
+    elif '+' in bait_string:
+        parts = bait_string.split('+', 1)  # Split on first plus sign only
+        bait1 = parts[0].strip()
+        bait2 = parts[1].strip() if len(parts) > 1 else None
+        return bait1, bait2
+    else:
+        # Single bait
+        return bait_string.strip(), None
+
+
+_DATE_PARTS = re.compile(r"^(\d{1,4})[./-](\d{1,2})[./-](\d{2,4})$")
+
+
+@lru_cache(maxsize=4096)
+def parse_catch_date(date_text):
+    """
+    The leaderboard's date text as a date, or None. Regional pages use
+    DD.MM.YY; DD.MM.YYYY, DD/MM/YY, DD-MM-YY and ISO YYYY-MM-DD are read too,
+    and month-first text (MM/DD/YY) is recognized when day-first can't be valid.
+    """
+    match = _DATE_PARTS.match(date_text.strip()) if date_text else None
+    if not match:
+        return None
+    first, second, third = match.groups()
+    if len(first) == 4:
+        candidates = [(int(first), int(second), int(third))]
+    elif len(first) <= 2:
+        year = int(third) + (2000 if len(third) == 2 else 0)
+        candidates = [(year, int(second), int(first)), (year, int(first), int(second))]
+    else:
+        return None
+    for year, month, day in candidates:
+        try:
+            return date(year, month, day)
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_record(record, category, region_name, created_at):
+    """
+    Fill in the write columns of a parsed record (in place for a RecordRow)
+    and return the row handed to the key index and the inserter.
+    """
+    row = record if isinstance(record, RecordRow) else RecordRow(
+        player=record.get('player', ''),
+        fish=record.get('fish', ''),
+        weight=record.get('weight'),
+        waterbody=record.get('waterbody', ''),
+        bait=record.get('bait', ''),
+        date=record.get('date', ''),
+        region=record.get('region', region_name),
+    )
+    bait1, bait2 = split_bait_string(row.get('bait', ''))
+    row.bait1 = _intern(bait1)
+    row.bait2 = _intern(bait2)
+    # Capture time on replay - consumed here, it is not a records column
+    row.created_at = row.pop('scraped_at', None) or record.get('scraped_at') or created_at
+    row.category = category
+    return row
+
+
+def _class_string(element):
+    return " ".join(element.get('class', '').split())
+
+
+def _class_tokens(element):
+    return element.get('class', '').split()
+
+
+def _text(element):
+    """Equivalent of BeautifulSoup get_text(strip=True)"""
+    return "".join(piece.strip() for piece in element.itertext() if piece.strip())
+
+
+def _row_columns(row):
+    """Map column name -> first matching descendant div (one pass over the row)"""
+    columns = {}
+    for element in row.iterdescendants('div'):
+        column = _COLUMN_CLASSES.get(_class_string(element))
+        if column and column not in columns:
+            columns[column] = element
+    return columns
+
+
+def _fish_name(columns):
+    fish_col = columns.get('fish')
+    if fish_col is None:
+        return None
+    for element in fish_col.iterdescendants('div'):
+        if 'text' in _class_tokens(element):
+            return _text(element)
+    return _text(fish_col)
+
+
+def convert_weight_to_grams(weight_text):
+    """
+    Convert leaderboard weight text to grams.
+    Handles "9.747 kg", "341 g", "1 079.839 kg" and comma decimals.
+    Raises ValueError when the number can't be parsed.
+    """
+    weight_text = weight_text.strip()
+
+    # Determine if it's grams or kilograms
+    is_grams = weight_text.lower().endswith('g') and not weight_text.lower().endswith('kg')
+    is_kg = weight_text.lower().endswith('kg')
+
+    # Remove units, thousand separators and European decimal commas
+    weight_text = weight_text.lower().replace('kg', '').replace('g', '').strip()
+    weight_text = weight_text.replace(' ', '')
+    weight_text = weight_text.replace(',', '.')
+
+    weight_float = float(weight_text)
+
+    if is_grams:
+        return int(weight_float)
+    if is_kg:
+        return int(weight_float * 1000)
+    # No unit - assume kg for small numbers, grams otherwise
+    if weight_float < 50:
+        return int(weight_float * 1000)
+    return int(weight_float)
+
+
+def parse_row(row, fish_name, row_type, region_info, columns=None):
+    """Parse a single row element and return a record (or None)"""
+    try:
+        if columns is None:
+            columns = _row_columns(row)
+
+        weight_col = columns.get('weight')
+        location_col = columns.get('location')
+        bait_col = columns.get('bait')
+        data_col = columns.get('data')
+        gamername_col = None
+        for column in _GAMERNAME_COLUMNS:
+            if column in columns:
+                gamername_col = columns[column]
+                break
+
+        weight_text = _text(weight_col) if weight_col is not None else ''
+        location_text = _text(location_col) if location_col is not None else ''
+
+        # Bait comes from the title attribute of bait_icon
+        bait_text = ''
+        if bait_col is not None:
+            bait_icon_div = None
+            for element in bait_col.iterdescendants('div'):
+                if 'bait_icon' in _class_tokens(element):
+                    bait_icon_div = element
+                    break
+            if bait_icon_div is not None:
+                bait_text = bait_icon_div.get('title', '')
+            else:
+                bait_text = _text(bait_col)
+
+        gamername_text = _text(gamername_col) if gamername_col is not None else ''
+        data_text = _text(data_col) if data_col is not None else ''
+
+        return build_record(fish_name, weight_text, location_text, bait_text,
+                            gamername_text, data_text, region_info)
+
+    except Exception as e:
+        logger.debug(f"Error parsing {row_type} row: {e}")
+        return None
+
+
+def build_record(fish_name, weight_text, location_text, bait_text, gamername_text, data_text, region_info):
+    """Validate extracted cell texts and build a record (or None)"""
+    # Silently skip empty records (fish not caught this week in this region)
+    if not weight_text or weight_text == '-' or not gamername_text or not fish_name:
+        return None
+
+    original_weight = weight_text.strip()
+    try:
+        weight_grams = convert_weight_to_grams(weight_text)
+    except ValueError as e:
+        logger.warning(f"Could not parse weight '{original_weight}' for {fish_name} by {gamername_text} in {region_info['name']}: {e}")
+        return None
+
+    if weight_grams <= 0:
+        logger.warning(f"Zero/negative weight {weight_grams}g found for {fish_name} by {gamername_text} in {region_info['name']}")
+        return None
+
+    return RecordRow(
+        fish=_intern(fish_name),
+        weight=weight_grams,
+        waterbody=_intern(location_text),
+        bait=_intern(bait_text),
+        player=gamername_text,
+        date=_intern(data_text),
+        region=_intern(region_info['name']),
+    )
+
+
+def iter_table_records(records_table, region_info):
+    """Yield the records of a single records table element"""
+    current_fish_name = ""
+
+    for child in records_table.iterchildren('div'):
+        child_classes = _class_tokens(child)
+
+        if 'row' in child_classes and 'header' in child_classes:
+            # Header row carries the fish name and is the first record
+            columns = _row_columns(child)
+            fish_name = _fish_name(columns)
+            if fish_name is not None:
+                current_fish_name = fish_name
+            record = parse_row(child, current_fish_name, "header", region_info, columns)
+            if record:
+                yield record
+
+        elif 'rows' in child_classes:
+            # Container of the additional detail rows
+            for j, row in enumerate(_DETAIL_ROWS_XPATH(child)):
+                record = parse_row(row, current_fish_name, f"additional {j+1}", region_info)
+                if record:
+                    yield record
+
+        elif 'row' in child_classes:
+            # Standalone row (fallback) - fish name is on the row itself
+            columns = _row_columns(child)
+            fish_name = _fish_name(columns) or ''
+            record = parse_row(child, fish_name, "standalone", region_info, columns)
+            if record:
+                yield record
+
+
+def parse_table(records_table, region_info):
+    """Parse a single records table element"""
+    return list(iter_table_records(records_table, region_info))
+
+
+def parse_html(html_content):
+    """Build an lxml tree from page HTML"""
+    try:
+        return lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml_html.document_fromstring(html_content.encode('utf-8'))
+
+
+def find_records_tables(root):
+    """Return all records table elements in the tree"""
+    return _RECORDS_TABLES_XPATH(root)
+
+
+def iter_records_tables(tables, region_info):
+    """Yield the records of a list of records table elements"""
+    for table in tables:
+        yield from iter_table_records(table, region_info)
+
+
+def parse_records_tables(tables, region_info):
+    """Parse a list of records table elements into records"""
+    return list(iter_records_tables(tables, region_info))
+
+
+def parse_records_html(html_content, region_info):
+    """Parse all records tables from page HTML (drop-in for parse_all_records_from_soup)"""
+    if not html_content:
+        return []
+    try:
+        root = parse_html(html_content)
+    except etree.ParserError:
+        return []
+    return parse_records_tables(find_records_tables(root), region_info)
+
+
+# In-browser extraction for the Selenium path. Mirrors parse_table()/parse_row()
+# and returns one compact [fish, weight, location, bait title, gamername, date]
+# array per non-empty row, so only the cell texts cross the WebDriver wire.
+EXTRACT_ROWS_SCRIPT = """
+const COLUMNS = {
+    'col overflow nowrap fish': 'fish',
+    'col overflow nowrap weight': 'weight',
+    'col overflow nowrap location': 'location',
+    'col overflow nowrap bait': 'bait',
+    'col overflow nowrap gamername': 'gamername',
+    'col overflow nowrap gamername has_overflow': 'gamername_overflow',
+    'col overflow nowrap player': 'player',
+    'col overflow nowrap username': 'username',
+    'col overflow nowrap data': 'data'
+};
+const classString = el => (el.getAttribute('class') || '').trim().split(/\\s+/).join(' ');
+const text = el => {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    let out = '';
+    while (walker.nextNode()) { out += walker.currentNode.nodeValue.trim(); }
+    return out;
+};
+const columns = row => {
+    const found = {};
+    for (const el of row.getElementsByTagName('div')) {
+        const key = COLUMNS[classString(el)];
+        if (key && !(key in found)) { found[key] = el; }
+    }
+    return found;
+};
+const fishName = cols => {
+    if (!cols.fish) { return null; }
+    for (const el of cols.fish.getElementsByTagName('div')) {
+        if (el.classList.contains('text')) { return text(el); }
+    }
+    return text(cols.fish);
+};
+const rows = [];
+const addRow = (row, fish, cols) => {
+    cols = cols || columns(row);
+    const player = cols.gamername || cols.gamername_overflow || cols.player || cols.username;
+    let bait = '';
+    if (cols.bait) {
+        const icon = Array.from(cols.bait.getElementsByTagName('div')).find(d => d.classList.contains('bait_icon'));
+        bait = icon ? (icon.getAttribute('title') || '') : text(cols.bait);
+    }
+    const weight = cols.weight ? text(cols.weight) : '';
+    const gamername = player ? text(player) : '';
+    if (!weight || weight === '-' || !gamername || !fish) { return; }
+    rows.push([fish, weight, cols.location ? text(cols.location) : '', bait, gamername, cols.data ? text(cols.data) : '']);
+};
+for (const table of document.querySelectorAll('div.records_subtable.flex_table')) {
+    let current = '';
+    for (const child of table.children) {
+        if (child.tagName !== 'DIV') { continue; }
+        const cl = child.classList;
+        if (cl.contains('row') && cl.contains('header')) {
+            const cols = columns(child);
+            const fish = fishName(cols);
+            if (fish !== null) { current = fish; }
+            addRow(child, current, cols);
+        } else if (cl.contains('rows')) {
+            for (const row of child.querySelectorAll('div.row')) { addRow(row, current); }
+        } else if (cl.contains('row')) {
+            const cols = columns(child);
+            addRow(child, fishName(cols) || '', cols);
+        }
+    }
+}
+return rows;
+"""
+
+
+def iter_records_from_rows(rows, region_info):
+    """Yield records for rows returned by EXTRACT_ROWS_SCRIPT"""
+    for row in rows or []:
+        try:
+            fish_name, weight_text, location_text, bait_text, gamername_text, data_text = row
+        except (TypeError, ValueError):
+            continue
+        record = build_record(fish_name, weight_text, location_text, bait_text,
+                              gamername_text, data_text, region_info)
+        if record:
+            yield record
+
+
+def records_from_rows(rows, region_info):
+    """Convert rows returned by EXTRACT_ROWS_SCRIPT into records"""
+    return list(iter_records_from_rows(rows, region_info))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Resource blocking and network metrics for headless Chrome page loads.
+
+Only the records tables matter, so images, fonts, media, stylesheets and
+third-party trackers are dropped with CDP Network.setBlockedURLs before any
+region page is loaded. First-party scripts (which render the tables) are
+never matched; SCRAPER_BLOCK_ALLOW lists substrings of patterns to un-block
+if the site ever needs one of them.
+
+Chrome's performance log (network domain only) is drained after every page
+to report bytes transferred, requests served and requests blocked.
+"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_BLOCKING_ENABLED = os.getenv("SCRAPER_BLOCK_RESOURCES", "true").lower() not in ("0", "false", "no")
+PAGE_METRICS_ENABLED = os.getenv("SCRAPER_PAGE_METRICS", "true").lower() not in ("0", "false", "no")
+
+BLOCKED_EXTENSIONS = [
+    # Images
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",
+    # Fonts
+    "woff", "woff2", "ttf", "otf", "eot",
+    # Media
+    "mp4", "webm", "ogg", "mp3", "wav", "m4a",
+    # Stylesheets - tables are located by class name, layout is irrelevant
+    "css",
+]
+
+BLOCKED_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "mc.yandex.ru", "an.yandex.ru", "facebook.net", "connect.facebook.com",
+    "top-fwz1.mail.ru", "vk.com/rtrg", "hotjar.com", "clarity.ms",
+    "fonts.googleapis.com", "fonts.gstatic.com", "youtube.com", "ytimg.com",
+]
+
+
+def blocked_url_patterns():
+    """Wildcard patterns for Network.setBlockedURLs, minus anything allowlisted"""
+    patterns = [f"*.{ext}" for ext in BLOCKED_EXTENSIONS]
+    # Query strings (cache busters) would defeat the suffix patterns
+    patterns += [f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS]
+    patterns += [f"*{host}*" for host in BLOCKED_HOSTS]
+    patterns += [p.strip() for p in os.getenv("SCRAPER_BLOCK_EXTRA_PATTERNS", "").split(",") if p.strip()]
+    allow = [a.strip() for a in os.getenv("SCRAPER_BLOCK_ALLOW", "").split(",") if a.strip()]
+    return [p for p in patterns if not any(a in p for a in allow)]
+
+
+def configure_network_logging(chrome_options):
+    """Ask chromedriver for network events in the performance log (page metrics)"""
+    if not PAGE_METRICS_ENABLED:
+        return
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def enable_resource_blocking(driver):
+    """Install the block list on a fresh driver. Never raises - blocking is an optimization."""
+    if not RESOURCE_BLOCKING_ENABLED:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns()})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not enable resource blocking: {type(e).__name__}")
+        return False
+
+
+def network_metrics_from_log(entries):
+    """Summarize performance-log entries: bytes transferred, responses, blocked requests"""
+    metrics = {'bytes': 0, 'requests': 0, 'blocked': 0}
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.loadingFinished':
+            metrics['bytes'] += int(params.get('encodedDataLength') or 0)
+        elif method == 'Network.responseReceived':
+            metrics['requests'] += 1
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            metrics['blocked'] += 1
+    return metrics
+
+
+class PageLoadStats:
+    """Per-page network metrics, accumulated over the pages a browser loads"""
+
+    def __init__(self):
+        self.pages = 0
+        self.bytes = 0
+        self.requests = 0
+        self.blocked = 0
+        self.load_seconds = 0.0
+
+    def record(self, driver, load_seconds, region_name=""):
+        metrics = {'bytes': 0, 'requests': 0, 'blocked': 0}
+        if PAGE_METRICS_ENABLED:
+            try:
+                metrics = network_metrics_from_log(driver.get_log("performance"))
+            except Exception:
+                pass  # Log type unavailable (metrics disabled at driver creation)
+        self.pages += 1
+        self.bytes += metrics['bytes']
+        self.requests += metrics['requests']
+        self.blocked += metrics['blocked']
+        self.load_seconds += load_seconds
+        logger.debug(f"📄 {region_name}: {metrics['bytes'] / 1024:.0f} KB in {metrics['requests']} requests "
+                     f"({metrics['blocked']} blocked), {load_seconds:.1f}s")
+        return metrics
+
+    def as_dict(self):
+        return {'page_loads': self.pages, 'bytes_transferred': self.bytes, 'requests_served': self.requests,
+                'requests_blocked': self.blocked, 'load_seconds': self.load_seconds}
+
+
+def format_page_load_summary(stats):
+    """One log line from a PageLoadStats.as_dict()-shaped mapping"""
+    pages = stats.get('page_loads', 0)
+    if not pages:
+        return None
+    return (f"Page loads: {pages} pages, {stats['bytes_transferred'] / 1024:,.0f} KB transferred "
+            f"({stats['bytes_transferred'] / 1024 / pages:,.0f} KB/page), "
+            f"{stats['requests_blocked']} requests blocked, {stats['load_seconds'] / pages:.1f}s avg load")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit-level checkpoints so an interrupted scrape pass is resumed, not restarted.
+
+A pass is one walk over the units a run selects (all 50 category/region
+pages, or the adaptive schedule's due ones). Units are staged as done once
+ingested and committed together with their category's records flush - the
+checkpoint file is rewritten at every commit, so it survives a MemoryError,
+a driver crash, SIGTERM or the worker being killed. The next run skips the
+units already done and picks up at the first incomplete one; a run that gets
+through its remaining units completes the pass and clears the checkpoint.
+
+SCRAPER_RUN_DEADLINE_SECONDS bounds a run: past the deadline no new unit is
+started, the current category is flushed and the rest is left for the next
+run. Checkpoints expire at the weekly leaderboard reset and after
+SCRAPER_CHECKPOINT_MAX_AGE_MINUTES. Set SCRAPER_CHECKPOINTS=false to always
+start a fresh pass.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent / "cache"
+CHECKPOINT_FILE = CACHE_DIR / "scrape_checkpoint.json"
+
+CHECKPOINTS_ENABLED = os.getenv("SCRAPER_CHECKPOINTS", "true").lower() not in ("0", "false", "no")
+CHECKPOINT_MAX_AGE_SECONDS = float(os.getenv("SCRAPER_CHECKPOINT_MAX_AGE_MINUTES", "180")) * 60
+RUN_DEADLINE_SECONDS = float(os.getenv("SCRAPER_RUN_DEADLINE_SECONDS", "1800"))  # 0 = no deadline
+
+
+class ScrapeCheckpoint:
+    """Done units of the current pass, persisted to the cache dir"""
+
+    def __init__(self, path=CHECKPOINT_FILE, max_age_seconds=CHECKPOINT_MAX_AGE_SECONDS):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self._state = None  # {'week_start', 'pass_started', 'updated_at', 'done': [...]}
+        self._staged = set()
+        self.resumed_units = 0
+        self.load()
+
+    @staticmethod
+    def _key(category_key, region_code):
+        return f"{category_key}/{region_code}"
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            if isinstance(state.get('done'), list):
+                self._state = state
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load scrape checkpoint, starting a fresh pass: {e}")
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save scrape checkpoint: {e}")
+
+    def begin(self, week_start, units, now=None):
+        """
+        Start or resume a pass over (category_key, region) units.
+        Returns the units still to do, in their original order.
+        """
+        now = now or time.time()
+        stamp = week_start.isoformat()
+        state = self._state
+        if state is not None and state.get('week_start') == stamp and now - state.get('updated_at', 0) < self.max_age_seconds:
+            done = set(state['done'])
+            remaining = [(key, region) for key, region in units if self._key(key, region['code']) not in done]
+            self.resumed_units = len(units) - len(remaining)
+            if self.resumed_units:
+                logger.info(f"⏯️ Resuming interrupted pass: {self.resumed_units} units already done, {len(remaining)} to go")
+            return remaining
+
+        self._state = {'week_start': stamp, 'pass_started': now, 'updated_at': now, 'done': []}
+        self.resumed_units = 0
+        return list(units)
+
+    def stage(self, category_key, region_code):
+        self._staged.add(self._key(category_key, region_code))
+
+    def commit_staged(self):
+        """Mark the staged units done (their records are committed) and persist"""
+        if self._state is None or not self._staged:
+            return
+        done = set(self._state['done'])
+        done.update(self._staged)
+        self._state['done'] = sorted(done)
+        self._state['updated_at'] = time.time()
+        self._staged.clear()
+        self.save()
+
+    def discard_staged(self):
+        self._staged.clear()
+
+    def complete(self):
+        """The pass got through all its units - the next run starts a new one"""
+        self._state = None
+        self._staged.clear()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not clear scrape checkpoint: {e}")
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Persisted ledger of scrape runs and their category/region units.
+
+scrape_and_update_records opens a scrape_runs row when it starts, appends one
+scrape_units row per region page (page load, parse and ingest time, rows seen,
+new rows, category merges, failure, RSS) and closes the run with its totals.
+Unit rows are buffered and written with their own session at each category
+boundary, so the ledger never shares a transaction with the records and a
+ledger failure never fails a scrape.
+
+/admin/scrape-ledger/runs and /admin/scrape-ledger/summary read it back as a
+time series and as per-region percentiles, so regressions and slow regions
+show up without grepping logs. Set SCRAPER_LEDGER=false to turn it off.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from database import ScrapeRun, ScrapeUnit, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_LEDGER_ENABLED = os.getenv("SCRAPER_LEDGER", "true").lower() not in ("0", "false", "no")
+LEDGER_RETENTION_DAYS = int(os.getenv("SCRAPER_LEDGER_RETENTION_DAYS", "90"))
+SUMMARY_PERCENTILES = (50, 90, 99)
+SUMMARY_MAX_DAYS = 31  # Widest window /admin/scrape-ledger/summary will aggregate
+STALE_RUN_SECONDS = 2 * 3600  # A run still 'running' after this long died with its worker
+
+UNIT_TIMING_FIELDS = ('page_load_seconds', 'parse_seconds', 'ingest_seconds')
+
+
+def _utcnow():
+    # Naive UTC: the ledger columns are plain DateTime on both SQLite and PostgreSQL
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(moment):
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class ScrapeLedger:
+    """Writes one run and its units; every method is a no-op once the ledger is unavailable"""
+
+    def __init__(self, kind="scheduled", session_factory=None, enabled=None):
+        self.kind = kind
+        self.session_factory = session_factory or SessionLocal
+        self.enabled = SCRAPE_LEDGER_ENABLED if enabled is None else enabled
+        self.run_id = None
+        self._pending_units = []
+        self._regions_failed = 0
+        self._peak_rss_mb = 0.0
+
+    def _write(self, action, what):
+        db = self.session_factory()
+        try:
+            result = action(db)
+            db.commit()
+            return result
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Scrape ledger: could not {what}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def start(self):
+        if not self.enabled:
+            return self
+
+        def insert_run(db):
+            stale_before = _utcnow() - timedelta(seconds=STALE_RUN_SECONDS)
+            db.query(ScrapeRun).filter(ScrapeRun.status == 'running', ScrapeRun.started_at < stale_before).update(
+                {ScrapeRun.status: 'abandoned'}, synchronize_session=False)
+            run = ScrapeRun(kind=self.kind, status='running', started_at=_utcnow())
+            db.add(run)
+            db.flush()
+            return run.id
+
+        self.run_id = self._write(insert_run, "open the run")
+        return self
+
+    def unit(self, category, region, failed=False, **fields):
+        """Buffer one category/region unit (written at the next flush)"""
+        if self.run_id is None:
+            return
+        if failed:
+            self._regions_failed += 1
+        if fields.get('rss_mb'):
+            self._peak_rss_mb = max(self._peak_rss_mb, fields['rss_mb'])
+        self._pending_units.append({
+            'run_id': self.run_id,
+            'category': category,
+            'region': region,
+            'started_at': _naive_utc(fields.pop('started_at', None)) or _utcnow(),
+            'failed': failed,
+            **fields,
+        })
+
+    def flush(self):
+        """Write the buffered units (called at each category boundary)"""
+        if self.run_id is None or not self._pending_units:
+            return
+        units, self._pending_units = self._pending_units, []
+        self._write(lambda db: db.bulk_insert_mappings(ScrapeUnit, units), f"write {len(units)} units")
+
+    def finish(self, result):
+        """Close the run with the scrape result dict"""
+        if self.run_id is None:
+            return
+        self.flush()
+        if result.get('interrupted'):
+            status = 'interrupted'
+        elif result.get('success'):
+            status = 'success'
+        else:
+            status = 'failed'
+
+        def close_run(db):
+            run = db.get(ScrapeRun, self.run_id)
+            run.status = status
+            run.finished_at = _utcnow()
+            run.duration_seconds = result.get('duration_seconds')
+            run.regions_scraped = result.get('regions_scraped')
+            run.regions_failed = self._regions_failed
+            run.new_records = result.get('new_records')
+            run.category_updates = result.get('category_updates')
+            run.peak_rss_mb = round(self._peak_rss_mb, 1) or None
+            run.abort_reason = result.get('abort_reason')
+
+        self._write(close_run, "close the run")
+        self._write(prune_ledger, "prune old runs")
+
+
+def prune_ledger(db, retention_days=None):
+    """Drop runs and units older than the retention window"""
+    cutoff = _utcnow() - timedelta(days=retention_days or LEDGER_RETENTION_DAYS)
+    old_runs = db.query(ScrapeRun.id).filter(ScrapeRun.started_at < cutoff)
+    db.query(ScrapeUnit).filter(ScrapeUnit.run_id.in_(old_runs.scalar_subquery())).delete(synchronize_session=False)
+    db.query(ScrapeRun).filter(ScrapeRun.started_at < cutoff).delete(synchronize_session=False)
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (None if empty)"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _percentiles(values):
+    summary = {}
+    for pct in SUMMARY_PERCENTILES:
+        value = percentile(values, pct)
+        summary[f"p{pct}"] = round(value, 3) if value is not None else None
+    return summary
+
+
+def _run_dict(run):
+    return {
+        'id': run.id,
+        'kind': run.kind,
+        'status': run.status,
+        'started_at': run.started_at.isoformat() if run.started_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'duration_seconds': run.duration_seconds,
+        'regions_scraped': run.regions_scraped,
+        'regions_failed': run.regions_failed,
+        'new_records': run.new_records,
+        'category_updates': run.category_updates,
+        'peak_rss_mb': run.peak_rss_mb,
+        'abort_reason': run.abort_reason,
+    }
+
+
+def recent_runs(db, limit=50):
+    """Latest runs, newest first (time series for duration, yield and RSS)"""
+    runs = db.query(ScrapeRun).order_by(ScrapeRun.started_at.desc()).limit(limit).all()
+    return [_run_dict(run) for run in runs]
+
+
+def run_units(db, run_id):
+    """All units of one run, in scrape order"""
+    units = db.query(ScrapeUnit).filter(ScrapeUnit.run_id == run_id).order_by(ScrapeUnit.id).all()
+    return [{
+        'category': u.category,
+        'region': u.region,
+        'started_at': u.started_at.isoformat(),
+        'source': u.source,
+        **{field: getattr(u, field) for field in UNIT_TIMING_FIELDS},
+        'rows_seen': u.rows_seen,
+        'rows_new': u.rows_new,
+        'category_merges': u.category_merges,
+        'page_unchanged': u.page_unchanged,
+        'failed': u.failed,
+        'error': u.error,
+        'rss_mb': u.rss_mb,
+    } for u in units]
+
+
+def _unit_filters(query, since, category, region):
+    query = query.join(ScrapeRun, ScrapeRun.id == ScrapeUnit.run_id).filter(ScrapeRun.started_at >= since)
+    if category:
+        query = query.filter(ScrapeUnit.category == category)
+    if region:
+        query = query.filter(ScrapeUnit.region == region)
+    return query
+
+
+def _percentile_columns(column, prefix):
+    return [func.percentile_cont(pct / 100).within_group(column).label(f"{prefix}_p{pct}")
+            for pct in SUMMARY_PERCENTILES]
+
+
+def _row_percentiles(row, prefix):
+    summary = {}
+    for pct in SUMMARY_PERCENTILES:
+        value = getattr(row, f"{prefix}_p{pct}")
+        summary[f"p{pct}"] = round(float(value), 3) if value is not None else None
+    return summary
+
+
+def run_summary_query(db, since):
+    """PostgreSQL: run count, failures and duration/RSS percentiles in one aggregate"""
+    return db.query(
+        func.count(ScrapeRun.id).label('count'),
+        func.count(ScrapeRun.id).filter(ScrapeRun.status == 'failed').label('failed'),
+        *_percentile_columns(ScrapeRun.duration_seconds, 'duration_seconds'),
+        *_percentile_columns(ScrapeRun.peak_rss_mb, 'peak_rss_mb'),
+    ).filter(ScrapeRun.started_at >= since, ScrapeRun.status != 'running')
+
+
+def unit_summary_query(db, since, category=None, region=None):
+    """PostgreSQL: one aggregate row per category/region"""
+    query = db.query(
+        ScrapeUnit.category,
+        ScrapeUnit.region,
+        func.count(ScrapeUnit.id).label('samples'),
+        func.count(ScrapeUnit.id).filter(ScrapeUnit.failed.is_(True)).label('failures'),
+        func.count(ScrapeUnit.id).filter(ScrapeUnit.page_unchanged.is_(True)).label('unchanged_pages'),
+        func.coalesce(func.sum(ScrapeUnit.rows_new), 0).label('rows_new'),
+        func.coalesce(func.sum(ScrapeUnit.category_merges), 0).label('category_merges'),
+        *(column for field in UNIT_TIMING_FIELDS + ('rss_mb',)
+          for column in _percentile_columns(getattr(ScrapeUnit, field), field)),
+    )
+    return _unit_filters(query, since, category, region).group_by(ScrapeUnit.category, ScrapeUnit.region)
+
+
+def _sql_summary(db, since, category, region):
+    run_row = run_summary_query(db, since).one()
+    runs = {
+        'count': run_row.count,
+        'failed': run_row.failed,
+        'duration_seconds': _row_percentiles(run_row, 'duration_seconds'),
+        'peak_rss_mb': _row_percentiles(run_row, 'peak_rss_mb'),
+    }
+    units = [{
+        'category': row.category,
+        'region': row.region,
+        'samples': row.samples,
+        'failures': row.failures,
+        'unchanged_pages': row.unchanged_pages,
+        'rows_new': int(row.rows_new),
+        'category_merges': int(row.category_merges),
+        **{field: _row_percentiles(row, field) for field in UNIT_TIMING_FIELDS + ('rss_mb',)},
+    } for row in unit_summary_query(db, since, category, region)]
+    return runs, units
+
+
+def _python_summary(db, since, category, region):
+    """SQLite has no percentile_cont - aggregate the rows here"""
+    runs = db.query(ScrapeRun.status, ScrapeRun.duration_seconds, ScrapeRun.peak_rss_mb).filter(
+        ScrapeRun.started_at >= since, ScrapeRun.status != 'running').all()
+
+    groups = {}
+    for unit in _unit_filters(db.query(ScrapeUnit), since, category, region).yield_per(1000):
+        groups.setdefault((unit.category, unit.region), []).append(unit)
+
+    units = []
+    for (unit_category, unit_region), rows in groups.items():
+        units.append({
+            'category': unit_category,
+            'region': unit_region,
+            'samples': len(rows),
+            'failures': sum(1 for u in rows if u.failed),
+            'unchanged_pages': sum(1 for u in rows if u.page_unchanged),
+            'rows_new': sum(u.rows_new or 0 for u in rows),
+            'category_merges': sum(u.category_merges or 0 for u in rows),
+            **{field: _percentiles([getattr(u, field) for u in rows]) for field in UNIT_TIMING_FIELDS},
+            'rss_mb': _percentiles([u.rss_mb for u in rows]),
+        })
+
+    return {
+        'count': len(runs),
+        'failed': sum(1 for run in runs if run.status == 'failed'),
+        'duration_seconds': _percentiles([run.duration_seconds for run in runs]),
+        'peak_rss_mb': _percentiles([run.peak_rss_mb for run in runs]),
+    }, units
+
+
+def ledger_summary(db, days=7, category=None, region=None):
+    """
+    Percentile summary over the last `days`: run durations, and per
+    category/region page load, parse and ingest times with failure counts.
+    Regions are sorted slowest (p90 page load) first. PostgreSQL computes it
+    with percentile_cont in the database; SQLite aggregates in Python.
+    """
+    since = _utcnow() - timedelta(days=days)
+    if db.get_bind().dialect.name == 'postgresql':
+        runs, units = _sql_summary(db, since, category, region)
+    else:
+        runs, units = _python_summary(db, since, category, region)
+    units.sort(key=lambda u: u['page_load_seconds']['p90'] or 0, reverse=True)
+    return {'days': days, 'runs': runs, 'units': units}
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Pipelined fetch / parse / write stages for scrape_and_update_records.
+
+- fetch: the ScrapeUnitScheduler threads download region pages ahead of the
+  main loop (HTTP tier, or the supervised browser when the tables need JS)
+- parse: downloaded HTML is parsed in a process pool, so the CPU-bound parse
+  of page N never holds the GIL while page N+1 is being fetched
+- write: the main loop only classifies rows (in-memory key index) and hands
+  each region to a writer thread that owns its own DB session and batches
+  the upserts, while the next page is already being classified
+
+Stages are connected by bounded queues (the scheduler's in-flight window,
+the parse pool's pending submissions and SCRAPER_WRITE_QUEUE regions), and
+each stage reports throughput and queue depth at the end of a run.
+Set SCRAPER_PIPELINE=false to fetch, parse and write inline again.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from records_parser import find_records_tables, parse_html, parse_records_tables
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_ENABLED = os.getenv("SCRAPER_PIPELINE", "true").lower() not in ("0", "false", "no")
+PARSE_WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", "2"))
+WRITE_QUEUE_SIZE = int(os.getenv("SCRAPER_WRITE_QUEUE", "8"))
+BROWSER_PAGE_GAP_SECONDS = 2  # Politeness delay between browser page loads
+
+# What the fetch stage hands to the main loop; source is "http" or "browser".
+# fetch_seconds/parse_seconds feed the scrape ledger (parse is None for browser pages,
+# whose rows are extracted in the page)
+FetchedPage = namedtuple("FetchedPage", "records source fetch_seconds parse_seconds", defaults=(None, None))
+
+
+class WriteStageError(Exception):
+    """The writer thread could not persist one or more regions"""
+
+
+class StageMetrics:
+    """Thread-safe item count, busy time and queue-depth samples for one stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, depth=None):
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += seconds
+            if depth is not None:
+                self.max_depth = max(self.max_depth, depth)
+                self._depth_total += depth
+                self._depth_samples += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'items': self.items,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'items_per_busy_second': round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+                'avg_queue_depth': round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+                'max_queue_depth': self.max_depth,
+            }
+
+    def summary(self):
+        stats = self.as_dict()
+        return (f"{self.name}: {stats['items']} in {stats['busy_seconds']:.1f}s busy "
+                f"({stats['items_per_busy_second']:.1f}/s), queue avg {stats['avg_queue_depth']:.1f} max {stats['max_queue_depth']}")
+
+
+def parse_page_html(html_content, region_info):
+    """Parse-stage worker: records from a page's HTML, or None if the tables are missing"""
+    tables = find_records_tables(parse_html(html_content))
+    if not tables:
+        return None
+    return parse_records_tables(tables, region_info)
+
+
+class ParseStage:
+    """Process pool for the CPU-bound HTML parse"""
+
+    def __init__(self, workers=None):
+        # spawn: forking the web process (scheduler/uvicorn threads) is not safe
+        self._executor = ProcessPoolExecutor(max_workers=workers or PARSE_WORKERS,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.metrics = StageMetrics("parse")
+
+    def parse(self, html_content, region_info):
+        """Called from fetch threads - blocks that thread (not the GIL) until the pool answers"""
+        with self._lock:
+            self._pending += 1
+            depth = self._pending
+        started = time.perf_counter()
+        try:
+            return self._executor.submit(parse_page_html, html_content, region_info).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self.metrics.observe(time.perf_counter() - started, depth)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FetchStage:
+    """
+    Fetch function for the ScrapeUnitScheduler: HTTP tier parsed in the parse
+    stage, falling back to the supervised browser (one page at a time).
+    Returns a FetchedPage, or None if the caller must render the page itself.
+    """
+
+    def __init__(self, parse_stage, fetch_html=None, browser_fetch=None, on_http_page=None):
+        self.parse_stage = parse_stage
+        self.fetch_html = fetch_html
+        self.browser_fetch = browser_fetch
+        self.on_http_page = on_http_page  # e.g. archive the HTML once it is known to hold the tables
+        self._browser_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.metrics = StageMetrics("fetch")
+        self.browser_metrics = StageMetrics("browser")
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, region_info):
+        with self._lock:
+            self._inflight += 1
+            depth = self._inflight
+        try:
+            if self.fetch_html is not None:
+                started = time.perf_counter()
+                html_content = self.fetch_html(region_info['url'])
+                fetch_seconds = time.perf_counter() - started
+                self.metrics.observe(fetch_seconds, depth)
+                if html_content is not None:
+                    started = time.perf_counter()
+                    records = self.parse_stage.parse(html_content, region_info)
+                    parse_seconds = time.perf_counter() - started
+                    if records is not None:
+                        if self.on_http_page:
+                            self.on_http_page(region_info, html_content)
+                        return FetchedPage(records, "http", fetch_seconds, parse_seconds)
+            if self.browser_fetch is None or self._cancelled.is_set():
+                return None
+            with self._browser_lock:
+                if self._cancelled.is_set():
+                    return None  # Run ended while this page queued for the browser
+                started = time.perf_counter()
+                records = self.browser_fetch(region_info)
+                fetch_seconds = time.perf_counter() - started
+                self.browser_metrics.observe(fetch_seconds, depth)
+                time.sleep(BROWSER_PAGE_GAP_SECONDS)
+            return FetchedPage(records, "browser", fetch_seconds)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def cancel(self):
+        """Stop starting browser loads - fetches still in flight when the run ends are dropped"""
+        self._cancelled.set()
+
+
+class PipelinedRecordWriter:
+    """
+    Writer-thread front end with the BulkRecordInserter interface the scrape
+    loop already uses: add_record() collects a region's rows, end_unit()
+    queues them (blocking when SCRAPER_WRITE_QUEUE regions are waiting) and
+    flush() waits for everything queued to be written. Each region is
+    committed on its own, so a failed region only rolls back itself. flush()
+    raises WriteStageError if any region failed or the writer thread died,
+    so the caller discards the fingerprints/schedule observations staged
+    since the last flush.
+    """
+
+    POLL_SECONDS = 1.0  # How often a blocked caller checks that the writer thread is still alive
+
+    def __init__(self, session_factory, writer_factory, queue_size=None):
+        self.session_factory = session_factory
+        self.writer_factory = writer_factory
+        self.pending_records = []  # Rows of the region being classified
+        self._closed = False
+        self._queue = queue.Queue(maxsize=queue_size or WRITE_QUEUE_SIZE)
+        self._failed_units = 0
+        self.metrics = StageMetrics("write")
+        self._thread = threading.Thread(target=self._run, name="scrape-writer", daemon=True)
+        self._thread.start()
+
+    def add_record(self, record_data):
+        self.pending_records.append(record_data)
+
+    def _put(self, item):
+        """Queue an item without hanging on a full queue nobody drains any more"""
+        while True:
+            if not self._thread.is_alive():
+                raise WriteStageError("Writer thread is not running")
+            try:
+                self._queue.put(item, timeout=self.POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def end_unit(self):
+        rows, self.pending_records = self.pending_records, []
+        self._put(('unit', rows))
+        return True  # Failures surface at the next flush()
+
+    def flush(self):
+        if self._closed:
+            return 0
+        # Rows added after the last end_unit (none in the scrape loop) go as their own unit
+        if self.pending_records:
+            self.end_unit()
+        done = threading.Event()
+        result = {}
+        self._put(('flush', (done, result)))
+        while not done.wait(timeout=self.POLL_SECONDS):
+            if not self._thread.is_alive():
+                raise WriteStageError("Writer thread stopped before the flush completed")
+        if not result['ok']:
+            raise WriteStageError(f"{result['failed_units']} region(s) could not be written")
+        return result['failed_units']
+
+    def close(self):
+        if self._closed:
+            return 0
+        try:
+            return self.flush()
+        finally:
+            self._closed = True
+            if self._thread.is_alive():
+                try:
+                    self._queue.put(('stop', None), timeout=self.POLL_SECONDS)
+                except queue.Full:
+                    logger.error("Writer stage queue full at close - abandoning the writer thread")
+                self._thread.join(timeout=60)
+
+    def _open(self):
+        """New session and record writer, or (None, None) if the database is unavailable"""
+        db = None
+        try:
+            db = self.session_factory()
+            return db, self.writer_factory(db)
+        except Exception as e:
+            logger.error(f"Writer stage could not open a session: {e}")
+            if db is not None:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+            return None, None
+
+    def _write_unit(self, db, writer, rows):
+        """Write and commit one region; False (rolled back) if it failed"""
+        try:
+            for row in rows:
+                writer.add_record(row)
+            if not writer.end_unit():
+                db.rollback()  # The writer already rolled back its own unit; drop anything else it left open
+                return False
+            writer.flush()  # Rows still batched in the writer belong to this region
+            db.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Writer stage failed on a region: {e}")
+            writer.pending_records.clear()
+            try:
+                db.rollback()  # Earlier regions are committed - only this one is lost
+            except Exception as rollback_error:
+                logger.error(f"Writer stage rollback failed: {rollback_error}")
+            return False
+
+    def _run(self):
+        db, writer = self._open()
+        try:
+            while True:
+                op, payload = self._queue.get()
+                if op == 'stop':
+                    return
+                if op == 'unit':
+                    depth = self._queue.qsize() + 1
+                    started = time.perf_counter()
+                    if writer is None:
+                        db, writer = self._open()  # Retry after a failed open or refresh
+                    if writer is None or not self._write_unit(db, writer, payload):
+                        self._failed_units += 1
+                    self.metrics.observe(time.perf_counter() - started, depth)
+                elif op == 'flush':
+                    done, result = payload
+                    ok = self._failed_units == 0
+                    if writer is not None:
+                        try:
+                            writer.flush()
+                            db.commit()
+                        except Exception as e:
+                            logger.error(f"Writer stage flush failed: {e}")
+                            db.rollback()
+                            ok = False
+                    result['ok'] = ok
+                    result['failed_units'] = self._failed_units
+                    self._failed_units = 0
+                    # Fresh session per category, like the inline path (reopened on the next region if this fails)
+                    if db is not None:
+                        try:
+                            db.close()
+                        except Exception as e:
+                            logger.error(f"Writer stage session close failed: {e}")
+                    db, writer = self._open()
+                    done.set()
+        except Exception as e:
+            logger.error(f"Writer stage thread stopped: {e}")
+        finally:
+            if db is not None:
+                try:
+                    db.close()
+                except Exception:
+                    pass
+
+
+def pipeline_summary(*metrics):
+    """Log lines for the stages that did any work"""
+    return [m.summary() for m in metrics if m.items]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Database-backed work queue so several scraper containers can share a pass.
+
+Every category/region unit has exactly one scrape_jobs row. A run publishes
+the units it selected (re-queueing the ones finished more than
+SCRAPER_QUEUE_REQUEUE_SECONDS ago - a unit another worker just scraped is not
+queued again), then claims them one category at a time as its loop reaches
+that category. Claims are a single UPDATE over a FOR UPDATE SKIP LOCKED
+select on PostgreSQL, so concurrent workers never get the same row and never
+wait on each other; SQLite runs the same statement under its database write
+lock. A claimed unit is leased to the worker (hostname-pid) for
+SCRAPER_QUEUE_LEASE_SECONDS and marked done when its category's records are
+committed. At the end of a run, units it could not finish are handed back:
+failed ones are retried by whichever worker claims them next, up to
+SCRAPER_QUEUE_MAX_ATTEMPTS; units it never started go back untouched. A
+worker that dies keeps its lease until it expires, then its units are
+claimable again.
+
+Off by default (SCRAPER_WORK_QUEUE=true to enable); the queue replaces the
+local checkpoint file, since the job rows already record pass progress.
+"""
+
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, case, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+
+from database import ScrapeJob, SessionLocal
+from scrape_checkpoint import RUN_DEADLINE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_QUEUE_ENABLED = os.getenv("SCRAPER_WORK_QUEUE", "false").lower() in ("1", "true", "yes")
+# A lease covers a whole run - no new unit starts past the run deadline
+QUEUE_LEASE_SECONDS = float(os.getenv("SCRAPER_QUEUE_LEASE_SECONDS", str(max(RUN_DEADLINE_SECONDS, 1800) + 600)))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("SCRAPER_QUEUE_MAX_ATTEMPTS", "3"))
+QUEUE_REQUEUE_SECONDS = float(os.getenv("SCRAPER_QUEUE_REQUEUE_SECONDS", "120"))
+CLAIM_RETRIES = 3  # SQLite answers "database is locked" while another worker writes
+
+
+def _utcnow():
+    # Naive UTC, like the scrape ledger tables
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def default_worker_id():
+    return os.getenv("SCRAPER_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ScrapeQueue:
+    """One worker's view of the shared queue for the length of a run"""
+
+    def __init__(self, session_factory=None, worker_id=None, lease_seconds=None,
+                 max_attempts=None, requeue_seconds=None):
+        self.session_factory = session_factory or SessionLocal
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.max_attempts = max_attempts or QUEUE_MAX_ATTEMPTS
+        self.requeue_seconds = QUEUE_REQUEUE_SECONDS if requeue_seconds is None else requeue_seconds
+        self._claimed = set()  # (category_key, region_code) leased by this worker
+        self._started = set()
+        self._staged = set()
+        self._done = set()
+        self.units_claimed = 0
+
+    def _write(self, action, what, retries=1):
+        for attempt in range(retries):
+            db = self.session_factory()
+            try:
+                result = action(db)
+                db.commit()
+                return result
+            except OperationalError as e:
+                db.rollback()
+                if attempt + 1 == retries:
+                    logger.warning(f"Scrape queue: could not {what}: {e}")
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Scrape queue: could not {what}: {e}")
+                return None
+            finally:
+                db.close()
+        return None
+
+    def publish(self, units, now=None):
+        """Queue (category_key, region) units that are not already queued, leased or just done"""
+        now = now or _utcnow()
+        keys = [(key, region['code']) for key, region in units]
+        if not keys:
+            return 0
+        pass_id = f"{now:%Y%m%dT%H%M%S}-{self.worker_id}"
+
+        def queue_units(db):
+            insert_fn = pg_insert if db.get_bind().dialect.name == 'postgresql' else sqlite_insert
+            # New units get their row; an existing row is left to the conditional update below
+            inserted = db.execute(insert_fn(ScrapeJob.__table__).values([
+                {'category': key, 'region': code, 'status': 'queued', 'pass_id': pass_id,
+                 'attempts': 0, 'queued_at': now} for key, code in keys
+            ]).on_conflict_do_nothing(index_elements=['category', 'region'])).rowcount
+            requeued = db.execute(
+                update(ScrapeJob)
+                .where(tuple_(ScrapeJob.category, ScrapeJob.region).in_(keys),
+                       ScrapeJob.status.in_(('done', 'failed')),
+                       or_(ScrapeJob.finished_at.is_(None),
+                           ScrapeJob.finished_at <= now - timedelta(seconds=self.requeue_seconds)))
+                .values(status='queued', pass_id=pass_id, attempts=0, queued_at=now,
+                        finished_at=None, last_error=None, lease_owner=None, leased_until=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            return max(inserted, 0) + max(requeued, 0)
+
+        queued = self._write(queue_units, "publish units", retries=CLAIM_RETRIES) or 0
+        logger.info(f"📬 Queued {queued}/{len(keys)} units for workers (the rest are in flight or just done)")
+        return queued
+
+    def claim(self, category_key=None, limit=10, now=None):
+        """Lease up to `limit` claimable units (of one category). Returns a set of (category_key, region_code)."""
+        now = now or _utcnow()
+        claimable = (
+            select(ScrapeJob.id)
+            .where(or_(ScrapeJob.status == 'queued',
+                       and_(ScrapeJob.status == 'leased', ScrapeJob.leased_until < now)),
+                   ScrapeJob.attempts < self.max_attempts)
+            .order_by(ScrapeJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if category_key is not None:
+            claimable = claimable.where(ScrapeJob.category == category_key)
+        claimable = claimable.cte("claimable")
+
+        def lease(db):
+            # Expired leases that used up their attempts are given up on
+            db.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.status == 'leased', ScrapeJob.leased_until < now,
+                       ScrapeJob.attempts >= self.max_attempts)
+                .values(status='failed', finished_at=now, last_error='lease expired')
+                .execution_options(synchronize_session=False)
+            )
+            rows = db.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.id.in_(select(claimable.c.id)))
+                .values(status='leased', lease_owner=self.worker_id, attempts=ScrapeJob.attempts + 1,
+                        leased_until=now + timedelta(seconds=self.lease_seconds))
+                .returning(ScrapeJob.category, ScrapeJob.region)
+                .execution_options(synchronize_session=False)
+            ).all()
+            return {(category, region) for category, region in rows}
+
+        claimed = self._write(lease, "claim units", retries=CLAIM_RETRIES) or set()
+        self._claimed.update(claimed)
+        self.units_claimed += len(claimed)
+        return claimed
+
+    def started(self, category_key, region_code):
+        self._started.add((category_key, region_code))
+
+    def stage(self, category_key, region_code):
+        self._staged.add((category_key, region_code))
+
+    def commit_staged(self):
+        """Mark the staged units done (their records are committed)"""
+        if not self._staged:
+            return
+        staged, self._staged = self._staged, set()
+        now = _utcnow()
+
+        def finish(db):
+            db.execute(
+                update(ScrapeJob)
+                .where(tuple_(ScrapeJob.category, ScrapeJob.region).in_(sorted(staged)),
+                       ScrapeJob.status == 'leased', ScrapeJob.lease_owner == self.worker_id)
+                .values(status='done', finished_at=now, last_error=None, lease_owner=None, leased_until=None)
+                .execution_options(synchronize_session=False)
+            )
+
+        self._write(finish, f"complete {len(staged)} units", retries=CLAIM_RETRIES)
+        self._done.update(staged)
+
+    def discard_staged(self):
+        self._staged.clear()
+
+    def release(self, error=None):
+        """
+        Hand back every unit this worker still holds: attempted ones are retried
+        (or failed after max_attempts), unstarted ones return with their attempt refunded.
+        """
+        unfinished = self._claimed - self._done
+        if not unfinished:
+            return
+        attempted = sorted(unfinished & self._started)
+        unstarted = sorted(unfinished - self._started)
+        now = _utcnow()
+        held = and_(ScrapeJob.status == 'leased', ScrapeJob.lease_owner == self.worker_id)
+        released = {'lease_owner': None, 'leased_until': None}
+
+        def hand_back(db):
+            if attempted:
+                db.execute(
+                    update(ScrapeJob)
+                    .where(tuple_(ScrapeJob.category, ScrapeJob.region).in_(attempted), held)
+                    .values(status=case((ScrapeJob.attempts >= self.max_attempts, 'failed'), else_='queued'),
+                            finished_at=case((ScrapeJob.attempts >= self.max_attempts, now), else_=None),
+                            last_error=(error or 'unit did not complete')[:500], **released)
+                    .execution_options(synchronize_session=False)
+                )
+            if unstarted:
+                db.execute(
+                    update(ScrapeJob)
+                    .where(tuple_(ScrapeJob.category, ScrapeJob.region).in_(unstarted), held)
+                    .values(status='queued', attempts=ScrapeJob.attempts - 1, **released)
+                    .execution_options(synchronize_session=False)
+                )
+
+        self._write(hand_back, f"release {len(unfinished)} units", retries=CLAIM_RETRIES)
+        logger.info(f"📤 Released {len(attempted)} failed and {len(unstarted)} unstarted units back to the queue")
+        self._claimed -= unfinished
+
+
+def queue_status(db):
+    """Job counts by status, current leases per worker and recent failures"""
+    jobs = db.query(ScrapeJob).order_by(ScrapeJob.id).all()
+    now = _utcnow()
+    counts = {}
+    leases = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+        if job.status == 'leased':
+            owner = leases.setdefault(job.lease_owner, {'units': 0, 'expired': 0})
+            owner['units'] += 1
+            if job.leased_until and job.leased_until < now:
+                owner['expired'] += 1
+    return {
+        'jobs': len(jobs),
+        'by_status': counts,
+        'leases': leases,
+        'failed': [{
+            'category': job.category,
+            'region': job.region,
+            'attempts': job.attempts,
+            'last_error': job.last_error,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        } for job in jobs if job.status == 'failed'],
+    }
@@ -0,0 +1,164 @@
+"""
+Bounded-concurrency scheduler for the category×region page units.
+Worker threads fetch pages ahead of the main scrape loop, which still
+consumes the results one region at a time in CATEGORIES order so the
+consecutive-failure and category cleanup logic stays unchanged.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from unified_cleanup import get_memory_usage
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "4"))
+SCRAPER_UNIT_TIMEOUT = float(os.getenv("SCRAPER_UNIT_TIMEOUT", "45"))
+SCRAPER_MEMORY_BUDGET_MB = float(os.getenv("SCRAPER_MEMORY_BUDGET_MB", "600"))
+
+
+class UnitTimeoutError(Exception):
+    """A page unit did not finish within the per-unit timeout"""
+
+
+def build_units(categories):
+    """Flatten CATEGORIES into (category_key, region) units in scrape order"""
+    units = []
+    for category_key, category_info in categories.items():
+        for region in category_info['regions']:
+            units.append((category_key, region))
+    return units
+
+
+class ScrapeUnitScheduler:
+    """
+    Runs fetch_fn(region) for each unit on a small thread pool (or the given executor).
+
+    At most max_workers units are in flight ahead of the consumer. When the
+    process is above memory_budget_mb only one unit is kept in flight, so a
+    memory spike degrades the pass to sequential instead of aborting it.
+    """
+
+    def __init__(self, units, fetch_fn, max_workers=None, unit_timeout=None,
+                 memory_budget_mb=None, should_stop=None, memory_fn=None,
+                 executor=None, fetch_with_category=False):
+        self.units = list(units)
+        self.fetch_fn = fetch_fn
+        self.max_workers = max(1, max_workers or SCRAPER_WORKERS)
+        self.unit_timeout = unit_timeout or SCRAPER_UNIT_TIMEOUT
+        self.memory_budget_mb = memory_budget_mb or SCRAPER_MEMORY_BUDGET_MB
+        self.should_stop = should_stop or (lambda: False)
+        self.memory_fn = memory_fn or get_memory_usage
+
+        # fetch_with_category: call fetch_fn(category_key, region) instead of fetch_fn(region)
+        self.fetch_with_category = fetch_with_category
+
+        # A caller-supplied executor (e.g. a process pool for replay) is shut down with the scheduler
+        self._executor = executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scrape-unit")
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._inflight = {}  # (category_key, region_code) -> Future
+        self._skipped_categories = set()
+        self._throttled = False
+        self.stats = {'units_submitted': 0, 'units_timed_out': 0, 'units_skipped': 0, 'throttled_submits': 0}
+
+    @staticmethod
+    def unit_key(category_key, region):
+        return (category_key, region['code'])
+
+    def start(self):
+        """Prime the pool with the first window of units"""
+        self._top_up()
+        return self
+
+    def _top_up(self):
+        """Submit units until the in-flight window is full or memory is over budget"""
+        with self._lock:
+            while self._next_index < len(self.units) and len(self._inflight) < self.max_workers:
+                if self.should_stop():
+                    return
+
+                category_key, region = self.units[self._next_index]
+                if category_key in self._skipped_categories:
+                    self._next_index += 1
+                    continue
+
+                if self._inflight and self.memory_fn() > self.memory_budget_mb:
+                    if not self._throttled:
+                        logger.warning(f"Memory above scrape budget ({self.memory_budget_mb:.0f}MB) - running units one at a time")
+                        self._throttled = True
+                    self.stats['throttled_submits'] += 1
+                    return
+                self._throttled = False
+
+                key = self.unit_key(category_key, region)
+                self._inflight[key] = self._submit(category_key, region)
+                self._next_index += 1
+                self.stats['units_submitted'] += 1
+
+    def add_units(self, units):
+        """Append units that became available after start (work queue claims) and prefetch them"""
+        with self._lock:
+            self.units.extend(units)
+        self._top_up()
+
+    def _submit(self, category_key, region):
+        if self.fetch_with_category:
+            return self._executor.submit(self.fetch_fn, category_key, region)
+        return self._executor.submit(self.fetch_fn, region)
+
+    def take(self, category_key, region):
+        """
+        Wait for a unit's result and hand it to the caller.
+        Re-raises the worker's exception, or UnitTimeoutError after unit_timeout.
+        """
+        key = self.unit_key(category_key, region)
+        with self._lock:
+            future = self._inflight.get(key)
+
+        if future is None:
+            # Not submitted yet (window was full or throttled) - make room for it
+            self._top_up()
+            with self._lock:
+                future = self._inflight.get(key)
+            if future is None:
+                with self._lock:
+                    future = self._submit(category_key, region)
+                    self._inflight[key] = future
+                    self.stats['units_submitted'] += 1
+                    # Keep the submission cursor past this unit
+                    for index in range(self._next_index, len(self.units)):
+                        if self.unit_key(*self.units[index]) == key:
+                            self._next_index = max(self._next_index, index + 1)
+                            break
+
+        try:
+            return future.result(timeout=self.unit_timeout)
+        except FutureTimeoutError:
+            self.stats['units_timed_out'] += 1
+            future.cancel()
+            raise UnitTimeoutError(f"{category_key}/{region['code']} exceeded {self.unit_timeout:.0f}s")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            self._top_up()
+
+    def skip_category(self, category_key):
+        """Drop the remaining units of a category (consecutive-failure cutoff)"""
+        with self._lock:
+            self._skipped_categories.add(category_key)
+            for key in [k for k in self._inflight if k[0] == category_key]:
+                if self._inflight[key].cancel():
+                    self.stats['units_skipped'] += 1
+                del self._inflight[key]
+        self._top_up()
+
+    def shutdown(self):
+        """Cancel queued units and release the worker threads"""
+        with self._lock:
+            for future in self._inflight.values():
+                future.cancel()
+            self._inflight.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
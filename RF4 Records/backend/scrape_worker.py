@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Run scrapes in a short-lived worker process instead of the API process.
+
+scheduled_scrape and POST /refresh call run_scrape(), which spawns a fresh
+process for scrape_and_update_records and waits for it. The worker streams
+progress after every region and its result dict back over a pipe, then
+exits - returning every page, parse tree, session and cache it touched to
+the OS, so the API process RSS stays flat across scrape cycles.
+
+The supervised browser (browser_supervisor.py) stays in the API process so
+it survives between runs; the worker reaches it through a small RPC pipe.
+Set SCRAPER_WORKER_PROCESS=false to scrape in-process again.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_WORKER_ENABLED = os.getenv("SCRAPER_WORKER_PROCESS", "true").lower() not in ("0", "false", "no")
+WORKER_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_WORKER_TIMEOUT", "3600"))
+STOP_GRACE_SECONDS = 30  # After SIGTERM, how long the worker gets to finish its category cleanup
+
+_state_lock = threading.Lock()
+_state = {'process': None, 'progress': None, 'started_at': None}
+
+
+class RemoteBrowser:
+    """Browser supervisor stand-in inside the worker: page loads run in the API process's browser"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def _call(self, op, payload=None):
+        with self._lock:
+            self._conn.send((op, payload))
+            status, result = self._conn.recv()
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def fetch(self, region_info):
+        return self._call('fetch', region_info)
+
+    @property
+    def stats(self):
+        return self._call('stats')
+
+
+def _worker_main(events, browser_conn, scrape_kwargs):
+    """Worker process entry point"""
+    from browser_supervisor import set_browser_supervisor
+    set_browser_supervisor(RemoteBrowser(browser_conn))
+
+    from scraper import scrape_and_update_records, signal_handler as stop_scraping_handler
+
+    # SIGTERM from _stop_process must reach the scraper's graceful stop, whatever else
+    # the worker imported on the way (e.g. main.py re-run as __mp_main__) registered
+    signal.signal(signal.SIGINT, stop_scraping_handler)
+    signal.signal(signal.SIGTERM, stop_scraping_handler)
+
+    def progress(update):
+        events.send(('progress', update))
+
+    try:
+        result = scrape_and_update_records(progress=progress, **scrape_kwargs)
+        events.send(('result', result))
+    except BaseException as e:
+        events.send(('error', f"{type(e).__name__}: {e}"))
+        raise
+
+
+def _serve_browser_request(conn):
+    """Answer one RPC from the worker's RemoteBrowser with the local supervisor"""
+    from browser_supervisor import get_browser_supervisor
+    op, payload = conn.recv()
+    try:
+        supervisor = get_browser_supervisor()
+        if op == 'fetch':
+            result = supervisor.fetch(payload)
+        elif op == 'stats':
+            result = dict(supervisor.stats)
+        else:
+            raise ValueError(f"unknown browser op {op!r}")
+        conn.send(('ok', result))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+def _failed_result(reason):
+    return {
+        'success': False,
+        'categories_scraped': 0,
+        'regions_scraped': 0,
+        'new_records': 0,
+        'truly_new_records': 0,
+        'category_updates': 0,
+        'duration_seconds': 0,
+        'errors_occurred': True,
+        'interrupted': False,
+        'category_failures': 0,
+        'failed_cleanups': 0,
+        'abort_reason': reason
+    }
+
+
+def _process_rss_mb(pid):
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1024 / 1024
+    except Exception:
+        return 0.0
+
+
+def run_scrape(**scrape_kwargs):
+    """
+    Run one scrape in a fresh worker process and return its result dict
+    (same shape as scrape_and_update_records, plus worker_peak_rss_mb).
+    """
+    if not SCRAPE_WORKER_ENABLED:
+        from scraper import scrape_and_update_records
+        return scrape_and_update_records(**scrape_kwargs)
+
+    # spawn: forking the web process (scheduler/uvicorn threads) is not safe
+    ctx = multiprocessing.get_context("spawn")
+    events, events_child = ctx.Pipe(duplex=False)
+    browser_conn, browser_child = ctx.Pipe()
+    process = ctx.Process(target=_worker_main, args=(events_child, browser_child, scrape_kwargs),
+                          name="scrape-worker")
+    process.start()
+    events_child.close()
+    browser_child.close()
+    with _state_lock:
+        _state.update(process=process, progress=None, started_at=datetime.now(timezone.utc))
+    logger.info(f"🚚 Scrape worker started (pid {process.pid})")
+
+    result = None
+    error = None
+    peak_rss = 0.0
+    deadline = time.monotonic() + WORKER_TIMEOUT_SECONDS
+    sources = [events, browser_conn, process.sentinel]
+    try:
+        while sources:
+            for ready in wait(sources, timeout=5):
+                if ready is process.sentinel:
+                    sources.remove(process.sentinel)
+                    continue
+                try:
+                    if ready is browser_conn:
+                        _serve_browser_request(browser_conn)
+                        continue
+                    kind, payload = events.recv()
+                except EOFError:
+                    sources.remove(ready)  # Worker side closed - it has exited
+                    continue
+                if kind == 'progress':
+                    with _state_lock:
+                        _state['progress'] = payload
+                elif kind == 'result':
+                    result = payload
+                else:
+                    error = payload
+
+            if process.sentinel not in sources and events not in sources:
+                break
+            peak_rss = max(peak_rss, _process_rss_mb(process.pid))
+            if time.monotonic() > deadline and process.is_alive():
+                logger.error(f"Scrape worker exceeded {WORKER_TIMEOUT_SECONDS:.0f}s - stopping it")
+                _stop_process(process)
+                deadline = float("inf")
+    finally:
+        process.join(timeout=STOP_GRACE_SECONDS)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        events.close()
+        browser_conn.close()
+        with _state_lock:
+            _state.update(process=None, progress=None, started_at=None)
+
+    if result is None:
+        reason = error or f"worker exited with code {process.exitcode}"
+        logger.error(f"Scrape worker failed: {reason}")
+        result = _failed_result(reason)
+    result['worker_peak_rss_mb'] = round(peak_rss, 1)
+    logger.info(f"🚚 Scrape worker finished (exit {process.exitcode}, peak {peak_rss:.0f}MB RSS)")
+    return result
+
+
+def _stop_process(process):
+    """SIGTERM first - the scraper finishes the current region and flushes - then SIGKILL"""
+    try:
+        os.kill(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    process.join(timeout=STOP_GRACE_SECONDS)
+    if process.is_alive():
+        process.kill()
+
+
+def stop_scrape_worker():
+    """Ask a running worker to stop (server shutdown)"""
+    with _state_lock:
+        process = _state['process']
+    if process is not None and process.is_alive():
+        _stop_process(process)
+
+
+def get_scrape_progress():
+    """Latest progress of the running worker, or None when idle"""
+    with _state_lock:
+        if _state['process'] is None:
+            return None
+        return {
+            'pid': _state['process'].pid,
+            'started_at': _state['started_at'].isoformat(),
+            **(_state['progress'] or {}),
+        }
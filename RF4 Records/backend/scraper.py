@@ -6,15 +6,51 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 from database import SessionLocal, Record
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import functools
+import gc
 import time
 import random
 import logging
 from datetime import datetime, timezone
-from bulk_operations import BulkRecordInserter, OptimizedRecordChecker
+from bulk_operations import BulkRecordInserter, OptimizedRecordChecker, create_record_writer
+from http_fetcher import HTTP_FETCH_ENABLED, fetch_records_html, close_http_session
+from records_parser import (
+    parse_html,
+    find_records_tables,
+    parse_records_tables,
+    parse_records_html,
+    records_from_rows,
+    normalize_record,
+    EXTRACT_ROWS_SCRIPT
+)
+from scrape_scheduler import SCRAPER_UNIT_TIMEOUT, ScrapeUnitScheduler, build_units
+from scrape_pipeline import (
+    PIPELINE_ENABLED,
+    BROWSER_PAGE_GAP_SECONDS,
+    FetchStage,
+    FetchedPage,
+    ParseStage,
+    PipelinedRecordWriter,
+    pipeline_summary
+)
+from page_fingerprints import PageFingerprintStore, compute_page_fingerprint
+from page_archive import ARCHIVE_ENABLED, archive_page, create_replay_executor, load_archived_unit
+from adaptive_schedule import UnitSchedule
+from browser_supervisor import BROWSER_SUPERVISOR_ENABLED, REQUEST_TIMEOUT_SECONDS, get_browser_supervisor
+from page_readiness import TABLE_SELECTORS, wait_for_tables
+from scrape_ledger import ScrapeLedger
+from scrape_checkpoint import CHECKPOINTS_ENABLED, RUN_DEADLINE_SECONDS, ScrapeCheckpoint
+from scrape_queue import SCRAPE_QUEUE_ENABLED, ScrapeQueue
+from resource_blocking import (
+    PageLoadStats,
+    configure_network_logging,
+    enable_resource_blocking,
+    format_page_load_summary
+)
+from record_keys import RecordKeyIndex, category_code, category_mask, find_existing_record, stored_category_mask
+from optimized_records import get_last_record_reset_date
 import os
 import signal
 import sys
@@ -23,9 +59,9 @@ from unified_cleanup import (
     post_scrape_cleanup,
     cleanup_zombie_processes,
     get_memory_usage,
-    clear_beautifulsoup_cache,
     safe_driver_quit,
-    kill_chrome_processes
+    kill_chrome_processes,
+    supervised_process_tree_pids
 )
 
 # Built-in functions should be available naturally
@@ -36,6 +72,10 @@ should_stop_scraping = False
 # Global flag to prevent Chrome process creation after scraping is finished
 _scraping_finished = False
 
+# How the Selenium path reads the tables: "js" extracts rows in the browser with one
+# execute_script call, "page_source" pulls the full HTML into Python and parses it
+SELENIUM_EXTRACTION_MODE = os.getenv("SCRAPER_EXTRACTION_MODE", "js").lower()
+
 def signal_handler(signum, frame):
     """Handle interruption signals during scraping"""
     global should_stop_scraping
@@ -145,67 +185,37 @@ CATEGORIES = {
     }
 }
 
+# Region page URL -> category key (archive paths are keyed by category/region)
+CATEGORY_BY_URL = {
+    region['url']: category_key
+    for category_key, category_info in CATEGORIES.items()
+    for region in category_info['regions']
+}
+
+def archive_fetched_page(region_info, content, kind="html"):
+    """Write a fetched page to the raw page archive when SCRAPER_ARCHIVE_PAGES is on"""
+    if ARCHIVE_ENABLED and content:
+        category_key = CATEGORY_BY_URL.get(region_info.get('url'), 'unknown')
+        archive_page(category_key, region_info['code'], content, kind)
+
 # Helper to check if a record exists (updated for merged records with compact categories)
 def record_exists_or_update(db: Session, data: dict):
     """
     Check if a record exists with the same fish/player/weight/waterbody/bait/date/region.
     If it exists, check if the category is already included in the category field.
-    If not, update it by adding the new category to the existing category.
+    Nothing is written here: the caller queues new records and category updates on a
+    BulkRecordInserter, whose upsert unions the category into the existing row.
     Returns (exists, updated_record_id) tuple.
     """
-    # Map full category names to compact format
-    category_map = {
-        'Normal': 'N',
-        'Light': 'L', 
-        'Ultralight': 'U',
-        'BottomLight': 'B',
-        'Bottom Light': 'B',  # Handle both formats
-        'Telescopic': 'T'
-    }
-    
     # Find existing record (ignoring category for now)
-    existing_record = db.query(Record).filter(
-        and_(
-            Record.player == data['player'],
-            Record.fish == data['fish'],
-            Record.weight == data['weight'],
-            Record.waterbody == data['waterbody'],
-            Record.bait1 == data['bait1'],
-            Record.bait2 == data['bait2'],
-            Record.date == data['date'],
-            Record.region == data['region']
-        )
-    ).first()
+    existing_record = find_existing_record(db, data)
     
     if existing_record:
-        # Record exists - check if we need to add the new category
-        new_category_code = category_map.get(data['category'], data['category'])
-        
-        # Parse existing categories from the category field (compact format)
-        if existing_record.category:
-            # Check if it's already in compact format (contains semicolons)
-            if ';' in existing_record.category:
-                existing_categories = set(existing_record.category.split(';'))
-            else:
-                # Convert old format to compact format
-                old_category_code = category_map.get(existing_record.category, existing_record.category)
-                existing_categories = {old_category_code}
-        else:
-            # Handle records that might not have category set yet
-            existing_categories = set()
-        
-        # Add new category if not already present
-        if new_category_code not in existing_categories:
-            existing_categories.add(new_category_code)
-            
-            # Update the record with combined categories in the category field
-            updated_categories = ';'.join(sorted(existing_categories))
-            existing_record.category = updated_categories
-            
+        # Record exists - does its category mask still miss this category's bit?
+        if not stored_category_mask(existing_record) & category_mask(data['category']):
             return True, existing_record.id
-        else:
-            # Category already exists, no update needed
-            return True, None
+        # Category already exists, no update needed
+        return True, None
     
     # Record doesn't exist
     return False, None
@@ -216,26 +226,6 @@ def record_exists(db: Session, data: dict):
     exists, _ = record_exists_or_update(db, data)
     return exists
 
-def split_bait_string(bait_string):
-    """Split a bait string into primary and secondary baits"""
-    if not bait_string:
-        return None, None
-    
-    # Check if it's a sandwich bait (contains semicolon or plus sign)
-    if ';' in bait_string:
-        parts = bait_string.split(';', 1)  # Split on first semicolon
-        bait1 = parts[0].strip()
-        bait2 = parts[1].strip() if len(parts) > 1 else None
-        return bait1, bait2
-    elif '+' in bait_string:
-        parts = bait_string.split('+', 1)  # Split on first plus sign only
-        bait1 = parts[0].strip()
-        bait2 = parts[1].strip() if len(parts) > 1 else None
-        return bait1, bait2
-    else:
-        # Single bait
-        return bait_string.strip(), None
-
 def get_driver():
     """Create and configure Chrome WebDriver for Docker container or local development"""
     global _scraping_finished
@@ -267,7 +257,7 @@ def get_driver():
         # Use simplified cleanup system - safe during scraping
         memory_before = get_memory_usage()
         cleanup_zombie_processes()
-        clear_beautifulsoup_cache()
+        gc.collect()
         memory_after = get_memory_usage()
         memory_freed = memory_before - memory_after
         
@@ -281,7 +271,7 @@ def get_driver():
             # Use aggressive cleanup
             memory_before_aggressive = get_memory_usage()
             cleanup_zombie_processes()
-            clear_beautifulsoup_cache()
+            gc.collect()
             extra_freed = memory_before_aggressive - get_memory_usage()
             
             final_memory = get_memory_usage()
@@ -295,6 +285,41 @@ def get_driver():
         else:
             logger.info(f"Memory acceptable after cleanup: {memory_after}MB")
     
+    pre_chrome_memory = get_memory_usage()
+    logger.info(f"Memory before Chrome creation: {pre_chrome_memory}MB")
+    
+    driver = create_chrome_driver()
+    
+    # MEMORY BOMB PREVENTION: Check memory immediately after Chrome creation
+    post_chrome_memory = get_memory_usage()
+    memory_increase = post_chrome_memory - pre_chrome_memory
+    logger.info(f"Memory after Chrome creation: {post_chrome_memory}MB (Δ+{memory_increase:.1f}MB)")
+    
+    # EMERGENCY: If Chrome creation caused massive memory spike (increased threshold)
+    if post_chrome_memory > 1500:  # Much higher threshold for Railway Docker
+        logger.critical(f"🚨 EMERGENCY: Chrome creation caused memory bomb ({post_chrome_memory}MB)!")
+        logger.critical(f"Memory increased by {memory_increase:.1f}MB during Chrome creation")
+        
+        # Try to clean up the driver we just created
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        
+        # Kill all Chrome processes
+        kill_chrome_processes()
+        
+        raise MemoryError(f"Chrome creation memory bomb: {post_chrome_memory}MB (increased by {memory_increase:.1f}MB)")
+    
+    elif memory_increase > 700:  # Chrome used more than 700MB (increased threshold)
+        logger.warning(f"⚠️  Chrome creation used {memory_increase:.1f}MB - monitoring closely")
+    else:
+        logger.info(f"Chrome creation used {memory_increase:.1f}MB - normal range")
+    
+    return driver
+
+def build_chrome_options():
+    """Chrome flags tuned for headless scraping in a memory-constrained container"""
     chrome_options = Options()
     
     # Core performance and memory optimization flags
@@ -369,73 +394,46 @@ def get_driver():
     chrome_options.add_argument('--allow-running-insecure-content')
     chrome_options.add_argument('--disable-ipc-flooding-protection')
     
-    # Check deployment environment (Browserless support removed)
     chrome_bin = os.getenv('CHROME_BIN')  # Docker container Chrome path
+    if chrome_bin and os.getenv('CHROMEDRIVER_PATH'):
+        chrome_options.binary_location = chrome_bin
+    
+    # Network events for per-page bytes/blocked metrics (resource_blocking.py)
+    configure_network_logging(chrome_options)
+    
+    return chrome_options
+
+def create_chrome_driver():
+    """
+    Start Chrome with the scraper's options - no cleanup or memory gating.
+    Used by get_driver() and by the browser supervisor process (browser_supervisor.py).
+    """
+    chrome_options = build_chrome_options()
+    
+    # Check deployment environment (Browserless support removed)
     chromedriver_path = os.getenv('CHROMEDRIVER_PATH')  # Docker container ChromeDriver path
     
-    if chrome_bin and chromedriver_path:
+    if os.getenv('CHROME_BIN') and chromedriver_path:
         # Running in Docker container with pre-installed Chrome
         logger.info("Using Docker container Chrome installation")
-        
-        # MEMORY MONITORING: Check memory before Chrome creation
-        pre_chrome_memory = get_memory_usage()
-        logger.info(f"Memory before Chrome creation: {pre_chrome_memory}MB")
-        
-        # Set Chrome binary location
-        chrome_options.binary_location = chrome_bin
-        
-        # Create service with specific ChromeDriver path
         service = Service(executable_path=chromedriver_path)
-        
-        # MEMORY BOMB PREVENTION: Monitor memory during Chrome creation
-        try:
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Check memory immediately after Chrome creation
-            post_chrome_memory = get_memory_usage()
-            memory_increase = post_chrome_memory - pre_chrome_memory
-            logger.info(f"Memory after Chrome creation: {post_chrome_memory}MB (Δ+{memory_increase:.1f}MB)")
-            
-            # EMERGENCY: If Chrome creation caused massive memory spike (increased threshold)
-            if post_chrome_memory > 1500:  # Much higher threshold for Railway Docker
-                logger.critical(f"🚨 EMERGENCY: Chrome creation caused memory bomb ({post_chrome_memory}MB)!")
-                logger.critical(f"Memory increased by {memory_increase:.1f}MB during Chrome creation")
-                
-                # Try to clean up the driver we just created
-                try:
-                    driver.quit()
-                except Exception:
-                    pass
-                
-                # Kill all Chrome processes
-                kill_chrome_processes()
-                
-                raise MemoryError(f"Chrome creation memory bomb: {post_chrome_memory}MB (increased by {memory_increase:.1f}MB)")
-            
-            elif memory_increase > 700:  # Chrome used more than 700MB (increased threshold)
-                logger.warning(f"⚠️  Chrome creation used {memory_increase:.1f}MB - monitoring closely")
-            else:
-                logger.info(f"Chrome creation used {memory_increase:.1f}MB - normal range")
-                
-        except MemoryError:
-            raise  # Re-raise memory errors
-        except Exception as e:
-            logger.error(f"Failed to create Chrome driver: {e}")
-            raise
-        
-        # Set more aggressive timeouts to prevent renderer hangs in Docker
-        driver.set_page_load_timeout(30)  # Reduced from 45 to prevent long hangs
-        driver.implicitly_wait(10)  # Reduced from 15 to fail faster on timeouts
-        
     else:
         # Local development
         logger.info("Using local ChromeDriver")
         service = Service(ChromeDriverManager().install())
+    
+    try:
         driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Set balanced timeouts for local development
-        driver.set_page_load_timeout(30)  # Balanced timeout for local stability
-        driver.implicitly_wait(10)  # Standard implicit wait
+    except Exception as e:
+        logger.error(f"Failed to create Chrome driver: {e}")
+        raise
+    
+    # Aggressive timeouts to prevent renderer hangs in Docker
+    driver.set_page_load_timeout(30)
+    driver.implicitly_wait(10)
+    
+    # Drop images, fonts, media, stylesheets and trackers - only the tables matter
+    enable_resource_blocking(driver)
     
     return driver
 
@@ -497,8 +495,11 @@ def count_chrome_processes():
         try:
             parent = psutil.Process(current_pid)
             children = parent.children(recursive=True)
+            spared = supervised_process_tree_pids()  # Browser supervisor manages its own Chrome
             
             for child in children:
+                if child.pid in spared:
+                    continue
                 try:
                     if 'chrome' in child.name().lower():
                         chrome_child_processes += 1
@@ -574,7 +575,7 @@ def check_memory_before_scraping():
         # Use simplified cleanup system - safe during scraping
         memory_before = get_memory_usage()
         cleanup_zombie_processes()
-        clear_beautifulsoup_cache()
+        gc.collect()
         memory_freed = memory_before - get_memory_usage()
         
         # Check memory again after cleanup
@@ -644,70 +645,72 @@ def log_memory_usage(context=""):
             
     return memory_mb
 
+def extract_records_in_browser(driver, region_info):
+    """
+    Run EXTRACT_ROWS_SCRIPT in the page and convert the returned rows.
+    Returns None if the script fails, so the caller can fall back to page_source.
+    """
+    try:
+        rows = driver.execute_script(EXTRACT_ROWS_SCRIPT)
+    except Exception as e:
+        logger.debug(f"In-browser extraction failed for {region_info['name']}: {type(e).__name__} - using page_source")
+        return None
+    
+    if rows is None:
+        return None
+    
+    archive_fetched_page(region_info, rows, kind="rows")
+    records = records_from_rows(rows, region_info)
+    logger.debug(f"Extracted {len(records)} records in-browser from {region_info['name']}")
+    return records
+
 def parse_table_selenium(driver, region_info):
-    """Parse the records table using Selenium after JavaScript loads with enhanced timeout handling"""
+    """Parse the records tables once the page has settled (see page_readiness.py)"""
     global should_stop_scraping
     
-    # Minimal wait for faster processing in Docker container
-    time.sleep(1)  # Reduced from 2 seconds
-    
     # Check for interruption
     if should_stop_scraping:
         return []
     
-    # Enhanced timeout handling with multiple strategies
-    wait = WebDriverWait(driver, 15)  # Reasonable timeout for Docker
-    
-    # Look for all records tables on the page with multiple fallback strategies
-    try:
-        # Strategy 1: Look for the main records tables
-        table_elements = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.records_subtable.flex_table")))
-    except TimeoutException:
+    # Wait for the tables to appear and stop mutating - no fixed sleeps
+    readiness = wait_for_tables(driver, region_info)
+    if readiness.get('error'):
+        # Readiness script unavailable - plain wait on the primary table selector
         try:
-            # Strategy 2: Look for any table-like structure
-            logger.debug(f"Primary table selector timeout for {region_info['name']}, trying fallback")
-            table_elements = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.flex_table")))
+            WebDriverWait(driver, readiness['timeout_s']).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, TABLE_SELECTORS[0])))
         except TimeoutException:
-            try:
-                # Strategy 3: Look for any records container
-                logger.debug(f"Secondary table selector timeout for {region_info['name']}, trying final fallback")
-                table_elements = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "[class*='record']")))
-            except TimeoutException:
-                logger.warning(f"Timeout waiting for page content in {region_info['name']} - page may not have loaded properly")
-                return []
-            except Exception as e3:
-                logger.warning(f"Error loading {region_info['name']}: {type(e3).__name__}")
-                return []
-        except Exception as e2:
-            logger.warning(f"Error loading {region_info['name']}: {type(e2).__name__}")
+            logger.warning(f"Timeout waiting for page content in {region_info['name']} - page may not have loaded properly")
+            return []
+        except Exception as e:
+            logger.warning(f"Error loading {region_info['name']}: {type(e).__name__}")
             return []
-    except Exception as e1:
-        logger.warning(f"Error loading {region_info['name']}: {type(e1).__name__}")
+    elif not readiness['ready']:
+        logger.warning(f"Timeout waiting for page content in {region_info['name']} after {readiness['timeout_s']:.0f}s "
+                       f"- page may not have loaded properly")
         return []
     
     # Check for interruption
     if should_stop_scraping:
         return []
     
-    # Get the page source and parse with BeautifulSoup
+    # Preferred: extract the rows in the browser - only the cell texts are transferred
+    if SELENIUM_EXTRACTION_MODE == 'js':
+        records = extract_records_in_browser(driver, region_info)
+        if records is not None:
+            return records
+    
+    # Get the page source and parse it with the compiled lxml parser
     try:
         html_content = driver.page_source
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # IMMEDIATELY clear the large HTML string from memory
-        html_content = None
         
         # Check for interruption before parsing
         if should_stop_scraping:
-            soup.decompose()
             return []
         
         # Now parse all the records tables
-        records = parse_all_records_from_soup(soup, region_info)
-        
-        # AGGRESSIVE memory cleanup - clear large objects immediately and force release
-        soup.decompose()  # BeautifulSoup method to free memory more aggressively
-        soup = None
+        records = parse_records_html(html_content, region_info)
+        archive_fetched_page(region_info, html_content)
         
         # Clear the large HTML string from memory explicitly
         html_content = None
@@ -731,6 +734,9 @@ def parse_table_selenium(driver, region_info):
         logger.error(f"Error parsing page content for {region_info['name']}: {e}")
         return []
 
+# Reference BeautifulSoup parser - the scrape path uses records_parser, these are
+# kept as the baseline its differential tests compare against
+
 def parse_single_table(records_table, table_num, region_info):
     """Parse a single records table"""
     records = []
@@ -924,9 +930,47 @@ def parse_all_records_from_soup(soup, region_info):
     
     return all_records
 
-def scrape_and_update_records():
-    """Main scraping function with comprehensive logging and error handling"""
+def fetch_page_http(region_info):
+    """
+    Fetch and parse a region page over plain HTTP (no browser).
+    Returns a FetchedPage with the download and parse times, or None when the
+    records tables are not in the served HTML and the Selenium path has to
+    render the page instead.
+    """
+    started = time.perf_counter()
+    html_content = fetch_records_html(region_info['url'])
+    fetch_seconds = time.perf_counter() - started
+    if html_content is None:
+        return None
+    
+    started = time.perf_counter()
+    tables = find_records_tables(parse_html(html_content))
+    if not tables:
+        return None
+    records = parse_records_tables(tables, region_info)
+    parse_seconds = time.perf_counter() - started
+    
+    archive_fetched_page(region_info, html_content)
+    return FetchedPage(records, "http", fetch_seconds, parse_seconds)
+
+def fetch_records_http(region_info):
+    """Records of fetch_page_http(), or None when the page needs the browser"""
+    page = fetch_page_http(region_info)
+    return None if page is None else page.records
+
+def scrape_and_update_records(replay_dir=None, replay_since=None, replay_until=None, replay_workers=None,
+                              only_due_units=False, progress=None):
+    """
+    Main scraping function with comprehensive logging and error handling.
+    With replay_dir set, pages come from the raw page archive (parsed in worker
+    processes) instead of rf4game.com - see page_archive.py.
+    With only_due_units, only the category/region pages the adaptive schedule
+    marks as due are scraped (see adaptive_schedule.py).
+    progress, if given, is called with a small dict after every region
+    (the scrape worker forwards it to the API process - see scrape_worker.py).
+    """
     global should_stop_scraping, _scraping_finished
+    replay = replay_dir is not None
     
     # Reset flags at the start of each scraping session
     should_stop_scraping = False
@@ -936,7 +980,11 @@ def scrape_and_update_records():
     cleanup_zombie_processes()
     
     start_time = datetime.now()
-    logger.info(f"=== STARTING SCHEDULED SCRAPE at {start_time} ===")
+    if replay:
+        logger.info(f"=== STARTING ARCHIVE REPLAY from {replay_dir} at {start_time} ===")
+    else:
+        logger.info(f"=== STARTING SCHEDULED SCRAPE at {start_time} ===")
+    ledger = ScrapeLedger(kind='replay' if replay else 'scheduled').start()
     
     # Clean up zombie processes before starting using unified cleanup
     try:
@@ -952,7 +1000,7 @@ def scrape_and_update_records():
         logger.info(f"Pre-scrape memory check passed: {initial_memory}MB")
     except MemoryError as e:
         logger.error(f"Scraping aborted due to memory constraints: {e}")
-        return {
+        result = {
             'success': False,
             'categories_scraped': 0,
             'regions_scraped': 0,
@@ -966,6 +1014,8 @@ def scrape_and_update_records():
             'failed_cleanups': 0,
             'abort_reason': 'high_memory_usage'
         }
+        ledger.finish(result)
+        return result
     
     # Log initial memory usage
     initial_memory = log_memory_usage("before scrape")
@@ -981,20 +1031,149 @@ def scrape_and_update_records():
     consecutive_region_failures = 0  # Track consecutive failures within a category
     category_failures = 0  # Track how many categories had failures
     failed_cleanups = 0  # Track failed driver cleanup attempts
+    regions_via_http = 0  # Regions served by the HTTP fetch tier
+    regions_via_selenium = 0  # Regions that needed the Selenium fallback
+    pages_unchanged = 0  # Pages identical to the last successful scrape (DB work skipped)
+    rows_short_circuited = 0  # Rows on those pages that were never checked against the DB
+    rows_ingested = 0  # Rows run through the ingest loop (replay throughput)
+    units_not_due = 0  # Units skipped because the adaptive schedule has them backed off
+    unit_schedule = None if replay else UnitSchedule()
+    # Shared work queue: units are leased from the database so several workers can split a pass
+    work_queue = ScrapeQueue() if SCRAPE_QUEUE_ENABLED and not replay else None
+    # The queue's job rows already track pass progress, so the local checkpoint is only used without it
+    checkpoint = ScrapeCheckpoint() if CHECKPOINTS_ENABLED and not replay and work_queue is None else None
+    # Past the deadline no new unit is started; the checkpoint hands the rest to the next run
+    deadline = time.monotonic() + RUN_DEADLINE_SECONDS if RUN_DEADLINE_SECONDS > 0 and not replay else None
+    deadline_reached = False
+    due_keys = None  # (category_key, region_code) units to scrape this run, None = all
+    fingerprint_store = PageFingerprintStore()
+    page_stats = PageLoadStats()  # In-process driver page loads (the supervisor keeps its own)
+    browser_stats_before = dict(get_browser_supervisor().stats) if BROWSER_SUPERVISOR_ENABLED and not replay else {}
+    
+    key_index = None
     
     # Initialize bulk operations for performance with smaller batch sizes to prevent memory accumulation
-    bulk_inserter = BulkRecordInserter(db, batch_size=25)  # Smaller batch size to prevent memory leaks
+    if PIPELINE_ENABLED:
+        # Writer thread with its own session - regions are written while the next one is classified
+        bulk_inserter = PipelinedRecordWriter(SessionLocal, create_record_writer)
+    else:
+        bulk_inserter = create_record_writer(db)  # COPY staging loader on PostgreSQL, small upsert batches otherwise
     record_checker = OptimizedRecordChecker(db)
+    unit_scheduler = None
+    parse_stage = None
+    fetch_stage = None
+    
+    def commit_category():
+        """Flush the category's records, then commit the state staged with them. Returns success."""
+        try:
+            bulk_inserter.flush()  # Flush any pending records
+            db.commit()
+            fingerprint_store.commit_staged()
+            if unit_schedule is not None:
+                unit_schedule.commit_staged()
+            if checkpoint is not None:
+                checkpoint.commit_staged()
+            if work_queue is not None:
+                work_queue.commit_staged()
+            return True
+        except Exception as db_error:
+            logger.error(f"Database flush error during category cleanup: {db_error}")
+            fingerprint_store.discard_staged()
+            if unit_schedule is not None:
+                unit_schedule.discard_staged()
+            if checkpoint is not None:
+                checkpoint.discard_staged()
+            if work_queue is not None:
+                work_queue.discard_staged()
+            return False
+        finally:
+            ledger.flush()
     
     try:
         # Get initial database count
         initial_count = db.query(Record).count()
-        driver = get_driver()
+        
+        # Answer "exists / category merge / new" from memory instead of one query per row
+        try:
+            key_index = RecordKeyIndex(get_last_record_reset_date()).load(db)
+        except Exception as e:
+            logger.warning(f"Record key index unavailable, using per-row DB checks: {e}")
+            db.rollback()
+            key_index = None
+        # Chrome is only started on demand, when the HTTP tier can't find the records tables
+        
+        units = build_units(CATEGORIES)
+        if unit_schedule is not None:
+            unit_schedule.start_week(get_last_record_reset_date())
+            if only_due_units:
+                all_units = len(units)
+                units = unit_schedule.due_units(units)
+                due_keys = {(key, region['code']) for key, region in units}
+                units_not_due = all_units - len(units)
+                logger.info(f"📅 {len(units)}/{all_units} units due this run")
+        if checkpoint is not None:
+            # Skip the units an interrupted pass already committed
+            selected = len(units)
+            units = checkpoint.begin(get_last_record_reset_date(), units)
+            if len(units) < selected:
+                due_keys = {(key, region['code']) for key, region in units}
+        if work_queue is not None:
+            # Publish this run's units; they are claimed category by category in the loop below
+            work_queue.publish(units)
+            due_keys = set()
+        
+        # Fetch the HTTP tier for upcoming regions on worker threads while this loop ingests
+        if replay:
+            # Replay: archived snapshots of each unit are parsed in worker processes
+            replay_executor = create_replay_executor(replay_workers)
+            unit_scheduler = ScrapeUnitScheduler(
+                build_units(CATEGORIES),
+                functools.partial(load_archived_unit, str(replay_dir), replay_since, replay_until),
+                max_workers=replay_executor._max_workers,
+                unit_timeout=600,
+                should_stop=lambda: should_stop_scraping,
+                memory_fn=get_memory_usage,
+                executor=replay_executor,
+                fetch_with_category=True
+            ).start()
+        elif PIPELINE_ENABLED:
+            # fetch (threads) -> parse (process pool) -> classify (here) -> write (writer thread)
+            parse_stage = ParseStage()
+            fetch_stage = FetchStage(
+                parse_stage,
+                fetch_html=fetch_records_html if HTTP_FETCH_ENABLED else None,
+                browser_fetch=get_browser_supervisor().fetch if BROWSER_SUPERVISOR_ENABLED else None,
+                on_http_page=archive_fetched_page
+            )
+            unit_scheduler = ScrapeUnitScheduler(
+                [] if work_queue is not None else units,  # Queue claims are added as they are leased
+                fetch_stage,
+                # Browser pages queue behind each other on the one supervised browser
+                unit_timeout=max(SCRAPER_UNIT_TIMEOUT, REQUEST_TIMEOUT_SECONDS + BROWSER_PAGE_GAP_SECONDS),
+                should_stop=lambda: should_stop_scraping,
+                memory_fn=get_memory_usage
+            ).start()
+        else:
+            http_fetch = fetch_page_http if HTTP_FETCH_ENABLED else (lambda region: None)
+            unit_scheduler = ScrapeUnitScheduler(
+                [] if work_queue is not None else units,  # Queue claims are added as they are leased
+                http_fetch,
+                should_stop=lambda: should_stop_scraping,
+                memory_fn=get_memory_usage
+            ).start()
         
         # Loop through all categories
         for category_key, category_info in CATEGORIES.items():
-            if should_stop_scraping:
+            if should_stop_scraping or deadline_reached:
                 break
+            if work_queue is not None:
+                # Lease this category's queued units - regions another worker holds are skipped
+                claimed = work_queue.claim(category_key, limit=len(category_info['regions']))
+                due_keys.update(claimed)
+                unit_scheduler.add_units([(category_key, region) for region in category_info['regions']
+                                          if (category_key, region['code']) in claimed])
+            if due_keys is not None and not any(key == category_key for key, _ in due_keys):
+                continue  # Nothing due in this category - skip it (and its cleanup)
             # Removed verbose category start message
             
             # Reset consecutive failures for each new category
@@ -1004,72 +1183,121 @@ def scrape_and_update_records():
             category_new_records = 0
             category_truly_new_records = 0
             category_updates = 0
+            category_db_code = category_code(category_key)  # Stored form, computed once per category
             
             # Loop through all regions for this category
             for region in category_info['regions']:
                 if should_stop_scraping:
                     break
+                if due_keys is not None and (category_key, region['code']) not in due_keys:
+                    continue
+                if deadline is not None and time.monotonic() > deadline:
+                    logger.warning(f"⏰ Run deadline ({RUN_DEADLINE_SECONDS:.0f}s) reached - leaving the remaining units for the next run")
+                    deadline_reached = True
+                    break
                 
                 # Skip to next category if we've had 2 consecutive failures
                 if consecutive_region_failures >= 2:
                     category_failures += 1
+                    unit_scheduler.skip_category(category_key)
                     break
+                if work_queue is not None:
+                    work_queue.started(category_key, region['code'])
                 region_start_time = datetime.now()
+                # Ledger fields for this unit (see scrape_ledger.py)
+                unit_started_at = datetime.now(timezone.utc)
+                unit_source = 'replay' if replay else 'http'
+                page_load_seconds = None
+                parse_seconds = None
                 # Removed verbose region start message
                 try:
-                    # Check if driver is still alive before using it
-                    if not is_driver_alive(driver):
-                        logger.info("Driver died - killing ALL Chrome processes and creating fresh driver")
-                        
-                        # Don't bother with complex cleanup - just kill everything and start fresh
-                        if driver:
+                    # HTTP tier first - no browser needed when the tables are in the served HTML
+                    records = unit_scheduler.take(category_key, region)
+                    if isinstance(records, FetchedPage):
+                        # Pipeline: the fetch stage already used the browser if it had to
+                        if records.source == 'browser':
+                            regions_via_selenium += 1
+                        else:
+                            regions_via_http += 1
+                        unit_source = records.source
+                        page_load_seconds = records.fetch_seconds
+                        parse_seconds = records.parse_seconds
+                        records = records.records
+                        used_selenium = False
+                    else:
+                        used_selenium = records is None
+                        if not used_selenium:
+                            regions_via_http += 1
+                    
+                    if used_selenium:
+                        unit_source = 'browser'
+                    if used_selenium and BROWSER_SUPERVISOR_ENABLED:
+                        # Warm, recycled-within-bounds browser in the supervisor process
+                        page_started = time.perf_counter()
+                        records = get_browser_supervisor().fetch(region)
+                        page_load_seconds = time.perf_counter() - page_started
+                        regions_via_selenium += 1
+                    elif used_selenium:
+                        # Check if driver is still alive before using it
+                        if driver is None:
+                            driver = get_driver()
+                        elif not is_driver_alive(driver):
+                            logger.info("Driver died - killing ALL Chrome processes and creating fresh driver")
+                            
+                            # Don't bother with complex cleanup - just kill everything and start fresh
                             safe_driver_quit(driver)
                             driver = None
+                            
+                            # Kill ALL Chrome processes using unified cleanup
+                            kill_chrome_processes()
+                            time.sleep(2)  # Wait for processes to die
+                            
+                            # Create fresh driver
+                            driver = get_driver()
                         
-                        # Kill ALL Chrome processes using unified cleanup
-                        kill_chrome_processes()
-                        time.sleep(2)  # Wait for processes to die
+                        # Load page with timeout protection
+                        try:
+                            page_started = time.perf_counter()
+                            driver.get(region['url'])
+                        except Exception as page_error:
+                            logger.warning(f"Page load failed for {region['name']}: {type(page_error).__name__}")
+                            consecutive_region_failures += 1
+                            ledger.unit(category_key, region['code'], failed=True, error=type(page_error).__name__,
+                                        started_at=unit_started_at, source=unit_source,
+                                        page_load_seconds=time.perf_counter() - page_started,
+                                        rss_mb=get_memory_usage())
+                            continue
                         
-                        # Create fresh driver
-                        driver = get_driver()
+                        records = parse_table_selenium(driver, region)
+                        page_load_seconds = time.perf_counter() - page_started
+                        page_stats.record(driver, page_load_seconds, region['name'])
+                        regions_via_selenium += 1
                     
-                    # Load page with timeout protection
-                    try:
-                        driver.get(region['url'])
-                        # Wait a moment for page to stabilize
-                        time.sleep(1)
-                    except Exception as page_error:
-                        logger.warning(f"Page load failed for {region['name']}: {type(page_error).__name__}")
-                        consecutive_region_failures += 1
-                        continue
+                    rows_seen = len(records)
+                    ingest_started = time.perf_counter()
+                    
+                    # Same rows as the last successful scrape - nothing new to write (never skipped on replay)
+                    page_fingerprint = None if replay else compute_page_fingerprint(records)
+                    page_unchanged = not replay and fingerprint_store.is_unchanged(category_key, region['code'], page_fingerprint)
+                    if page_unchanged:
+                        pages_unchanged += 1
+                        rows_short_circuited += len(records)
+                        records = []
                     
-                    records = parse_table_selenium(driver, region)
                     # Track unique fish names for this region
                     region_fish = set()
                     region_new_records = 0
                     region_truly_new_records = 0
                     region_category_updates = 0
+                    region_had_errors = False
+                    rows_ingested += len(records)
+                    page_scraped_at = datetime.now(timezone.utc)  # created_at of this page's rows (capture time on replay)
                     for rec in records:
                         if should_stop_scraping:
                             break
                         try:
-                            # Split bait into bait1 and bait2
-                            bait_text = rec.get('bait', '')
-                            bait1, bait2 = split_bait_string(bait_text)
-                            
-                            data = {
-                                'player': rec.get('player', ''),
-                                'fish': rec.get('fish', ''),
-                                'weight': rec.get('weight'),  # Weight is already validated
-                                'waterbody': rec.get('waterbody', ''),
-                                'bait': bait_text,  # Keep original for backward compatibility
-                                'bait1': bait1,
-                                'bait2': bait2,
-                                'date': rec.get('date', ''),  # Fishing date from leaderboard
-                                'created_at': datetime.now(timezone.utc),  # When we scraped this record
-                                'region': rec.get('region', region['name']),
-                                'category': category_key
-                            }
+                            # Split bait, stamp and categorize the parsed row in place
+                            data = normalize_record(rec, category_db_code, region['name'], page_scraped_at)
                             # Track unique fish
                             if data['fish']:
                                 region_fish.add(data['fish'])
@@ -1077,20 +1305,14 @@ def scrape_and_update_records():
                             # Only add records that have at least some meaningful data
                             if data['fish'] and data['player'] and data['weight']:
                                 # Check if record exists or needs category update
-                                exists, updated_id = record_exists_or_update(db, data)
-                                if not exists:
-                                    # Create new record with compact category format
-                                    category_map = {
-                                        'Normal': 'N',
-                                        'Light': 'L', 
-                                        'Ultralight': 'U',
-                                        'BottomLight': 'B',
-                                        'Bottom Light': 'B',
-                                        'Telescopic': 'T'
-                                    }
-                                    # Set the category field with compact format
-                                    data['category'] = category_map.get(data['category'], data['category'])
+                                if key_index is not None:
+                                    exists, updated_id = key_index.exists_or_update(db, data)
+                                else:
+                                    exists, updated_id = record_exists_or_update(db, data)
+                                if not exists or updated_id:
+                                    # Upsert inserts new records and unions the category into existing ones
                                     bulk_inserter.add_record(data)
+                                if not exists:
                                     region_new_records += 1
                                     region_truly_new_records += 1
                                     total_new_records += 1
@@ -1104,10 +1326,38 @@ def scrape_and_update_records():
                         except Exception as e:
                             logger.error(f"Error processing record in {category_info['name']} - {region['name']}: {e}")
                             errors_occurred = True
+                            region_had_errors = True
                             continue
                     if should_stop_scraping:
                         break
                     
+                    # Load the region as one unit (savepoint-isolated on the COPY path)
+                    if not bulk_inserter.end_unit():
+                        errors_occurred = True
+                        region_had_errors = True
+                    
+                    # Remember the page once fully ingested (committed with the category flush)
+                    if not replay and not page_unchanged and not region_had_errors:
+                        fingerprint_store.stage(category_key, region['code'], page_fingerprint)
+                    
+                    # Feed the unit's change rate to the adaptive schedule
+                    if unit_schedule is not None and not region_had_errors:
+                        unit_schedule.record(category_key, region['code'], region_new_records)
+                    
+                    # Done for this pass once the category flush commits it
+                    if checkpoint is not None and not region_had_errors:
+                        checkpoint.stage(category_key, region['code'])
+                    if work_queue is not None and not region_had_errors:
+                        work_queue.stage(category_key, region['code'])
+                    
+                    ledger.unit(category_key, region['code'], failed=region_had_errors,
+                                started_at=unit_started_at, source=unit_source,
+                                page_load_seconds=page_load_seconds, parse_seconds=parse_seconds,
+                                ingest_seconds=time.perf_counter() - ingest_started,
+                                rows_seen=rows_seen, rows_new=region_truly_new_records,
+                                category_merges=region_category_updates, page_unchanged=page_unchanged,
+                                rss_mb=get_memory_usage())
+                    
                     # Success! Reset consecutive failures and mark category success
                     consecutive_region_failures = 0
                     category_had_success = True
@@ -1120,6 +1370,14 @@ def scrape_and_update_records():
                     
                     # Success - just track the stats, no verbose logging
                     regions_scraped += 1
+                    if progress:
+                        progress({
+                            'category': category_key,
+                            'region': region['code'],
+                            'regions_scraped': regions_scraped,
+                            'regions_total': len(units),
+                            'new_records': total_new_records
+                        })
                     
                     # DISABLED: No memory monitoring during active scraping
                     # Memory cleanup only happens between categories now
@@ -1167,12 +1425,10 @@ def scrape_and_update_records():
                         record_checker = OptimizedRecordChecker(db)
                         
                         # Conservative Python memory cleanup - avoid destroying built-ins
-                        import gc
-                        
                         # Use safe during-scrape cleanup - no Chrome killing
                         memory_before = get_memory_usage()
                         cleanup_zombie_processes()
-                        clear_beautifulsoup_cache()
+                        gc.collect()
                         memory_freed = memory_before - get_memory_usage()
                         logger.debug(f"Mid-scrape cleanup freed {memory_freed:.1f}MB")
                         
@@ -1204,7 +1460,7 @@ def scrape_and_update_records():
                             # Safe additional cleanup during scraping - no Chrome killing
                             memory_before = get_memory_usage()
                             cleanup_zombie_processes()
-                            clear_beautifulsoup_cache()
+                            gc.collect()
                             memory_freed = memory_before - get_memory_usage()
                             logger.debug(f"Additional cleanup freed {memory_freed:.1f}MB")
                             
@@ -1224,7 +1480,7 @@ def scrape_and_update_records():
                         # Additional cleanup during scraping - no Chrome killing
                         memory_before = get_memory_usage()
                         cleanup_zombie_processes()
-                        clear_beautifulsoup_cache()
+                        gc.collect()
                         memory_freed = memory_before - get_memory_usage()
                         logger.debug(f"Additional cleanup freed {memory_freed:.1f}MB")
                         
@@ -1284,7 +1540,6 @@ def scrape_and_update_records():
                         db.flush()
                         
                         # Multiple rounds of garbage collection
-                        import gc
                         gc.collect()
                         gc.collect()
                         
@@ -1304,25 +1559,30 @@ def scrape_and_update_records():
                         current_memory = get_memory_usage()
                         logger.info(f"📊 Memory after complete cleanup: {current_memory}MB")
                     
-                    time.sleep(2)
+                    if used_selenium:
+                        time.sleep(2)
                 except Exception as e:
                     logger.error(f"Error scraping {category_info['name']} - {region['name']}: {type(e).__name__}")
                     errors_occurred = True
                     consecutive_region_failures += 1
+                    ledger.unit(category_key, region['code'], failed=True, error=type(e).__name__,
+                                started_at=unit_started_at, source=unit_source,
+                                page_load_seconds=page_load_seconds, parse_seconds=parse_seconds,
+                                rss_mb=get_memory_usage())
                     
                     # Handle failure strategy quietly
                     if consecutive_region_failures == 1:
-                        # Try to refresh the WebDriver session after first failure
+                        # Drop the WebDriver session after first failure - recreated on demand
                         try:
                             # Clean up memory and zombies during error recovery
                             cleanup_zombie_processes()
-                            clear_beautifulsoup_cache()
+                            gc.collect()
                             if driver:
                                 try:
                                     driver.quit()
                                 except:
                                     pass
-                            driver = get_driver()
+                            driver = None
                         except Exception:
                             logger.error("Failed to refresh WebDriver session")
                     # Skip to next category after 2 consecutive failures (handled by loop logic)
@@ -1330,6 +1590,9 @@ def scrape_and_update_records():
                     # Continue to next region (don't break the loop)
                     continue
             if should_stop_scraping:
+                # Keep what this category already ingested - a resumed pass starts after it
+                if not commit_category():
+                    errors_occurred = True
                 break
             
             # Track if this entire category failed
@@ -1348,18 +1611,15 @@ def scrape_and_update_records():
             logger.info(f"Memory before category cleanup: {memory_before_cleanup}MB")
             
             # 1. Flush database operations first
-            try:
-                bulk_inserter.flush()  # Flush any pending records
-                db.commit()
-            except Exception as db_error:
-                logger.error(f"Database flush error during category cleanup: {db_error}")
+            if not commit_category():
+                errors_occurred = True
             
             # 2. Use simplified cleanup for Chrome and memory cleanup
             try:
                 # Use simplified cleanup
                 memory_before_cleanup = get_memory_usage()
                 cleanup_zombie_processes()
-                clear_beautifulsoup_cache()
+                gc.collect()
                 success = safe_driver_quit(driver)
                 # Kill any remaining Chrome child processes after driver quit
                 kill_chrome_processes()
@@ -1395,7 +1655,8 @@ def scrape_and_update_records():
                 
                 db.close()  # Close the current session
                 db = SessionLocal()  # Fresh database session
-                bulk_inserter = BulkRecordInserter(db, batch_size=25)  # Smaller batch size to prevent memory leaks
+                if not PIPELINE_ENABLED:  # The writer thread refreshes its own session at each flush
+                    bulk_inserter = create_record_writer(db)  # COPY staging loader on PostgreSQL, small upsert batches otherwise
                 record_checker = OptimizedRecordChecker(db)  # Refresh checker with new session
                 
             except Exception as db_error:
@@ -1407,24 +1668,16 @@ def scrape_and_update_records():
                             record_checker.clear_cache()  # Clear cache before closing
                         db.close()  # Close the problematic session
                     db = SessionLocal()
-                    bulk_inserter = BulkRecordInserter(db, batch_size=25)  # Smaller batch size to prevent memory leaks
+                    if not PIPELINE_ENABLED:
+                        bulk_inserter = create_record_writer(db)  # COPY staging loader on PostgreSQL, small upsert batches otherwise
                     record_checker = OptimizedRecordChecker(db)  # Refresh checker with new session
                 except Exception as fallback_error:
                     logger.error(f"Failed to create fallback database session: {fallback_error}")
             
-            # 4. Create fresh Chrome driver for next category (if not last category)
-            remaining_categories = list(CATEGORIES.keys())[list(CATEGORIES.keys()).index(category_key) + 1:]
-            if remaining_categories and not should_stop_scraping:
-                try:
-                    logger.info("🆕 Creating fresh Chrome driver for next category...")
-                    driver = get_driver()
-                    logger.info("✅ Fresh Chrome driver ready")
-                except Exception as driver_error:
-                    logger.error(f"Failed to create fresh driver: {driver_error}")
-                    # We'll try to create it on-demand later
-                    driver = None
+            # 4. No Chrome pre-start for the next category - the driver is created
+            #    on demand only if a region needs the Selenium fallback
             
-            # 5. Final memory state (includes new Chrome if created)
+            # 5. Final memory state
             memory_after_cleanup = get_memory_usage()
             
             # 6. Final memory check - abort if still over 1.5GB
@@ -1433,8 +1686,12 @@ def scrape_and_update_records():
                 logger.critical("Aborting scraping to prevent memory bomb")
                 should_stop_scraping = True
                 break
+        if checkpoint is not None and not should_stop_scraping and not deadline_reached:
+            checkpoint.complete()  # Every remaining unit was attempted - next run starts a new pass
         if should_stop_scraping:
             logger.info("🛑 Scraping interrupted by user")
+        elif deadline_reached:
+            logger.info("⏰ Scraping stopped at the run deadline (pass checkpointed)")
         elif category_failures > 0:
             logger.info(f"✅ Scraping complete ({category_failures} categories had failures)")
         else:
@@ -1462,7 +1719,35 @@ def scrape_and_update_records():
         final_memory = get_memory_usage()
         memory_change = final_memory - initial_memory if 'initial_memory' in locals() else 0
         logger.info(f"📊 Final: {regions_scraped} regions, +{total_new_records} records, {total_duration:.1f}s")
+        logger.info(f"   └─ {regions_via_http} regions via HTTP, {regions_via_selenium} via Selenium fallback")
+        if BROWSER_SUPERVISOR_ENABLED and regions_via_selenium:
+            browser_stats = get_browser_supervisor().stats
+            logger.info(f"   └─ Browser: {browser_stats['drivers_started']} started, {browser_stats['recycles']} recycled, "
+                        f"{browser_stats['browser_rss_mb']:.0f}MB RSS")
+            # This run's share of the supervisor's lifetime counters
+            page_load_totals = {key: browser_stats[key] - browser_stats_before.get(key, 0)
+                                for key in page_stats.as_dict()}
+        else:
+            page_load_totals = page_stats.as_dict()
+        page_load_summary = format_page_load_summary(page_load_totals)
+        if page_load_summary:
+            logger.info(f"   └─ {page_load_summary}")
+        if PIPELINE_ENABLED:
+            stage_metrics = [bulk_inserter.metrics]
+            if fetch_stage is not None:
+                stage_metrics = [fetch_stage.metrics, parse_stage.metrics, fetch_stage.browser_metrics] + stage_metrics
+            pipeline_stats = {m.name: m.as_dict() for m in stage_metrics}
+            for line in pipeline_summary(*stage_metrics):
+                logger.info(f"   └─ Pipeline {line}")
+        logger.info(f"   └─ {pages_unchanged} unchanged pages skipped ({rows_short_circuited} rows short-circuited)")
+        if units_not_due:
+            logger.info(f"   └─ {units_not_due} units backed off by the adaptive schedule")
         logger.info(f"   └─ {total_truly_new_records} truly new records, {total_category_updates} category updates")
+        if replay and total_duration > 0:
+            logger.info(f"   └─ Replay: {rows_ingested} rows ingested ({rows_ingested / total_duration:,.0f} rows/s)")
+        if key_index is not None:
+            logger.info(f"   └─ Key index: {key_index.stats['memory_hits']} in-memory hits, "
+                        f"{key_index.stats['db_fallbacks']} DB fallbacks of {key_index.stats['bloom_checks']} Bloom checks")
         logger.info(f"🧠 Memory: {final_memory} MB (Δ{memory_change:+.1f} MB)")
         
         # Log cleanup failures summary
@@ -1477,6 +1762,23 @@ def scrape_and_update_records():
         # CRITICAL: Mark scraping as finished
         _scraping_finished = True
         
+        # Stop any units still queued on the fetch workers
+        if fetch_stage:
+            fetch_stage.cancel()
+        if unit_scheduler:
+            unit_scheduler.shutdown()
+        if parse_stage:
+            parse_stage.shutdown()
+        
+        # Hand unfinished leases back so another worker (or the next run) retries them
+        if work_queue is not None:
+            work_queue.release()
+        
+        # Persist fingerprints of the pages whose records were committed
+        fingerprint_store.save()
+        if unit_schedule is not None:
+            unit_schedule.save()
+        
         # Cleanup to prevent memory leaks
         try:
             # Flush any remaining bulk operations
@@ -1532,6 +1834,9 @@ def scrape_and_update_records():
             except:
                 pass
         
+        # Release pooled HTTP connections between scrapes
+        close_http_session()
+        
         # Comprehensive cleanup after scraping session completes
         success, memory_freed = post_scrape_cleanup()
         
@@ -1546,7 +1851,7 @@ def scrape_and_update_records():
             logger.warning(f"Memory still high ({memory_after_final}MB) - performing additional aggressive cleanup")
             for cleanup_round in range(2):
                 cleanup_zombie_processes()
-                clear_beautifulsoup_cache()
+                gc.collect()
                 time.sleep(1)
             
             final_memory = get_memory_usage()
@@ -1573,7 +1878,7 @@ def scrape_and_update_records():
         except Exception as cache_error:
             logger.error(f"❌ Error updating top baits cache: {cache_error}")
     
-    return {
+    result = {
         'success': scrape_successful,
         'categories_scraped': len(CATEGORIES),
         'regions_scraped': regions_scraped,
@@ -1584,12 +1889,31 @@ def scrape_and_update_records():
         'errors_occurred': errors_occurred,
         'interrupted': should_stop_scraping,
         'category_failures': category_failures,
-        'failed_cleanups': failed_cleanups if 'failed_cleanups' in locals() else 0
+        'failed_cleanups': failed_cleanups if 'failed_cleanups' in locals() else 0,
+        'regions_via_http': regions_via_http,
+        'regions_via_selenium': regions_via_selenium,
+        'units_timed_out': unit_scheduler.stats['units_timed_out'] if unit_scheduler else 0,
+        'pages_unchanged': pages_unchanged,
+        'rows_short_circuited': rows_short_circuited,
+        'key_index_db_fallbacks': key_index.stats['db_fallbacks'] if key_index else 0,
+        'replay': replay,
+        'rows_ingested': rows_ingested,
+        'units_not_due': units_not_due,
+        'page_bytes_transferred': page_load_totals['bytes_transferred'] if 'page_load_totals' in locals() else 0,
+        'page_requests_blocked': page_load_totals['requests_blocked'] if 'page_load_totals' in locals() else 0,
+        'pipeline': pipeline_stats if 'pipeline_stats' in locals() else {},
+        'ledger_run_id': ledger.run_id,
+        'deadline_reached': deadline_reached,
+        'units_resumed': checkpoint.resumed_units if checkpoint else 0,
+        'units_claimed': work_queue.units_claimed if work_queue else 0
     }
+    ledger.finish(result)
+    return result
 
 def scrape_limited_regions():
     print("Starting Selenium-based scrape for selected regions...")
     db = SessionLocal()
+    bulk_inserter = BulkRecordInserter(db, batch_size=25)
     total_new_records = 0
     total_truly_new_records = 0
     total_category_updates = 0
@@ -1626,24 +1950,11 @@ def scrape_limited_regions():
                     region_truly_new_records = 0
                     region_category_updates = 0
             
+                    page_scraped_at = datetime.now(timezone.utc)
                     for rec in records:
                         try:
-                            # Split bait into bait1 and bait2
-                            bait_text = rec.get('bait', '')
-                            bait1, bait2 = split_bait_string(bait_text)
-                            
-                            data = {
-                                'player': rec.get('player', ''),
-                                'fish': rec.get('fish', ''),
-                                'weight': rec.get('weight'),  # Weight is already validated
-                                'waterbody': rec.get('waterbody', ''),
-                                'bait': bait_text,  # Keep original for backward compatibility
-                                'bait1': bait1,
-                                'bait2': bait2,
-                                'date': rec.get('date', ''),
-                                'region': rec.get('region', region['name']),
-                                'category': category_key
-                            }
+                            # Split bait, stamp and categorize the parsed row in place
+                            data = normalize_record(rec, category_code(category_key), region['name'], page_scraped_at)
                             
                             # Track unique fish
                             if data['fish']:
@@ -1654,19 +1965,10 @@ def scrape_limited_regions():
                             if data['fish'] and data['player'] and data['weight']:  # Weight is already validated
                                 # Check if record exists or needs category update
                                 exists, updated_id = record_exists_or_update(db, data)
+                                if not exists or updated_id:
+                                    # Upsert inserts new records and unions the category into existing ones
+                                    bulk_inserter.add_record(data)
                                 if not exists:
-                                    # Create new record with compact category format
-                                    category_map = {
-                                        'Normal': 'N',
-                                        'Light': 'L', 
-                                        'Ultralight': 'U',
-                                        'BottomLight': 'B',
-                                        'Bottom Light': 'B',
-                                        'Telescopic': 'T'
-                                    }
-                                    # Set the category field with compact format
-                                    data['category'] = category_map.get(data['category'], data['category'])
-                                    db.add(Record(**data))
                                     region_new_records += 1
                                     region_truly_new_records += 1
                                     total_new_records += 1
@@ -1695,6 +1997,7 @@ def scrape_limited_regions():
                     print(f"Error scraping {category_info['name']} - {region['name']}: {e}")
                     continue
                     
+            bulk_inserter.flush()
             db.commit()
             
             # Get final database count
@@ -1,22 +1,27 @@
 #!/usr/bin/env python3
 """
 Startup script for RF4 Records API Server
-This script starts the FastAPI server with the scheduled scraping service
+This script starts the FastAPI server with the scheduled scraping service.
+
+Keep this module thin: processes started with spawn (scrape worker, browser
+supervisor, parse and replay pools) re-run it as __mp_main__, so the app is
+loaded by uvicorn from "main:app" rather than imported here.
 """
 
-import uvicorn
 import os
-from main import app
 
 if __name__ == "__main__":
+    import uvicorn
+
     # Get port from environment (Railway sets PORT)
     port = int(os.getenv("PORT", 8000))
-    
+    host = os.getenv("HOST", "0.0.0.0")
+
     # Run the FastAPI app with uvicorn
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
+        host=host,
         port=port,
         reload=False,  # Disable reload in production
         log_level="info"
-    ) 
\ No newline at end of file
+    )
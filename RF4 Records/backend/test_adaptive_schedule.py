@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the change-rate-driven unit schedule.
+"""
+
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from adaptive_schedule import UnitSchedule
+
+WEEK = datetime(2025, 6, 8, 18, 0, tzinfo=timezone.utc)
+UNITS = [('normal', {'code': 'DE'}), ('normal', {'code': 'RU'})]
+
+
+def make_schedule(tmp):
+    schedule = UnitSchedule(Path(tmp) / "schedule.json", min_interval=180, max_interval=3600)
+    schedule.start_week(WEEK)
+    return schedule
+
+
+def scrape(schedule, changes_by_region, now):
+    for key, region in schedule.due_units(UNITS, now):
+        schedule.record(key, region['code'], changes_by_region[region['code']], now)
+    schedule.commit_staged()
+
+
+def test_busy_units_stay_fast_and_stagnant_back_off():
+    with tempfile.TemporaryDirectory() as tmp:
+        schedule = make_schedule(tmp)
+        now = 1_000_000.0
+        for _ in range(40):
+            scrape(schedule, {'DE': 5, 'RU': 0}, now)
+            now += 180
+
+        assert schedule.is_due('normal', 'DE', now)
+        assert schedule._state['units']['normal/DE']['interval'] == 180
+        assert schedule._state['units']['normal/RU']['interval'] == 3600
+
+
+def test_quiet_unit_speeds_up_when_it_changes_again():
+    with tempfile.TemporaryDirectory() as tmp:
+        schedule = make_schedule(tmp)
+        now = 1_000_000.0
+        schedule.record('normal', 'RU', 0, now)
+        schedule.record('normal', 'RU', 0, now + 180)
+        schedule.commit_staged()
+        assert schedule._state['units']['normal/RU']['interval'] == 3600
+
+        interval = schedule.record('normal', 'RU', 12, now + 3780)
+        assert interval < 3600
+
+
+def test_staging_persistence_and_weekly_reset():
+    with tempfile.TemporaryDirectory() as tmp:
+        schedule = make_schedule(tmp)
+        schedule.record('normal', 'DE', 0, 1_000_000.0)
+        schedule.discard_staged()
+        assert schedule.is_due('normal', 'DE', 1_000_001.0)
+
+        schedule.record('normal', 'DE', 0, 1_000_000.0)
+        schedule.commit_staged()
+        schedule.save()
+        reloaded = make_schedule(tmp)
+        assert not reloaded.is_due('normal', 'DE', 1_000_001.0)
+        assert reloaded.seconds_until_next_due(UNITS, 1_000_001.0) == 0  # RU never scraped
+
+        reloaded.start_week(datetime(2025, 6, 15, 18, 0, tzinfo=timezone.utc))
+        assert reloaded.is_due('normal', 'DE', 1_000_001.0)
+
+
+if __name__ == "__main__":
+    test_busy_units_stay_fast_and_stagnant_back_off()
+    test_quiet_unit_speeds_up_when_it_changes_again()
+    test_staging_persistence_and_weekly_reset()
+    print("✅ Adaptive schedule tests passed")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the browser supervisor process, using a fake driver so no Chrome is needed.
+"""
+
+import os
+import signal
+import time
+
+import pytest
+
+from browser_supervisor import BrowserSupervisor
+
+
+class FakeDriver:
+    def __init__(self):
+        self.rss = 100.0
+        self.current_url = "about:blank"
+
+    def quit(self):
+        # Spawned children inherit the environment, so the test can see the quit
+        log = os.environ.get("FAKE_DRIVER_QUIT_LOG")
+        if log:
+            with open(log, "a") as f:
+                f.write(f"{os.getpid()}\n")
+
+
+def fake_driver():
+    return FakeDriver()
+
+
+def fake_page(driver, region_info):
+    import scraper  # noqa: F401 - like load_region_page, which parses with scraper's helpers
+    if region_info['code'] == 'FAIL':
+        raise RuntimeError("page load failed")
+    if region_info['code'] == 'HANG':
+        time.sleep(30)
+    driver.rss += region_info.get('grow', 0)
+    return [{'region': region_info['name'], 'pid': os.getpid()}]
+
+
+def fake_rss(driver):
+    return driver.rss
+
+
+def make_supervisor(**kwargs):
+    return BrowserSupervisor(driver_factory=fake_driver, page_loader=fake_page, rss_fn=fake_rss, **kwargs)
+
+
+def region(code, **extra):
+    return dict({'code': code, 'name': code, 'url': f"https://example.invalid/{code}/"}, **extra)
+
+
+def test_recycles_after_page_limit():
+    supervisor = make_supervisor(max_pages=3, max_rss_mb=1000)
+    try:
+        for _ in range(7):
+            assert supervisor.fetch(region('DE'))[0]['region'] == 'DE'
+        # First driver plus a warm replacement after pages 3 and 6
+        assert supervisor.stats['pages'] == 7
+        assert supervisor.stats['recycles'] == 2
+        assert supervisor.stats['drivers_started'] == 3
+        assert supervisor.wants_prewarm()
+    finally:
+        supervisor.shutdown()
+
+
+def test_recycles_over_rss_cap():
+    supervisor = make_supervisor(max_pages=100, max_rss_mb=150)
+    try:
+        supervisor.fetch(region('DE', grow=60))
+        assert supervisor.stats['browser_rss_mb'] == 160
+        supervisor.fetch(region('DE'))
+        assert supervisor.stats['browser_rss_mb'] == 100  # Fresh browser
+        assert supervisor.stats['recycles'] == 1
+    finally:
+        supervisor.shutdown()
+
+
+def test_errors_and_hangs_do_not_poison_later_requests():
+    supervisor = make_supervisor(max_pages=100, max_rss_mb=1000, request_timeout=2)
+    try:
+        first_pid = supervisor.fetch(region('DE'))[0]['pid']
+        try:
+            supervisor.fetch(region('FAIL'))
+            assert False, "page error should propagate"
+        except RuntimeError as e:
+            assert "page load failed" in str(e)
+        assert supervisor.fetch(region('DE'))[0]['pid'] == first_pid
+
+        try:
+            supervisor.fetch(region('HANG'))
+            assert False, "hung request should time out"
+        except TimeoutError:
+            pass
+        assert supervisor.fetch(region('DE'))[0]['pid'] != first_pid
+        assert supervisor.stats['supervisor_restarts'] == 1
+    finally:
+        supervisor.shutdown()
+
+
+def test_sigterm_stops_the_supervisor(tmp_path, monkeypatch):
+    """The scraper import in the child must not replace the handler that quits the browser"""
+    monkeypatch.setenv("FAKE_DRIVER_QUIT_LOG", str(tmp_path / "quit.log"))
+    supervisor = make_supervisor(max_pages=100, max_rss_mb=1000)
+    try:
+        pid = supervisor.fetch(region('DE'))[0]['pid']
+        os.kill(pid, signal.SIGTERM)
+        supervisor._process.join(timeout=10)
+        assert not supervisor._process.is_alive()
+        assert supervisor._process.exitcode == 0
+        assert (tmp_path / "quit.log").read_text().split() == [str(pid)]
+    finally:
+        supervisor.shutdown()
+
+
+def test_parent_exit_quits_the_browser(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_DRIVER_QUIT_LOG", str(tmp_path / "quit.log"))
+    supervisor = make_supervisor(max_pages=100, max_rss_mb=1000)
+    try:
+        pid = supervisor.fetch(region('DE'))[0]['pid']
+        supervisor._conn.close()  # What the child sees when the parent dies
+        supervisor._process.join(timeout=10)
+        assert not supervisor._process.is_alive()
+        assert (tmp_path / "quit.log").read_text().split() == [str(pid)]
+    finally:
+        supervisor._conn = None
+        supervisor.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
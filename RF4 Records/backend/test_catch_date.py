@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the typed catch date: parsing, ingest, backfill and range filters.
+Runs against throwaway SQLite database files (conftest.py fixtures).
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import dimensions
+import migrations
+import optimized_records
+from bulk_operations import BulkRecordInserter
+from database import Record
+from records_parser import parse_catch_date
+
+
+def test_parse_catch_date_formats():
+    assert parse_catch_date('08.06.25') == date(2025, 6, 8)
+    assert parse_catch_date(' 8.6.2025 ') == date(2025, 6, 8)
+    assert parse_catch_date('08/06/25') == date(2025, 6, 8)
+    assert parse_catch_date('2025-06-08') == date(2025, 6, 8)
+    assert parse_catch_date('06/28/25') == date(2025, 6, 28)  # Month-first only when day-first is impossible
+    assert parse_catch_date('31.02.25') is None
+    assert parse_catch_date('') is None and parse_catch_date(None) is None and parse_catch_date('today') is None
+
+
+def test_ingest_and_range_filters(sessions):
+    db = sessions()
+    inserter = BulkRecordInserter(db, batch_size=100)
+    for player, date_text in (('A', '07.06.25'), ('B', '08.06.25'), ('C', '10.06.25'), ('D', '??')):
+        inserter.add_record({
+            'player': player, 'fish': 'Pike', 'weight': 1000, 'waterbody': 'Mosquito Lake', 'bait': 'Worm',
+            'bait1': 'Worm', 'bait2': None, 'date': date_text, 'region': 'Germany', 'category': 'N',
+            'created_at': None,
+        })
+    inserter.flush()
+    assert {r.player: r.catch_date for r in db.query(Record)} == {
+        'A': date(2025, 6, 7), 'B': date(2025, 6, 8), 'C': date(2025, 6, 10), 'D': None,
+    }
+    db.close()
+
+    previous = optimized_records.SessionLocal
+    optimized_records.SessionLocal = sessions
+    optimized_records._fish_names_cache["data"] = None
+    dimensions._ready.clear()
+    try:
+        def players(**filters):
+            result = optimized_records.get_filtered_records_optimized(**filters)
+            return sorted(record['player'] for record in result['records'])
+
+        assert players(caught_from=date(2025, 6, 8)) == ['B', 'C']
+        assert players(caught_from=date(2025, 6, 7), caught_to=date(2025, 6, 8)) == ['A', 'B']
+        assert players(fish='pike', caught_to=date(2025, 6, 6)) == []
+        record = optimized_records.get_filtered_records_optimized(caught_from=date(2025, 6, 9))['records'][0]
+        assert record['catch_date'] == '2025-06-10'
+    finally:
+        optimized_records.SessionLocal = previous
+        optimized_records._fish_names_cache["data"] = None
+
+
+def test_migration_backfills_catch_dates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE records (id INTEGER PRIMARY KEY, player VARCHAR, date VARCHAR)"))
+        conn.execute(text("INSERT INTO records (player, date) VALUES (:p, :d)"), [
+            {'p': 'A', 'd': '08.06.25'}, {'p': 'B', 'd': '09.06.25'}, {'p': 'C', 'd': 'n/a'},
+            {'p': 'D', 'd': '08.06.25'}, {'p': 'E', 'd': None},
+        ])
+
+    previous = migrations.engine
+    migrations.engine = engine
+    try:
+        migrations.add_catch_date_column(background=False)
+        migrations.backfill_catch_dates(batch_size=2, pause_seconds=0)  # Nothing left - a no-op
+    finally:
+        migrations.engine = previous
+
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT player, catch_date FROM records")).fetchall())
+    assert rows == {'A': '2025-06-08', 'B': '2025-06-09', 'C': None, 'D': '2025-06-08', 'E': None}
+    assert 'ix_records_catch_date' in {index['name'] for index in inspect(engine).get_indexes('records')}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
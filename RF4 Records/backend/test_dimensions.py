@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for the dimension tables, their id cache and the id-based filters.
+Runs against throwaway SQLite database files (conftest.py fixtures).
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import bulk_operations
+import dimensions
+import migrations
+import optimized_records
+from bulk_operations import BulkRecordInserter
+from database import DimBait, Record
+from dimensions import DimensionCache, backfill_missing_ids, dimensions_ready, get_dimension_cache
+
+ROWS = [
+    ('A', 'Pike', 'Mosquito Lake', 'Bread', 'Worm', 'Germany'),
+    ('B', 'Pike', 'Old Burg Lake', 'Spoon', None, 'Germany'),
+    ('C', 'Common Roach', 'Mosquito Lake', 'Worm', None, 'Poland'),
+]
+
+
+def write_rows(db):
+    inserter = BulkRecordInserter(db, batch_size=100)
+    for player, fish, waterbody, bait1, bait2, region in ROWS:
+        inserter.add_record({
+            'player': player, 'fish': fish, 'weight': 1000, 'waterbody': waterbody,
+            'bait': f"{bait1}; {bait2}" if bait2 else bait1, 'bait1': bait1, 'bait2': bait2,
+            'date': '08.06.25', 'region': region, 'category': 'N',
+            'created_at': None,  # Raw SQL hands SQLite datetimes back as strings
+        })
+    inserter.flush()
+
+
+def test_writer_assigns_dimension_ids(session):
+    write_rows(session)
+
+    records = {r.player: r for r in session.query(Record)}
+    assert records['A'].fish_id == records['B'].fish_id != records['C'].fish_id
+    # bait1 and bait2 share one bait dimension
+    assert records['A'].bait2_id == records['C'].bait1_id
+    assert session.query(DimBait).count() == 3
+
+    # Another process starts with an empty cache and sees the same ids
+    cache = DimensionCache(session.get_bind())
+    assert cache.ids_for('fish', ['Pike']) == {'Pike': records['A'].fish_id}
+    assert cache.names_for('region', [records['C'].region_id]) == {records['C'].region_id: 'Poland'}
+    assert get_dimension_cache(session).match_ids(session, 'waterbody', 'mosquito') == [records['A'].waterbody_id]
+
+
+def test_filters_match_on_ids(sessions):
+    db = sessions()
+    write_rows(db)
+    db.close()
+
+    previous = optimized_records.SessionLocal
+    optimized_records.SessionLocal = sessions
+    optimized_records._fish_names_cache["data"] = None
+    dimensions._ready.clear()
+    try:
+        def players(**filters):
+            result = optimized_records.get_filtered_records_optimized(**filters)
+            return sorted(record['player'] for record in result['records'])
+
+        assert players(fish='pike') == ['A', 'B']
+        assert players(fish='roach', waterbody='mosquito') == ['C']
+        assert players(bait=['worm']) == ['A', 'C']
+        assert players(fish='Catfish') == []
+        assert players(category=['normal']) == ['A', 'B', 'C'] and players(category=['L', 'T']) == []
+        record = optimized_records.get_filtered_records_optimized(fish='pike', waterbody='burg')['records'][0]
+        assert (record['player'], record['waterbody'], record['region']) == ('B', 'Old Burg Lake', 'Germany')
+        assert dimensions._ready[str(sessions().get_bind().url)][0] is True
+        leaders = optimized_records.get_leaderboard_optimized(fish='Pike', waterbody='Old Burg Lake')
+        assert [record['player'] for record in leaders] == ['B']
+    finally:
+        optimized_records.SessionLocal = previous
+        optimized_records._fish_names_cache["data"] = None
+
+
+def test_rows_written_without_ids_stay_visible(sessions):
+    db = sessions()
+    write_rows(db)
+    assert dimensions_ready(db) is True
+
+    def unavailable(db, rows):
+        raise ConnectionError("dimension tables locked")
+    bulk_operations.with_dimension_ids = unavailable
+    try:
+        inserter = BulkRecordInserter(db, batch_size=100)
+        inserter.add_record({
+            'player': 'D', 'fish': 'Zander', 'weight': 900, 'waterbody': 'Old Burg Lake', 'bait': 'Spoon',
+            'bait1': 'Spoon', 'bait2': None, 'date': '08.06.25', 'region': 'Germany', 'category': 'N',
+            'created_at': None,
+        })
+        inserter.flush()
+    finally:
+        bulk_operations.with_dimension_ids = dimensions.with_dimension_ids
+    assert db.query(Record).filter(Record.player == 'D').one().fish_id is None
+    db.close()
+
+    previous = optimized_records.SessionLocal
+    optimized_records.SessionLocal = sessions
+    optimized_records._fish_names_cache["data"] = None
+    try:
+        def players(**filters):
+            result = optimized_records.get_filtered_records_optimized(**filters)
+            return sorted(record['player'] for record in result['records'])
+
+        # This process stops filtering on ids at once; the string filters still find the row
+        # (exact fish names - SQLite has no ILIKE for the partial-match fallback)
+        assert players(fish='zander') == ['D']
+        # Another process's positive answer expires and sees the pending row too
+        key = str(sessions().get_bind().url)
+        dimensions._ready[key] = (True, 0.0)
+        assert players(fish='pike') == ['A', 'B'] and dimensions._ready[key][0] is False
+        assert players(fish='zander') == ['D']
+
+        engine = sessions().get_bind()
+        assert backfill_missing_ids(engine, batch_size=1) == 1
+        assert backfill_missing_ids(engine) == 0
+        assert players(fish='zander') == ['D'] and dimensions._ready[key][0] is True
+    finally:
+        optimized_records.SessionLocal = previous
+        optimized_records._fish_names_cache["data"] = None
+
+
+def test_migration_backfills_existing_records(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE records (id INTEGER PRIMARY KEY, player VARCHAR, fish VARCHAR, weight INTEGER, "
+            "waterbody VARCHAR, bait VARCHAR, bait1 VARCHAR, bait2 VARCHAR, date VARCHAR, created_at DATETIME, "
+            "region VARCHAR, category VARCHAR, trophy_class VARCHAR, record_key VARCHAR(32))"
+        ))
+        conn.execute(text("CREATE INDEX ix_records_fish ON records (fish)"))
+        conn.execute(text("CREATE INDEX idx_waterbody_fish ON records (waterbody, fish)"))
+        conn.execute(text(
+            "INSERT INTO records (player, fish, waterbody, bait1, bait2, region) VALUES (:p, :f, :w, :b1, :b2, :r)"
+        ), [{'p': p, 'f': f, 'w': w, 'b1': b1, 'b2': b2, 'r': r} for p, f, w, b1, b2, r in ROWS])
+
+    previous = migrations.engine
+    migrations.engine = engine
+    try:
+        migrations.add_dimension_columns(batch_size=2)
+    finally:
+        migrations.engine = previous
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT r.player, f.name, b.name FROM records r JOIN dim_fish f ON f.id = r.fish_id "
+            "LEFT JOIN dim_bait b ON b.id = r.bait2_id ORDER BY r.player"
+        )).fetchall()
+    assert [tuple(row) for row in rows] == [('A', 'Pike', 'Worm'), ('B', 'Pike', None), ('C', 'Common Roach', None)]
+    indexes = {index['name'] for index in inspect(engine).get_indexes('records')}
+    assert 'idx_fish_id_weight' in indexes and 'ix_records_fish' not in indexes
+    assert 'idx_waterbody_id_fish_id' in indexes and 'idx_waterbody_fish' not in indexes
+    assert 'ix_records_dimension_ids_pending' in indexes and 'ix_records_player_id' not in indexes
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
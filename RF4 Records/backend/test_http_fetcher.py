@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP fetch tier.
+Serves saved records pages from a local fixture server and checks that the
+HTTP path feeds parse_all_records_from_soup() or signals the Selenium fallback.
+"""
+
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+import http_fetcher
+from scraper import fetch_records_http
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class QuietFixtureHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    handler = partial(QuietFixtureHandler, directory=str(FIXTURES_DIR))
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def region_for(server, page):
+    host, port = server.server_address
+    return {'code': 'EN', 'name': 'Other Countries', 'url': f"http://{host}:{port}/{page}"}
+
+
+def test_http_tier_parses_served_tables():
+    """Pages that contain the records tables are parsed without a browser"""
+    server = start_fixture_server()
+    try:
+        records = fetch_records_http(region_for(server, "records_weekly_sample.html"))
+    finally:
+        server.shutdown()
+        http_fetcher.close_http_session()
+
+    assert records is not None
+    assert len(records) == 7
+    assert records[0] == {
+        'fish': 'Common Carp',
+        'weight': 9747,
+        'waterbody': 'Old Burg Lake',
+        'bait': 'Boilie; Corn',
+        'player': 'CarpHunter',
+        'date': '08.06.25',
+        'region': 'Other Countries',
+    }
+    assert {r['fish'] for r in records} == {'Common Carp', 'Roach', 'Beluga', 'Sterlet'}
+
+
+def test_http_tier_signals_fallback():
+    """JS-only shells and missing pages return None so Selenium takes over"""
+    server = start_fixture_server()
+    try:
+        assert fetch_records_http(region_for(server, "records_weekly_empty.html")) is None
+        assert fetch_records_http(region_for(server, "missing.html")) is None
+    finally:
+        server.shutdown()
+        http_fetcher.close_http_session()
+
+
+if __name__ == "__main__":
+    test_http_tier_parses_served_tables()
+    test_http_tier_signals_fallback()
+    print("✅ HTTP fetch tier tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the managed records index suite.
+Index DDL runs on PostgreSQL only; these cover the recent-weeks index
+rotation, the redundant-index rules and the SQLite fallbacks.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import inspect
+
+from index_suite import (
+    UNUSED_INDEX_DAYS,
+    apply_index_suite,
+    create_records_index,
+    declared_indexes,
+    recent_index,
+    redundant_indexes,
+)
+
+
+def index(name, definition, unique=False, single_column=True, scans=0):
+    return {'name': name, 'definition': definition, 'unique': unique, 'single_column': single_column, 'scans': scans}
+
+
+def test_recent_index_moves_with_the_reset_week():
+    # 2025-06-08 18:00 UTC starts a reset week; the index covers it and the three before
+    name, definition = recent_index(datetime(2025, 6, 10, tzinfo=timezone.utc))
+    assert name == "ix_records_recent_w20250518"
+    assert definition.endswith("WHERE created_at >= '2025-05-18 18:00:00'")
+    assert recent_index(datetime(2025, 6, 15, 18, 0, tzinfo=timezone.utc))[0] == "ix_records_recent_w20250525"
+
+
+def test_redundant_indexes():
+    declared = declared_indexes()
+    assert {'idx_created_desc', 'ix_records_weight', 'uq_records_record_key', 'ix_records_created_at_brin'} <= declared
+    assert 'ix_records_date' not in declared and 'ix_records_bait1' not in declared
+    assert 'ix_records_player' not in declared and 'idx_fish_weight' not in declared
+
+    indexes = [
+        index('idx_created_desc', "CREATE INDEX idx_created_desc ON public.records USING btree (created_at)"),
+        index('ix_records_created_at', "CREATE INDEX ix_records_created_at ON public.records USING btree (created_at)", scans=50),
+        index('idx_records_weight', "CREATE INDEX idx_records_weight ON public.records USING btree (weight)", scans=9),
+        index('ix_records_weight', "CREATE INDEX ix_records_weight ON public.records USING btree (weight)", scans=3),
+        index('ix_records_date', "CREATE INDEX ix_records_date ON public.records USING btree (date)"),
+        index('ix_records_bait1', "CREATE INDEX ix_records_bait1 ON public.records USING btree (bait1)", scans=4),
+        index('ix_records_trophy_class', "CREATE INDEX ix_records_trophy_class ON public.records USING btree (trophy_class)"),
+        index('uq_records_record_key', "CREATE UNIQUE INDEX uq_records_record_key ON public.records USING btree (record_key)", unique=True),
+    ]
+    # Duplicates go straight away - the declared copy stays even if the other one is scanned more
+    assert dict(redundant_indexes(indexes, declared, stats_days=1)) == {
+        'ix_records_created_at': "duplicate of idx_created_desc",
+        'idx_records_weight': "duplicate of ix_records_weight",
+    }
+    # Never-scanned single-column indexes the model dropped go once the statistics are old enough
+    dropped = dict(redundant_indexes(indexes, declared, stats_days=UNUSED_INDEX_DAYS))
+    assert 'ix_records_date' in dropped and 'ix_records_bait1' not in dropped and 'ix_records_trophy_class' not in dropped
+
+
+def test_sqlite_fallbacks(sqlite_engine):
+    assert apply_index_suite(sqlite_engine) == {'postgresql': False}
+    create_records_index(sqlite_engine, 'ix_records_test', '(weight, fish)')
+    assert 'ix_records_test' in {index['name'] for index in inspect(sqlite_engine).get_indexes('records')}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for merge_duplicate_records.py: the survivor of a duplicate group
+carries the union of the group's category masks.
+Runs against a throwaway SQLite database file (conftest.py fixtures).
+"""
+
+import pytest
+
+import merge_duplicate_records
+from database import Record
+from record_keys import CATEGORY_BITS, category_list, record_key_hash
+
+PIKE = {
+    'player': 'A', 'fish': 'Pike', 'weight': 1500, 'waterbody': 'Mosquito Lake', 'bait': 'Worm',
+    'bait1': 'Worm', 'bait2': None, 'date': '08.06.25', 'region': 'Germany',
+}
+
+
+def test_merge_unions_category_masks(sqlite_engine, sessions):
+    database_url = str(sqlite_engine.url)
+
+    db = sessions()
+    db.add_all([
+        # The key holder has Normal, its duplicate Light and Ultralight
+        Record(**PIKE, category='N', category_mask=CATEGORY_BITS['N'], record_key=record_key_hash(PIKE)),
+        Record(**PIKE, category='L;U', category_mask=CATEGORY_BITS['L'] | CATEGORY_BITS['U']),
+        # Legacy duplicate without a mask yet
+        Record(**PIKE, category='telescopic', category_mask=None),
+        # Unique legacy rows for the single-record pass
+        Record(**dict(PIKE, player='B'), category='light', category_mask=None),
+        Record(**dict(PIKE, player='C'), category=None, category_mask=None),
+    ])
+    db.commit()
+    db.close()
+
+    previous = (merge_duplicate_records.SessionLocal, merge_duplicate_records.get_database_url)
+    merge_duplicate_records.SessionLocal = sessions
+    merge_duplicate_records.get_database_url = lambda: database_url
+    try:
+        assert merge_duplicate_records.merge_duplicate_records() is True
+    finally:
+        merge_duplicate_records.SessionLocal, merge_duplicate_records.get_database_url = previous
+
+    db = sessions()
+    records = {r.player: r for r in db.query(Record)}
+    assert len(db.query(Record).all()) == 3
+    survivor = records['A']
+    assert survivor.record_key == record_key_hash(PIKE)
+    assert survivor.category_mask == CATEGORY_BITS['N'] | CATEGORY_BITS['L'] | CATEGORY_BITS['U'] | CATEGORY_BITS['T']
+    assert survivor.category == 'L;N;T;U'
+    assert list(category_list(survivor.category_mask, survivor.category)) == ['L', 'N', 'T', 'U']
+    assert (records['B'].category, records['B'].category_mask) == ('L', CATEGORY_BITS['L'])
+    assert (records['C'].category, records['C'].category_mask) == ('N', CATEGORY_BITS['N'])
+    db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
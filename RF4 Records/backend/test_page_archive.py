@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the raw page archive and its replay loader.
+"""
+
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from page_archive import archive_page, archived_pages, benchmark, load_archived_unit
+from records_parser import parse_records_html
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+REGION = {'code': 'DE', 'name': 'Germany', 'url': 'https://rf4game.com/records/weekly/region/DE/'}
+
+
+def test_archive_roundtrip_and_filters():
+    html_content = (FIXTURES_DIR / "records_weekly_sample.html").read_text(encoding="utf-8")
+    first = datetime(2025, 6, 8, 10, 0, tzinfo=timezone.utc)
+    second = datetime(2025, 6, 9, 10, 0, tzinfo=timezone.utc)
+    rows = [["Pike", "9.747 kg", "Mosquito Lake", "Spoon", "Angler", "09.06.25"]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_page('normal', 'DE', html_content, fetched_at=first, archive_dir=tmp)
+        archive_page('normal', 'DE', rows, kind="rows", fetched_at=second, archive_dir=tmp)
+        archive_page('light', 'DE', html_content, fetched_at=second, archive_dir=tmp)
+
+        pages = list(archived_pages(tmp))
+        assert [(p.category_key, p.kind, p.fetched_at) for p in pages] == [
+            ('normal', 'html', first), ('light', 'html', second), ('normal', 'rows', second),
+        ]
+        assert len(list(archived_pages(tmp, since=second.date()))) == 2
+        assert len(list(archived_pages(tmp, category_key='light'))) == 1
+
+        # Snapshots of a unit are merged, de-duplicated and stamped with their capture time
+        records = load_archived_unit(tmp, None, None, 'normal', REGION)
+        expected = parse_records_html(html_content, REGION)
+        assert records[:len(expected)] == [dict(r, scraped_at=first) for r in expected]
+        assert records[-1]['player'] == 'Angler' and records[-1]['scraped_at'] == second
+
+        # Re-archiving the same page adds nothing new on replay
+        archive_page('normal', 'DE', html_content, fetched_at=datetime(2025, 6, 9, 11, 0, tzinfo=timezone.utc), archive_dir=tmp)
+        assert len(load_archived_unit(tmp, None, None, 'normal', REGION)) == len(records)
+
+        result = benchmark(tmp, workers=2)
+        assert result['pages'] == 4
+        assert result['records'] == 3 * len(expected) + 1
+
+
+def test_missing_archive():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert load_archived_unit(Path(tmp) / "nothing", None, None, 'normal', REGION) == []
+
+
+if __name__ == "__main__":
+    test_archive_roundtrip_and_filters()
+    test_missing_archive()
+    print("✅ Page archive tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the page fingerprints that let unchanged pages skip their DB work.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import page_fingerprints
+from page_fingerprints import PageFingerprintStore, compute_page_fingerprint
+
+ROWS = [
+    {'player': 'A', 'fish': 'Pike', 'weight': 1500, 'date': '08.06.25'},
+    {'player': 'B', 'fish': 'Perch', 'weight': 300, 'date': '09.06.25'},
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(page_fingerprints, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_fingerprint_is_stable_and_order_sensitive():
+    fingerprint = compute_page_fingerprint(ROWS)
+    # Equal rows hash the same whatever their key order
+    assert compute_page_fingerprint([dict(reversed(list(row.items()))) for row in ROWS]) == fingerprint
+    assert compute_page_fingerprint(list(reversed(ROWS))) != fingerprint
+    assert compute_page_fingerprint(ROWS[:1]) != fingerprint
+    assert compute_page_fingerprint([dict(ROWS[0], weight=1501), ROWS[1]]) != fingerprint
+
+
+def test_unchanged_only_for_the_committed_hash(tmp_path, clock):
+    store = PageFingerprintStore(tmp_path / "fingerprints.json", max_age_seconds=3600)
+    fingerprint = compute_page_fingerprint(ROWS)
+    store.stage('normal', 'DE', fingerprint)
+    assert not store.is_unchanged('normal', 'DE', fingerprint)  # Staged only
+    store.commit_staged()
+
+    assert store.is_unchanged('normal', 'DE', fingerprint)
+    assert not store.is_unchanged('normal', 'DE', compute_page_fingerprint(ROWS[:1]))
+    assert not store.is_unchanged('normal', 'RU', fingerprint)
+    assert not store.is_unchanged('light', 'DE', fingerprint)
+
+    # Old enough fingerprints send the page through the DB again
+    clock[0] += 3599
+    assert store.is_unchanged('normal', 'DE', fingerprint)
+    clock[0] += 1
+    assert not store.is_unchanged('normal', 'DE', fingerprint)
+
+
+def test_discarded_fingerprints_are_not_committed(tmp_path, clock):
+    store = PageFingerprintStore(tmp_path / "fingerprints.json")
+    fingerprint = compute_page_fingerprint(ROWS)
+    store.stage('normal', 'DE', fingerprint)
+    store.discard_staged()  # Its flush failed
+    store.commit_staged()
+    assert not store.is_unchanged('normal', 'DE', fingerprint)
+
+
+def test_save_and_load_roundtrip(tmp_path, clock):
+    path = tmp_path / "cache" / "fingerprints.json"
+    store = PageFingerprintStore(path)
+    fingerprint = compute_page_fingerprint(ROWS)
+    store.stage('normal', 'DE', fingerprint)
+    store.commit_staged()
+    store.stage('light', 'DE', fingerprint)  # Staged entries are not persisted
+    store.save()
+
+    loaded = PageFingerprintStore(path)
+    assert loaded.is_unchanged('normal', 'DE', fingerprint)
+    assert not loaded.is_unchanged('light', 'DE', fingerprint)
+
+    # A corrupt file starts fresh instead of failing the scrape
+    path.write_text("{not json")
+    store.load()
+    assert not store.is_unchanged('normal', 'DE', fingerprint)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script for page readiness waits and their adaptive per-page timeouts.
+"""
+
+import tempfile
+from pathlib import Path
+
+from page_readiness import DEFAULT_TIMEOUT_SECONDS, MAX_TIMEOUT_SECONDS, MIN_TIMEOUT_SECONDS, ReadyTimes, wait_for_tables
+
+REGION = {'code': 'DE', 'name': 'Germany', 'url': 'https://rf4game.com/records/weekly/region/DE/'}
+
+
+class FakeDriver:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.script_timeout = None
+        self.timeout_ms = None
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_async_script(self, script, selectors, quiet_ms, timeout_ms):
+        assert "MutationObserver" in script and selectors[0] == "div.records_subtable.flex_table"
+        self.timeout_ms = timeout_ms
+        if self.error:
+            raise self.error
+        return dict(self.result)
+
+
+def test_timeouts_adapt_to_history():
+    with tempfile.TemporaryDirectory() as tmp:
+        times = ReadyTimes(Path(tmp) / "ready.json")
+        assert times.timeout_for('page') == DEFAULT_TIMEOUT_SECONDS
+
+        for _ in range(10):
+            times.observe('page', 0.4, ready=True)
+        assert times.timeout_for('page') == MIN_TIMEOUT_SECONDS  # Fast page, short leash
+
+        times.observe('slow', 6.0, ready=True)
+        assert times.timeout_for('slow') == 6.0 * 3 + 2
+
+        times.observe('page', times.timeout_for('page'), ready=False)
+        assert times.timeout_for('page') > MIN_TIMEOUT_SECONDS  # Timing out widens the next wait
+
+        times.observe('hung', 120.0, ready=False)
+        assert times.timeout_for('hung') == MAX_TIMEOUT_SECONDS
+
+        # History survives restarts
+        assert ReadyTimes(Path(tmp) / "ready.json").timeout_for('slow') == times.timeout_for('slow')
+
+
+def test_wait_for_tables():
+    with tempfile.TemporaryDirectory() as tmp:
+        times = ReadyTimes(Path(tmp) / "ready.json")
+
+        driver = FakeDriver({'ready': True, 'quiet': True, 'selector': 'div.records_subtable.flex_table', 'tables': 12})
+        result = wait_for_tables(driver, REGION, times)
+        assert result['ready'] and result['tables'] == 12
+        assert driver.timeout_ms == DEFAULT_TIMEOUT_SECONDS * 1000
+        assert driver.script_timeout > DEFAULT_TIMEOUT_SECONDS
+
+        # Second load of the same page uses the learned (much shorter) timeout
+        wait_for_tables(driver, REGION, times)
+        assert driver.timeout_ms == MIN_TIMEOUT_SECONDS * 1000
+
+        result = wait_for_tables(FakeDriver({'ready': False, 'quiet': False, 'selector': None, 'tables': 0}), REGION, times)
+        assert not result['ready'] and not result.get('error')
+
+        result = wait_for_tables(FakeDriver(error=RuntimeError("no async scripts")), REGION, times)
+        assert result['error'] and result['timeout_s'] >= MIN_TIMEOUT_SECONDS
+
+
+if __name__ == "__main__":
+    test_timeouts_adapt_to_history()
+    test_wait_for_tables()
+    print("✅ Page readiness tests passed")
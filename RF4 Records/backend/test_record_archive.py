@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for the cold-tier records archive: the columnar week files,
+moving old weeks out of the database and filtered queries over both tiers.
+Runs against throwaway SQLite databases (conftest.py fixtures) and archive directories.
+"""
+
+from datetime import date, datetime, timezone
+
+import pytest
+
+import dimensions
+import optimized_records
+import record_archive
+from bulk_operations import BulkRecordInserter
+from database import Record
+from record_archive import ArchivedWeek, archive_old_weeks, archive_summary, open_week, query_archive, write_week
+
+
+def test_week_file_roundtrip(tmp_path):
+    rows = [
+        (1, 'Ann', 'Pike', 1500, 'Mosquito Lake', 'Worm; Maggot', 'Worm', 'Maggot', '08.06.25', 'Germany',
+         'N', datetime(2025, 6, 9, 10, 30, 0, 250), 'trophy', 1, date(2025, 6, 8), 'k1'),
+        (2, 'Бор', 'Щука', None, None, None, None, None, None, None,
+         None, None, None, None, None, None),
+        (3, 'Ann', 'Pike', 2 ** 40, 'Mosquito Lake', 'Worm', 'Worm', None, '09.06.25', 'Germany',
+         'U', datetime(2025, 6, 10), None, 6, date(2025, 6, 9), 'k3'),
+    ]
+    path = write_week(tmp_path / "week.rfa", datetime(2025, 6, 10, tzinfo=timezone.utc), rows)
+    week = ArchivedWeek(path)
+    assert week.rows == 3 and week.week_start == datetime(2025, 6, 8, 18, 0, tzinfo=timezone.utc)
+    assert week.read_rows() == rows
+    assert week.read_rows([2]) == [rows[2]]
+    # String predicates run against the distinct values only
+    assert week.matching('player', lambda value: value == 'Ann', range(3)) == [0, 2]
+    assert week.matching('weight', lambda value: value is None, range(3)) == [1]
+
+    # Decoded columns are reused until the file is rewritten
+    assert open_week(path) is open_week(path)
+    cached = open_week(path)
+    write_week(path, datetime(2025, 6, 10, tzinfo=timezone.utc), rows[:1])
+    assert open_week(path) is not cached and open_week(path).read_rows() == rows[:1]
+
+
+def test_archive_old_weeks_and_filtered_queries(tmp_path, sqlite_engine, sessions):
+    archive_dir = tmp_path / "archive"
+
+    db = sessions()
+    inserter = BulkRecordInserter(db, batch_size=100)
+    for player, fish, bait1, category, created_at in (
+        ('A', 'Pike', 'Worm', 'N', datetime(2025, 5, 20, 12)),   # week of 2025-05-18
+        ('B', 'Perch', 'Spoon', 'U', datetime(2025, 5, 21, 12)),
+        ('C', 'Pike', 'Spoon', 'L', datetime(2025, 5, 28, 12)),  # week of 2025-05-25
+        ('D', 'Pike', 'Worm', 'N', None),  # Not yet stamped - stays in the database
+    ):
+        inserter.add_record({
+            'player': player, 'fish': fish, 'weight': 1000, 'waterbody': 'Mosquito Lake',
+            'bait': bait1, 'bait1': bait1, 'bait2': None, 'date': '08.06.25', 'region': 'Germany',
+            'category': category, 'created_at': created_at,
+        })
+    inserter.flush()
+    db.close()
+
+    result = archive_old_weeks(sqlite_engine, retain_weeks=2, now=datetime(2025, 6, 11, tzinfo=timezone.utc),
+                               archive_dir=archive_dir)
+    assert result == {'archived_weeks': ['records_w20250518', 'records_w20250525'], 'archived_records': 3}
+    db = sessions()
+    assert [r.player for r in db.query(Record)] == ['D']
+    db.close()
+    summary = archive_summary(archive_dir)
+    assert [week['rows'] for week in summary['weeks']] == [2, 1] and summary['total_rows'] == 3
+
+    # Archive-side filters follow the SQL semantics
+    assert [row[1] for row in query_archive(fish_terms=[('pike', True)], archive_dir=archive_dir)] == ['C', 'A']
+    assert [row[1] for row in query_archive(bait_terms=['spo'], archive_dir=archive_dir)] == ['C', 'B']
+    assert query_archive(cutoff=datetime(2025, 5, 25, 18, tzinfo=timezone.utc), archive_dir=archive_dir)[0][1] == 'C'
+
+    previous = (optimized_records.SessionLocal, record_archive.ARCHIVE_DIR)
+    optimized_records.SessionLocal = sessions
+    record_archive.ARCHIVE_DIR = archive_dir
+    optimized_records._fish_names_cache["data"] = None
+    dimensions._ready.clear()
+    try:
+        def players(**filters):
+            return [r['player'] for r in optimized_records.get_filtered_records_optimized(**filters)['records']]
+
+        # Windows reaching back into archived weeks union them in; all-time and recent ones stay on the database
+        old = date(2025, 6, 1)
+        assert players() == ['D'] and players(data_age='1-day') == []
+        assert players(caught_from=old) == ['D', 'C', 'B', 'A']
+        assert players(caught_from=old, fish='Pike') == ['D', 'C', 'A']
+        assert players(caught_to=date(2025, 6, 30), category='L') == ['C']
+        assert players(caught_from=date(2025, 6, 2)) == ['D']
+        records = optimized_records.get_filtered_records_optimized(bait='worm', caught_from=old, limit=1, offset=1)
+        assert [r['player'] for r in records['records']] == ['A'] and records['total_filtered'] == 2
+        assert records['records'][0]['catch_date'] == '2025-06-08'
+
+        # A's record is scraped again after its week was archived: served once, from the database
+        db = sessions()
+        inserter = BulkRecordInserter(db, batch_size=100)
+        inserter.add_record({
+            'player': 'A', 'fish': 'Pike', 'weight': 1000, 'waterbody': 'Mosquito Lake',
+            'bait': 'Worm', 'bait1': 'Worm', 'bait2': None, 'date': '08.06.25', 'region': 'Germany',
+            'category': 'N', 'created_at': None,  # Raw SQL hands SQLite datetimes back as strings
+        })
+        inserter.flush()
+        db.close()
+        assert players(caught_from=old) == ['A', 'D', 'C', 'B']
+    finally:
+        optimized_records.SessionLocal, record_archive.ARCHIVE_DIR = previous
+        optimized_records._fish_names_cache["data"] = None
+
+
+def test_archive_keeps_rows_stamped_into_the_week_after_reading(tmp_path, sqlite_engine, sessions):
+
+    db = sessions()
+    for player, created_at in (('A', datetime(2025, 5, 20, 12)), ('X', None), ('B', datetime(2025, 5, 21, 12))):
+        db.add(Record(player=player, fish='Pike', weight=1000, region='Germany', category='N',
+                      category_mask=1, created_at=created_at))
+    db.commit()
+    db.close()
+
+    week_rows = record_archive._week_rows
+
+    def read_then_stamp(conn, start):
+        rows = week_rows(conn, start)
+        # X gets its created_at between the archive read and the delete
+        db = sessions()
+        db.query(Record).filter(Record.player == 'X').update({'created_at': datetime(2025, 5, 20, 13)})
+        db.commit()
+        db.close()
+        return rows
+
+    record_archive._week_rows = read_then_stamp
+    try:
+        assert archive_old_weeks(sqlite_engine, retain_weeks=1, now=datetime(2025, 5, 26, tzinfo=timezone.utc),
+                                 archive_dir=tmp_path / "archive")['archived_records'] == 2
+    finally:
+        record_archive._week_rows = week_rows
+
+    db = sessions()
+    assert [r.player for r in db.query(Record)] == ['X']
+    db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test script for the record key index and the record upsert.
+Runs against a throwaway SQLite database file (conftest.py fixtures).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Integer, String, create_engine, inspect, literal, select, text
+from sqlalchemy.dialects import postgresql
+
+import migrations
+from bulk_operations import BulkRecordInserter, CopyStagingLoader, create_record_writer
+from database import Base, Record
+from records_parser import normalize_record, records_from_rows
+from record_keys import (
+    BloomFilter,
+    CATEGORY_MASK_STRINGS,
+    RecordKeyIndex,
+    category_list,
+    category_mask,
+    category_string_sql,
+    masks_including,
+    merge_category,
+    merged_category_mask_sql,
+    record_key_digest,
+)
+
+WEEK_START = datetime(2025, 6, 8, 18, 0)
+
+
+def row(player, category, created_at, **overrides):
+    data = {
+        'player': player, 'fish': 'Pike', 'weight': 9747, 'waterbody': 'Mosquito Lake',
+        'bait': 'Spoon', 'bait1': 'Spoon', 'bait2': None, 'date': '08.06.25',
+        'region': 'Germany', 'category': category, 'created_at': created_at,
+    }
+    data.update(overrides)
+    return data
+
+
+def scraped(player, category_key):
+    data = row(player, category_key, datetime.now())
+    del data['created_at']
+    return data
+
+
+def test_merge_category():
+    assert merge_category('N', 'light') == ('L;N', True)
+    assert merge_category('L;N', 'Normal') == ('L;N', False)
+    assert merge_category(None, 'bottomlight') == ('B', True)
+    # Legacy lowercase/full names are normalized on the next merge
+    assert merge_category('light', 'Light') == ('L', True)
+
+
+def test_bloom_filter_roundtrip(tmp_path):
+    digests = [record_key_digest({'player': f"p{i}"}) for i in range(2000)]
+    bloom = BloomFilter(len(digests))
+    for digest in digests[:1000]:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests[:1000])
+    false_positives = sum(digest in bloom for digest in digests[1000:])
+    assert false_positives < 50
+
+    path = tmp_path / "bloom.bin"
+    bloom.save(path, {'week_start': 'x'})
+    loaded, header = BloomFilter.load(path)
+    assert header['week_start'] == 'x'
+    assert all(digest in loaded for digest in digests[:1000])
+
+
+def test_index_exists_merge_new(session, tmp_path):
+    session.add(Record(**row('Current', 'N', WEEK_START + timedelta(days=1))))
+    session.add(Record(**row('Old', 'L', WEEK_START - timedelta(days=3))))
+    session.commit()
+
+    index = RecordKeyIndex(WEEK_START, bloom_path=tmp_path / "bloom.bin").load(session)
+    assert index.stats['preloaded_keys'] == 1
+    assert index.stats['history_keys'] == 1
+
+    # Same category already stored: no DB hit, nothing to do
+    assert index.exists_or_update(session, scraped('Current', 'normal')) == (True, None)
+    assert index.stats['db_fallbacks'] == 0
+
+    # New category on a current-week row needs a merge (once)
+    current_id = session.query(Record.id).filter(Record.player == 'Current').scalar()
+    assert index.exists_or_update(session, scraped('Current', 'telescopic')) == (True, current_id)
+    assert index.exists_or_update(session, scraped('Current', 'telescopic')) == (True, None)
+
+    # Older history is found through the Bloom filter + DB fallback
+    exists, updated = index.exists_or_update(session, scraped('Old', 'ultralight'))
+    assert exists and updated
+    assert index.stats['db_fallbacks'] == 1
+
+    # Unknown key is new; a second category for it is a merge
+    assert index.exists_or_update(session, scraped('Fresh', 'normal')) == (False, None)
+    exists, updated = index.exists_or_update(session, scraped('Fresh', 'light'))
+    assert exists and updated
+
+
+def test_category_masks():
+    assert category_mask('light') == category_mask('L') == 2
+    assert category_mask('L;N') == category_mask('Normal;light') == 3
+    assert category_mask(None) == 0
+    assert CATEGORY_MASK_STRINGS[category_mask('N;T;B')] == 'B;N;T'
+    assert category_list(3) == ('L', 'N')
+    assert category_list(None, 'N;L') == ['N', 'L'] and category_list(None) == ('N',)
+    assert masks_including(['T']) == list(range(16, 32))
+    assert len(masks_including(['N', 'L'])) == 24
+
+
+def test_sql_category_merge_matches_python(session):
+    """The upsert's mask OR (legacy strings included) agrees with merge_category()"""
+    existing_values = [None, '', 'N', 'L;N', 'B;L;N;T;U', 'light', 'Bottom Light', 'N;T']
+    for existing in existing_values:
+        for category in ('N', 'L', 'U', 'B', 'T'):
+            for stored_mask in (None, category_mask(existing)):
+                merged = merged_category_mask_sql(literal(stored_mask, Integer), literal(existing, String),
+                                                  literal(category_mask(category)))
+                sql_mask, sql_string = session.execute(select(merged, category_string_sql(merged))).one()
+                assert sql_string == merge_category(existing, category)[0], (existing, category)
+                assert sql_mask == category_mask(existing) | category_mask(category)
+
+
+def test_bulk_upsert_unions_categories(session):
+    inserter = BulkRecordInserter(session, batch_size=100)
+    for player, category in [('A', 'N'), ('B', 'L'), ('A', 'T')]:
+        data = scraped(player, category)
+        inserter.add_record(data)
+    inserter.flush()
+    categories = dict(session.query(Record.player, Record.category).all())
+    assert categories == {'A': 'N;T', 'B': 'L'}
+
+    # Existing rows get the new code unioned in; repeats are no-ops
+    inserter.add_record(scraped('A', 'U'))
+    inserter.add_record(scraped('B', 'L'))
+    inserter.flush()
+    categories = dict(session.query(Record.player, Record.category).all())
+    assert categories == {'A': 'N;T;U', 'B': 'L'}
+    assert dict(session.query(Record.player, Record.category_mask).all()) == {'A': 1 | 4 | 16, 'B': 2}
+    assert session.query(Record).count() == 2
+
+
+def test_bulk_upsert_accepts_record_rows(session):
+    """Parsed rows normalized in place go straight into the upsert"""
+    inserter = BulkRecordInserter(session, batch_size=2)
+    region = {'code': 'DE', 'name': 'Germany'}
+    parsed = records_from_rows([
+        ["Pike", "9.747 kg", "Mosquito Lake", "Bread; Worm", "A", "08.06.25"],
+        ["Pike", "341 g", "Mosquito Lake", "Spoon", "B", "08.06.25"],
+        ["Pike", "9.747 kg", "Mosquito Lake", "Bread; Worm", "A", "08.06.25"],
+    ], region)
+    for record, category in zip(parsed, ['N', 'N', 'L']):
+        inserter.add_record(normalize_record(record, category, 'Germany', datetime.now()))
+    inserter.flush()
+    rows = {r.player: r for r in session.query(Record).all()}
+    assert rows['A'].category == 'L;N' and rows['A'].bait2 == 'Worm' and rows['A'].trophy_class
+    assert rows['B'].bait1 == 'Spoon' and rows['B'].record_key == parsed[1]['record_key']
+
+
+def test_category_mask_migration(tmp_path):
+    """Legacy category strings are converted in batches and keep merging correctly"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine, tables=[Record.__table__])
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_records_category_mask"))
+        conn.execute(text("ALTER TABLE records DROP COLUMN category_mask"))
+        conn.execute(text("CREATE INDEX ix_records_category ON records (category)"))
+        conn.execute(text("INSERT INTO records (player, category) VALUES (:player, :category)"), [
+            {'player': 'A', 'category': 'L;N'}, {'player': 'B', 'category': 'Bottom Light'},
+            {'player': 'C', 'category': None}, {'player': 'D', 'category': 'T'},
+        ])
+
+    previous = migrations.engine
+    migrations.engine = engine
+    try:
+        migrations.add_category_mask_column(batch_size=3)
+    finally:
+        migrations.engine = previous
+
+    with engine.connect() as conn:
+        masks = dict(conn.execute(text("SELECT player, category_mask FROM records")).fetchall())
+    assert masks == {'A': 3, 'B': 8, 'C': 0, 'D': 16}
+    indexes = {index['name'] for index in inspect(engine).get_indexes('records')}
+    assert 'ix_records_category_mask' in indexes and 'ix_records_category' not in indexes
+
+
+def test_record_writer_selection(session):
+    """SQLite keeps the batched upsert; the COPY loader's SQL targets PostgreSQL"""
+    assert type(create_record_writer(session)) is BulkRecordInserter
+
+    merge_sql = str(CopyStagingLoader(None)._merge_statement().compile(dialect=postgresql.dialect()))
+    assert merge_sql.startswith("INSERT INTO records (player")
+    assert "FROM records_staging ON CONFLICT (record_key) DO UPDATE SET category" in merge_sql
+
+
+def test_copy_loader_reports_unit_with_failed_auto_flush(session):
+    """A size-triggered flush that fails inside a unit fails the whole unit, and only that unit"""
+    loader = CopyStagingLoader(session, max_unit_rows=2)
+    copies = []
+
+    def copy_rows(conn, rows):
+        copies.append(len(rows))
+        if len(copies) == 1:
+            raise RuntimeError("COPY failed")
+
+    # Stand-ins for the PostgreSQL-only staging steps
+    loader._ensure_staging_table = lambda conn: None
+    loader._copy_rows = copy_rows
+    loader._merge_statement = lambda partitioned=False: select(literal(1))
+
+    for player in ('A', 'B', 'C'):
+        loader.add_record({'player': player, 'fish': 'Roach', 'weight': 100, 'waterbody': 'Lake',
+                           'bait': 'Worm', 'date': '09.06.25', 'region': 'EU', 'category': 'N'})
+    assert not loader.end_unit()
+    assert copies == [2, 1]
+
+    loader.add_record({'player': 'D', 'fish': 'Roach', 'weight': 100, 'waterbody': 'Lake',
+                       'bait': 'Worm', 'date': '09.06.25', 'region': 'EU', 'category': 'N'})
+    assert loader.end_unit()
+    assert loader.stats['units_failed'] == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the weekly records partitions.
+Partition DDL runs on PostgreSQL only; these cover the week arithmetic, the
+statements generated for it and the SQLite no-op paths.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+import migrations
+from bulk_operations import CopyStagingLoader
+from record_partitions import (
+    parse_week,
+    partition_bounds,
+    partition_ddl,
+    partition_name,
+    partition_weeks,
+    records_partitioned,
+    week_start,
+)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_weeks_start_at_the_sunday_reset():
+    # 2025-06-08 is a Sunday
+    assert week_start(utc(2025, 6, 8, 18, 0)) == utc(2025, 6, 8, 18, 0)
+    assert week_start(utc(2025, 6, 8, 17, 59)) == utc(2025, 6, 1, 18, 0)
+    assert week_start(utc(2025, 6, 11, 9, 30)) == utc(2025, 6, 8, 18, 0)
+    assert week_start(datetime(2025, 6, 15, 17, 0)) == utc(2025, 6, 8, 18, 0)  # Naive = UTC
+
+    assert partition_name(utc(2025, 6, 14, 23, 0)) == "records_w20250608"
+    assert parse_week("2025-06-10") == parse_week("20250608") == utc(2025, 6, 8, 18, 0)
+    assert [partition_name(start) for start in partition_weeks(utc(2025, 6, 8, 12), utc(2025, 6, 20))] == [
+        "records_w20250601", "records_w20250608", "records_w20250615",
+    ]
+
+
+def test_partition_ddl():
+    assert partition_bounds(utc(2025, 6, 9)) == "FROM ('2025-06-08 18:00:00') TO ('2025-06-15 18:00:00')"
+    assert partition_ddl(utc(2025, 6, 9), parent="records_new") == (
+        "CREATE TABLE IF NOT EXISTS records_w20250608 PARTITION OF records_new "
+        "FOR VALUES FROM ('2025-06-08 18:00:00') TO ('2025-06-15 18:00:00')"
+    )
+
+
+def test_partitioned_merge_targets_key_and_week():
+    loader = CopyStagingLoader(db_session=None)
+    plain = str(loader._merge_statement().compile(dialect=postgresql.dialect()))
+    partitioned = str(loader._merge_statement(partitioned=True).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (record_key) DO UPDATE" in plain
+    assert "ON CONFLICT (record_key, created_at) DO UPDATE" in partitioned
+
+
+def test_sqlite_is_never_partitioned(sqlite_engine):
+    assert records_partitioned(sqlite_engine) is False
+
+    previous = migrations.engine
+    migrations.engine = sqlite_engine
+    try:
+        migrations.partition_records_table()
+    finally:
+        migrations.engine = previous
+    assert 'record_key_registry' not in inspect(sqlite_engine).get_table_names()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Differential tests for the compiled lxml records parser.
+Every saved page (and a seeded set of generated edge-case pages) must parse
+to exactly the same record dicts as the BeautifulSoup reference parser.
+"""
+
+import pickle
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from records_parser import RecordRow, normalize_record, parse_records_html, convert_weight_to_grams, records_from_rows
+from scraper import parse_all_records_from_soup
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+REGION = {'code': 'DE', 'name': 'Germany', 'url': 'https://rf4game.com/records/weekly/region/DE/'}
+
+WEIGHTS = ["9.747 kg", "341 g", "1 079.839 kg", "0,512 kg", "12", "75", "-", "", "abc kg", "0 g", " 2.5 KG "]
+PLAYER_CLASSES = ["gamername", "gamername has_overflow", "player", "username", "nickname"]
+FISH = ["Pike", "Common Carp", "Tench &amp; Co", "  Roach\n  ", "Ide"]
+
+
+def reference_parse(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    try:
+        return parse_all_records_from_soup(soup, REGION)
+    finally:
+        soup.decompose()
+
+
+def _row(rng, classes, with_fish):
+    cols = []
+    if with_fish:
+        fish = rng.choice(FISH)
+        if rng.random() < 0.7:
+            cols.append(f'<div class="col overflow nowrap fish"><div class="fish_icon"></div><div class="text">{fish}</div></div>')
+        else:
+            cols.append(f'<div class="col overflow nowrap fish">{fish}</div>')
+    cols.append(f'<div class="col overflow nowrap weight">{rng.choice(WEIGHTS)}</div>')
+    cols.append(f'<div class="col overflow nowrap location">Lake <span>{rng.randint(1, 9)}</span></div>')
+    bait_style = rng.randint(0, 3)
+    if bait_style == 0:
+        cols.append('<div class="col overflow nowrap bait"><div class="bait_icon" title="Bread; Worm"></div></div>')
+    elif bait_style == 1:
+        cols.append('<div class="col overflow nowrap bait"><div class="bait_icon"></div></div>')
+    elif bait_style == 2:
+        cols.append('<div class="col overflow nowrap bait"> Spoon </div>')
+    player_class = rng.choice(PLAYER_CLASSES)
+    cols.append(f'<div class="col overflow nowrap {player_class}">Player{rng.randint(1, 99)}</div>')
+    if rng.random() < 0.9:
+        cols.append(f'<div class="col overflow  nowrap data">{rng.randint(1, 28):02d}.06.25</div>')
+    rng.shuffle(cols)
+    return f'<div class="{classes}">' + "\n".join(cols) + '</div>'
+
+
+def generated_page(seed, tables=3, fish_per_table=6):
+    rng = random.Random(seed)
+    parts = ['<html><body><div class="records_table">']
+    for _ in range(tables):
+        parts.append('<div class="records_subtable flex_table">')
+        for _ in range(fish_per_table):
+            kind = rng.random()
+            if kind < 0.75:
+                parts.append(_row(rng, "row header", True))
+                parts.append('<div class="rows">' + "".join(_row(rng, "row", False) for _ in range(4)) + '</div>')
+            elif kind < 0.9:
+                parts.append(_row(rng, "row", True))
+            else:
+                parts.append('<div class="spacer"></div>')
+        parts.append('</div>')
+    parts.append('</div></body></html>')
+    return "\n".join(parts)
+
+
+def test_saved_pages_match_reference():
+    """Saved pages parse identically with both engines"""
+    pages = sorted(FIXTURES_DIR.glob("records_weekly_*.html"))
+    assert pages
+    for page in pages:
+        html_content = page.read_text(encoding="utf-8")
+        assert parse_records_html(html_content, REGION) == reference_parse(html_content), page.name
+
+
+def test_generated_pages_match_reference():
+    """Seeded edge-case pages (column variants, bad weights, missing cells) match"""
+    for seed in range(40):
+        html_content = generated_page(seed)
+        expected = reference_parse(html_content)
+        assert parse_records_html(html_content, REGION) == expected, f"seed {seed}"
+
+
+def test_weight_conversion():
+    assert convert_weight_to_grams("9.747 kg") == 9747
+    assert convert_weight_to_grams("341 g") == 341
+    assert convert_weight_to_grams("1 079.839 kg") == 1079839
+    assert convert_weight_to_grams("12") == 12000
+    assert convert_weight_to_grams("75") == 75
+
+
+def test_records_from_browser_rows():
+    """Rows returned by the in-browser extraction script get the same validation"""
+    rows = [
+        ["Pike", "9.747 kg", "Mosquito Lake", "Spoon", "Angler", "08.06.25"],
+        ["Pike", "abc kg", "Mosquito Lake", "Spoon", "Angler", "08.06.25"],
+        ["Pike", "341 g", "Mosquito Lake", "", "", "08.06.25"],
+        ["malformed"],
+    ]
+    assert records_from_rows(rows, REGION) == [{
+        'fish': 'Pike', 'weight': 9747, 'waterbody': 'Mosquito Lake', 'bait': 'Spoon',
+        'player': 'Angler', 'date': '08.06.25', 'region': 'Germany',
+    }]
+
+
+def test_record_rows():
+    """Rows are slot-only, normalized in place and share the repeated strings"""
+    page = generated_page(7)
+    first, second = parse_records_html(page, REGION)[:2]
+    assert not hasattr(first, '__dict__')
+    assert first.fish is second.fish and first.region is second.region
+    assert pickle.loads(pickle.dumps(first)) == first
+
+    scraped_at = datetime(2025, 6, 8, tzinfo=timezone.utc)
+    rows = records_from_rows([["Pike", "9.747 kg", "Mosquito Lake", "Bread; Worm", "Angler", "08.06.25"]], REGION)
+    row = normalize_record(rows[0], 'N', 'Germany', scraped_at)
+    assert row is rows[0]
+    assert (row['bait1'], row['bait2'], row['category'], row['created_at']) == ('Bread', 'Worm', 'N', scraped_at)
+    assert 'trophy_class' not in row and row.get('record_key') is None
+
+    # Plain dicts (replayed or hand-built records) become rows too
+    row = normalize_record({'fish': 'Pike', 'weight': 341, 'player': 'A', 'bait': 'Spoon'}, 'L', 'Germany', scraped_at)
+    assert isinstance(row, RecordRow) and row['region'] == 'Germany' and row['bait2'] is None
+
+    # Replayed rows carry their capture time, which becomes created_at
+    captured = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    rows[0]['scraped_at'] = captured
+    row = normalize_record(rows[0], 'N', 'Germany', scraped_at)
+    assert row['created_at'] == captured and 'scraped_at' not in row
+
+
+def test_empty_input():
+    assert parse_records_html("", REGION) == []
+    assert parse_records_html("   ", REGION) == []
+
+
+if __name__ == "__main__":
+    test_saved_pages_match_reference()
+    test_generated_pages_match_reference()
+    test_weight_conversion()
+    test_records_from_browser_rows()
+    test_record_rows()
+    test_empty_input()
+    print("✅ Parser outputs match the BeautifulSoup reference")
+
+    # Rough throughput comparison on a large generated page
+    big_page = generated_page(1, tables=10, fish_per_table=60)
+    start = time.perf_counter()
+    for _ in range(5):
+        reference_parse(big_page)
+    reference_time = (time.perf_counter() - start) / 5
+    start = time.perf_counter()
+    for _ in range(5):
+        parse_records_html(big_page, REGION)
+    fast_time = (time.perf_counter() - start) / 5
+    print(f"BeautifulSoup: {reference_time * 1000:.1f}ms  lxml plan: {fast_time * 1000:.1f}ms  ({reference_time / fast_time:.1f}x faster)")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless Chrome block list and page network metrics.
+"""
+
+import json
+import os
+
+from resource_blocking import PageLoadStats, blocked_url_patterns, format_page_load_summary, network_metrics_from_log
+
+
+def log_entry(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+class FakeDriver:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def test_block_list_and_allowlist():
+    patterns = blocked_url_patterns()
+    assert "*.css" in patterns and "*.woff2?*" in patterns and "*mc.yandex.ru*" in patterns
+    # First-party pages and scripts are never matched
+    assert not any(p in ("*.js", "*.html", "*rf4game.com*") for p in patterns)
+
+    os.environ["SCRAPER_BLOCK_ALLOW"] = "css"
+    try:
+        assert not any("css" in p for p in blocked_url_patterns())
+    finally:
+        del os.environ["SCRAPER_BLOCK_ALLOW"]
+
+
+def test_page_metrics_from_performance_log():
+    entries = [
+        log_entry("Network.responseReceived", requestId="1"),
+        log_entry("Network.loadingFinished", requestId="1", encodedDataLength=48_000),
+        log_entry("Network.responseReceived", requestId="2"),
+        log_entry("Network.loadingFinished", requestId="2", encodedDataLength=16_000),
+        log_entry("Network.loadingFailed", requestId="3", blockedReason="inspector"),
+        log_entry("Network.loadingFailed", requestId="4", errorText="net::ERR_ABORTED"),
+        {'message': "not json"},
+    ]
+    assert network_metrics_from_log(entries) == {'bytes': 64_000, 'requests': 2, 'blocked': 1}
+
+    stats = PageLoadStats()
+    driver = FakeDriver(entries)
+    stats.record(driver, 2.0, "Germany")
+    stats.record(driver, 1.0, "Germany")  # Log was drained by the first page
+    assert stats.as_dict() == {'page_loads': 2, 'bytes_transferred': 64_000, 'requests_served': 2,
+                               'requests_blocked': 1, 'load_seconds': 3.0}
+    assert "1 requests blocked, 1.5s avg load" in format_page_load_summary(stats.as_dict())
+    assert format_page_load_summary(PageLoadStats().as_dict()) is None
+
+
+if __name__ == "__main__":
+    test_block_list_and_allowlist()
+    test_page_metrics_from_performance_log()
+    print("✅ Resource blocking tests passed")
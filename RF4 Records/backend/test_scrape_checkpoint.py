@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for resumable scrape passes.
+"""
+
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from scrape_checkpoint import ScrapeCheckpoint
+
+WEEK = datetime(2025, 6, 8, 18, 0, tzinfo=timezone.utc)
+UNITS = [(category, {'code': code}) for category in ('normal', 'light') for code in ('RU', 'DE', 'US')]
+
+
+def codes(units):
+    return [f"{key}/{region['code']}" for key, region in units]
+
+
+def test_interrupted_pass_resumes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "checkpoint.json"
+        checkpoint = ScrapeCheckpoint(path)
+        assert checkpoint.begin(WEEK, UNITS) == UNITS
+
+        # First category committed, second one dies after staging a unit
+        for _, region in UNITS[:3]:
+            checkpoint.stage('normal', region['code'])
+        checkpoint.commit_staged()
+        checkpoint.stage('light', 'RU')
+        checkpoint.discard_staged()  # Its flush failed
+
+        # The process is killed here - a new run resumes from the first incomplete unit
+        resumed = ScrapeCheckpoint(path)
+        assert codes(resumed.begin(WEEK, UNITS)) == ['light/RU', 'light/DE', 'light/US']
+        assert resumed.resumed_units == 3
+
+        # Finishing the pass clears it; the run after that starts over
+        resumed.complete()
+        assert not path.exists()
+        assert ScrapeCheckpoint(path).begin(WEEK, UNITS) == UNITS
+
+
+def test_stale_checkpoints_start_fresh():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "checkpoint.json"
+        checkpoint = ScrapeCheckpoint(path, max_age_seconds=600)
+        checkpoint.begin(WEEK, UNITS, now=1000)
+        checkpoint.stage('normal', 'RU')
+        checkpoint.commit_staged()
+
+        # Leaderboards reset since the interruption
+        assert ScrapeCheckpoint(path).begin(WEEK + timedelta(days=7), UNITS) == UNITS
+
+        checkpoint = ScrapeCheckpoint(path, max_age_seconds=600)
+        checkpoint.begin(WEEK, UNITS)
+        checkpoint.stage('normal', 'RU')
+        checkpoint.commit_staged()
+        assert len(ScrapeCheckpoint(path, max_age_seconds=600).begin(WEEK, UNITS)) == len(UNITS) - 1
+        # Too old to trust
+        assert ScrapeCheckpoint(path, max_age_seconds=0).begin(WEEK, UNITS) == UNITS
+
+
+if __name__ == "__main__":
+    test_interrupted_pass_resumes()
+    test_stale_checkpoints_start_fresh()
+    print("✅ Scrape checkpoint tests passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the scrape run ledger and its summaries.
+Runs against a throwaway SQLite database file (conftest.py fixtures).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from database import ScrapeRun
+from scrape_ledger import (
+    ScrapeLedger,
+    ledger_summary,
+    percentile,
+    recent_runs,
+    run_summary_query,
+    run_units,
+    unit_summary_query,
+)
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([4.0], 99) == 4.0
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([1, 2, 3, 4, 5], 90) == 4.6
+    assert percentile([None, 2, 1], 50) == 1.5
+
+
+def test_ledger_run_and_summary(sessions):
+
+    for run_number in range(3):
+        ledger = ScrapeLedger(session_factory=sessions, enabled=True).start()
+        assert ledger.run_id is not None
+        for region, load in (('DE', 0.5), ('RU', 4.0)):
+            ledger.unit('normal', region, started_at=datetime.now(timezone.utc), source='http',
+                        page_load_seconds=load + run_number, parse_seconds=0.05, ingest_seconds=0.01,
+                        rows_seen=120, rows_new=3, category_merges=1, page_unchanged=False, rss_mb=150 + run_number)
+        ledger.unit('light', 'DE', failed=True, error='UnitTimeoutError', source='browser')
+        ledger.flush()
+        ledger.finish({'success': True, 'duration_seconds': 30.0 + run_number,
+                       'regions_scraped': 2, 'new_records': 6, 'category_updates': 2})
+
+    db = sessions()
+    runs = recent_runs(db)
+    assert [run['status'] for run in runs] == ['success'] * 3
+    assert runs[0]['regions_failed'] == 1 and runs[0]['peak_rss_mb'] == 152
+    assert len(run_units(db, runs[0]['id'])) == 3
+
+    summary = ledger_summary(db, days=7)
+    assert summary['runs']['count'] == 3
+    assert summary['runs']['duration_seconds']['p50'] == 31.0
+    # Slowest region first
+    ru, de = summary['units'][0], summary['units'][1]
+    assert (ru['region'], ru['samples'], ru['rows_new']) == ('RU', 3, 9)
+    assert ru['page_load_seconds'] == {'p50': 5.0, 'p90': 5.8, 'p99': 5.98}
+    assert de['parse_seconds']['p50'] == 0.05
+    failed = [u for u in summary['units'] if u['category'] == 'light'][0]
+    assert failed['failures'] == 3 and failed['page_load_seconds']['p50'] is None
+
+    assert [u['region'] for u in ledger_summary(db, category='normal', region='DE')['units']] == ['DE']
+    db.close()
+
+
+def test_stale_and_disabled_runs(sessions):
+
+    # A worker that died mid-run leaves a 'running' row behind
+    db = sessions()
+    db.add(ScrapeRun(kind='scheduled', status='running', started_at=datetime.utcnow() - timedelta(hours=3)))
+    db.commit()
+
+    ledger = ScrapeLedger(session_factory=sessions, enabled=True).start()
+    ledger.finish({'success': False, 'interrupted': True})
+    statuses = [run.status for run in db.query(ScrapeRun).order_by(ScrapeRun.id)]
+    assert statuses == ['abandoned', 'interrupted']
+
+    disabled = ScrapeLedger(session_factory=sessions, enabled=False).start()
+    disabled.unit('normal', 'DE', rows_seen=1)
+    disabled.finish({'success': True})
+    assert disabled.run_id is None and db.query(ScrapeRun).count() == 2
+    db.close()
+
+
+def test_postgresql_summary_aggregates_in_sql():
+    """PostgreSQL gets percentile_cont grouped by category/region instead of the rows"""
+    db = sessionmaker()()
+    since = datetime(2025, 6, 1)
+    runs_sql = str(run_summary_query(db, since).statement.compile(dialect=postgresql.dialect()))
+    units_sql = str(unit_summary_query(db, since, region='DE').statement.compile(dialect=postgresql.dialect()))
+    assert "percentile_cont(%(percentile_cont_1)s) WITHIN GROUP (ORDER BY scrape_runs.duration_seconds)" in runs_sql
+    assert units_sql.count("WITHIN GROUP") == 12
+    assert "scrape_units.region = %(region_1)s" in units_sql
+    assert units_sql.endswith("GROUP BY scrape_units.category, scrape_units.region")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the pipelined fetch / parse / write stages.
+"""
+
+from pathlib import Path
+
+import scrape_pipeline
+from records_parser import parse_records_html
+from scrape_pipeline import FetchStage, ParseStage, PipelinedRecordWriter, WriteStageError
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+HTML = (FIXTURES_DIR / "records_weekly_sample.html").read_text(encoding="utf-8")
+DE = {'code': 'DE', 'name': 'Germany', 'url': 'https://rf4game.com/records/weekly/region/DE/'}
+JS = {'code': 'JS', 'name': 'Rendered', 'url': 'https://rf4game.com/records/weekly/region/JS/'}
+
+
+def fake_fetch_html(url):
+    return HTML if url == DE['url'] else "<html><body>loading...</body></html>"
+
+
+def fake_browser_fetch(region_info):
+    return [{'player': 'Angler', 'region': region_info['name']}]
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    def commit(self):
+        self.log.append('commit')
+
+    def rollback(self):
+        self.log.append('rollback')
+
+    def close(self):
+        self.log.append('close')
+
+
+class FakeWriter:
+    def __init__(self, session):
+        self.log = session.log
+        self.pending_records = []
+
+    def add_record(self, row):
+        if row['player'] == 'crash':
+            raise ValueError("unwritable row")
+        self.pending_records.append(row)
+
+    def end_unit(self):
+        self.log.append(('unit', [row['player'] for row in self.pending_records]))
+        ok = all(row['player'] != 'broken' for row in self.pending_records)
+        self.pending_records = []
+        return ok
+
+    def flush(self):
+        self.log.append('flush')
+
+
+def test_parse_and_fetch_stages():
+    parse_stage = ParseStage(workers=1)
+    scrape_pipeline.BROWSER_PAGE_GAP_SECONDS = 0
+    archived = []
+    try:
+        assert parse_stage.parse(HTML, DE) == parse_records_html(HTML, DE)
+        assert parse_stage.parse("<html></html>", DE) is None
+
+        fetch = FetchStage(parse_stage, fake_fetch_html, fake_browser_fetch,
+                           on_http_page=lambda region, html: archived.append(region['code']))
+        page = fetch(DE)
+        assert page.source == "http" and page.records == parse_records_html(HTML, DE)
+        page = fetch(JS)
+        assert page.source == "browser" and page.records[0]['region'] == 'Rendered'
+        assert archived == ['DE']  # Only pages whose HTML held the tables
+
+        assert FetchStage(parse_stage, fake_fetch_html)(JS) is None  # No browser - caller renders it
+        cancelled = FetchStage(parse_stage, fake_fetch_html, fake_browser_fetch)
+        cancelled.cancel()
+        assert cancelled(JS) is None and cancelled(DE).source == "http"  # Run over - no more browser loads
+        assert fetch.metrics.as_dict()['items'] == 2
+        assert fetch.browser_metrics.as_dict()['items'] == 1
+        assert parse_stage.metrics.as_dict()['items'] == 7
+    finally:
+        scrape_pipeline.BROWSER_PAGE_GAP_SECONDS = 2
+        parse_stage.shutdown()
+
+
+def test_writer_thread_batches_and_reports_failures():
+    log = []
+    writer = PipelinedRecordWriter(lambda: FakeSession(log), FakeWriter, queue_size=2)
+    for region in ("DE", "RU", "US"):
+        writer.add_record({'player': f"{region}-1"})
+        writer.add_record({'player': f"{region}-2"})
+        assert writer.end_unit()
+    assert writer.flush() == 0
+    assert [entry for entry in log if entry[0] == 'unit'] == [
+        ('unit', ['DE-1', 'DE-2']), ('unit', ['RU-1', 'RU-2']), ('unit', ['US-1', 'US-2'])]
+    assert log.count('commit') == 4  # One per region, one at the flush
+    assert log[-3:] == ['flush', 'commit', 'close']  # Fresh session after each flush
+
+    writer.add_record({'player': 'broken'})
+    writer.end_unit()
+    try:
+        writer.flush()
+        assert False, "failed region should surface at flush"
+    except WriteStageError:
+        pass
+    assert writer.flush() == 0  # Failure is reported once
+
+    # A region that raises only rolls back itself - the one before it is already committed
+    log.clear()
+    writer.add_record({'player': 'DE-1'})
+    writer.end_unit()
+    writer.add_record({'player': 'crash'})
+    writer.end_unit()
+    try:
+        writer.flush()
+        assert False, "crashed region should surface at flush"
+    except WriteStageError:
+        pass
+    assert log[:4] == [('unit', ['DE-1']), 'flush', 'commit', 'rollback']
+
+    assert writer.metrics.as_dict()['items'] == 6
+    writer.close()
+    assert writer.close() == 0
+
+
+def test_writer_never_hangs_the_scrape():
+    scrape_pipeline.PipelinedRecordWriter.POLL_SECONDS = 0.05
+    try:
+        # No session can be opened: every region fails, flush still answers
+        def no_database():
+            raise ConnectionError("database unavailable")
+        writer = PipelinedRecordWriter(no_database, FakeWriter)
+        writer.add_record({'player': 'DE-1'})
+        writer.end_unit()
+        try:
+            writer.flush()
+            assert False, "unwritable region should surface at flush"
+        except WriteStageError:
+            pass
+        writer.close()
+
+        # The writer thread is gone: flush and close raise instead of waiting forever
+        writer = PipelinedRecordWriter(lambda: FakeSession([]), FakeWriter)
+        writer._queue.put(('stop', None))
+        writer._thread.join(timeout=5)
+        assert not writer._thread.is_alive()
+        try:
+            writer.flush()
+            assert False, "dead writer thread should surface at flush"
+        except WriteStageError:
+            pass
+        try:
+            writer.close()
+            assert False, "dead writer thread should surface at close"
+        except WriteStageError:
+            pass
+    finally:
+        scrape_pipeline.PipelinedRecordWriter.POLL_SECONDS = 1.0
+
+
+if __name__ == "__main__":
+    test_parse_and_fetch_stages()
+    test_writer_thread_batches_and_reports_failures()
+    test_writer_never_hangs_the_scrape()
+    print("✅ Scrape pipeline tests passed")
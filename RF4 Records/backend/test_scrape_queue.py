@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared scrape work queue.
+Runs against a throwaway SQLite database file (conftest.py fixtures).
+"""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from database import ScrapeJob
+from scrape_queue import ScrapeQueue, _utcnow, queue_status
+
+UNITS = [(category, {'code': code}) for category in ('normal', 'light') for code in ('RU', 'DE', 'US')]
+
+
+def statuses(sessions):
+    db = sessions()
+    try:
+        return {(job.category, job.region): (job.status, job.attempts) for job in db.query(ScrapeJob)}
+    finally:
+        db.close()
+
+
+def test_workers_split_a_pass(sessions):
+    a = ScrapeQueue(sessions, worker_id='a')
+    b = ScrapeQueue(sessions, worker_id='b')
+
+    assert a.publish(UNITS) == 6
+    assert b.publish(UNITS) == 0  # Already queued - no duplicate jobs
+
+    # Both reach 'normal' at the same time: every unit goes to exactly one worker
+    claims = {}
+    barrier = threading.Barrier(2)
+
+    def claim(worker):
+        barrier.wait()
+        claims[worker.worker_id] = worker.claim('normal', limit=2)
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in (a, b)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not claims['a'] & claims['b']
+    assert len(claims['a'] | claims['b']) == 3
+    assert a.claim('normal') == set()
+
+    # a finishes its units; b commits one, fails one and never starts the rest
+    for unit in claims['a']:
+        a.started(*unit)
+        a.stage(*unit)
+    a.commit_staged()
+    a.release()
+    b_units = sorted(b.claim('light', limit=2) | claims['b'])
+    b.started(*b_units[0])
+    b.stage(*b_units[0])
+    b.commit_staged()
+    b.started(*b_units[1])
+    b.release(error="UnitTimeoutError")
+
+    jobs = statuses(sessions)
+    assert all(jobs[unit] == ('done', 1) for unit in claims['a'])
+    assert jobs[b_units[0]][0] == 'done'
+    assert jobs[b_units[1]] == ('queued', 1)  # Retried by the next claim
+    assert all(jobs[unit] == ('queued', 0) for unit in b_units[2:])  # Attempt refunded
+
+    # Just-finished units are not queued again by the next publish
+    assert a.publish(UNITS) == 0
+    assert a.publish(UNITS, now=_utcnow() + timedelta(minutes=10)) == len(claims['a']) + 1
+
+
+def test_expired_leases_and_attempt_limit(sessions):
+    dead = ScrapeQueue(sessions, worker_id='dead', lease_seconds=60, max_attempts=2)
+    dead.publish(UNITS[:1])
+    assert dead.claim() == {('normal', 'RU')}
+
+    # The worker died: its lease blocks others until it expires
+    later = ScrapeQueue(sessions, worker_id='later', lease_seconds=60, max_attempts=2)
+    assert later.claim() == set()
+    assert later.claim(now=_utcnow() + timedelta(minutes=2)) == {('normal', 'RU')}
+
+    # A late commit from the dead worker does not steal the unit back
+    dead.stage('normal', 'RU')
+    dead.commit_staged()
+    assert statuses(sessions)[('normal', 'RU')] == ('leased', 2)
+
+    # The second attempt also dies - the unit is failed instead of retried forever
+    last = ScrapeQueue(sessions, worker_id='last', max_attempts=2)
+    assert last.claim(now=_utcnow() + timedelta(minutes=4)) == set()
+    db = sessions()
+    status = queue_status(db)
+    db.close()
+    assert status['by_status'] == {'failed': 1}
+    assert status['failed'][0]['last_error'] == 'lease expired'
+
+
+def test_claim_uses_skip_locked_on_postgresql():
+    captured = {}
+
+    class Capture:
+        def execute(self, statement):
+            captured.setdefault('statements', []).append(statement)
+
+            class Rows:
+                def all(self):
+                    return []
+            return Rows()
+
+        def commit(self):
+            pass
+
+        def close(self):
+            pass
+
+    ScrapeQueue(session_factory=Capture, worker_id='w').claim('normal')
+    claim_sql = str(captured['statements'][-1].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in claim_sql and "RETURNING" in claim_sql
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded-concurrency scrape unit scheduler.
+"""
+
+import threading
+import time
+
+from scrape_scheduler import ScrapeUnitScheduler, UnitTimeoutError, build_units
+
+CATEGORIES = {
+    'normal': {'name': 'Normal', 'regions': [{'code': c, 'name': c} for c in ('RU', 'DE', 'US')]},
+    'light': {'name': 'Light', 'regions': [{'code': c, 'name': c} for c in ('RU', 'DE', 'US')]},
+}
+
+
+def test_results_in_order_with_bounded_workers():
+    """Units run concurrently, never more than max_workers at once"""
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fetch(region):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return [region['code']]
+
+    scheduler = ScrapeUnitScheduler(build_units(CATEGORIES), fetch, max_workers=2,
+                                    memory_fn=lambda: 0).start()
+    try:
+        results = [scheduler.take(key, region) for key, region in build_units(CATEGORIES)]
+    finally:
+        scheduler.shutdown()
+
+    assert results == [['RU'], ['DE'], ['US']] * 2
+    assert peak == 2
+
+
+def test_unit_timeout():
+    """Slow units raise UnitTimeoutError instead of stalling the pass"""
+    units = build_units(CATEGORIES)[:1]
+    scheduler = ScrapeUnitScheduler(units, lambda region: time.sleep(0.3), max_workers=1,
+                                    unit_timeout=0.1, memory_fn=lambda: 0).start()
+    try:
+        try:
+            scheduler.take(*units[0])
+            assert False, "expected a timeout"
+        except UnitTimeoutError:
+            pass
+    finally:
+        scheduler.shutdown()
+
+    assert scheduler.stats['units_timed_out'] == 1
+
+
+def test_skipped_category_is_not_fetched():
+    """Units of a category cut off by consecutive failures are never fetched"""
+    fetched = []
+    units = build_units(CATEGORIES)
+    scheduler = ScrapeUnitScheduler(units, lambda region: fetched.append(region) or [],
+                                    max_workers=2, memory_fn=lambda: 0)
+    scheduler.skip_category('normal')
+    scheduler.start()
+    try:
+        for key, region in units[3:]:
+            assert scheduler.take(key, region) == []
+    finally:
+        scheduler.shutdown()
+
+    assert fetched == [region for _, region in units[3:]]
+
+
+def test_memory_budget_limits_window():
+    """Over the memory budget only one unit is kept in flight"""
+    scheduler = ScrapeUnitScheduler(build_units(CATEGORIES), lambda region: [], max_workers=4,
+                                    memory_budget_mb=100, memory_fn=lambda: 500)
+    try:
+        scheduler.start()
+        assert len(scheduler._inflight) == 1
+        assert scheduler.stats['throttled_submits'] == 1
+    finally:
+        scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    test_results_in_order_with_bounded_workers()
+    test_unit_timeout()
+    test_skipped_category_is_not_fetched()
+    test_memory_budget_limits_window()
+    print("✅ Scrape scheduler tests passed")
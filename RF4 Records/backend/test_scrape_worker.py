@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the out-of-process scrape worker.
+"""
+
+import multiprocessing
+import threading
+
+import browser_supervisor
+from scrape_worker import RemoteBrowser, _serve_browser_request, get_scrape_progress, run_scrape
+
+
+class FakeSupervisor:
+    stats = {'pages': 3}
+
+    def fetch(self, region_info):
+        if region_info['code'] == 'FAIL':
+            raise TimeoutError("browser hung")
+        return [{'region': region_info['name']}]
+
+
+def test_remote_browser_rpc():
+    worker_end, api_end = multiprocessing.Pipe()
+    previous = browser_supervisor._supervisor
+    browser_supervisor.set_browser_supervisor(FakeSupervisor())
+
+    def serve(requests):
+        for _ in range(requests):
+            _serve_browser_request(api_end)
+
+    server = threading.Thread(target=serve, args=(3,))
+    server.start()
+    try:
+        remote = RemoteBrowser(worker_end)
+        assert remote.fetch({'code': 'DE', 'name': 'Germany'}) == [{'region': 'Germany'}]
+        assert remote.stats == {'pages': 3}
+        try:
+            remote.fetch({'code': 'FAIL', 'name': 'Fail'})
+            assert False, "browser errors should reach the worker"
+        except RuntimeError as e:
+            assert "TimeoutError: browser hung" in str(e)
+    finally:
+        server.join()
+        browser_supervisor.set_browser_supervisor(previous)
+
+
+def test_worker_failure_is_reported():
+    # The worker runs in its own process; a crash there comes back as a failed result
+    result = run_scrape(not_a_scrape_option=True)
+    assert result['success'] is False
+    assert "TypeError" in result['abort_reason']
+    assert result['worker_peak_rss_mb'] >= 0
+    assert get_scrape_progress() is None
+
+
+if __name__ == "__main__":
+    test_remote_browser_rpc()
+    test_worker_failure_is_reported()
+    print("✅ Scrape worker tests passed")
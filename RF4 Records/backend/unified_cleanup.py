@@ -14,7 +14,25 @@ import subprocess
 
 logger = logging.getLogger(__name__)
 
-# Simplified cleanup - no state management needed
+# Long-lived helper processes (browser supervisor) whose Chrome must survive cleanup
+_supervised_pids = set()
+
+def register_supervised_process(pid: int):
+    """Exclude a child process and its Chrome tree from kill_chrome_processes()"""
+    _supervised_pids.add(pid)
+
+def unregister_supervised_process(pid: int):
+    _supervised_pids.discard(pid)
+
+def supervised_process_tree_pids() -> set:
+    """PIDs of every process under a registered supervisor"""
+    spared = set()
+    for pid in list(_supervised_pids):
+        try:
+            spared.update(p.pid for p in psutil.Process(pid).children(recursive=True))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return spared
 
 def cleanup_zombie_processes() -> int:
     """
@@ -24,16 +42,24 @@ def cleanup_zombie_processes() -> int:
     try:
         cleaned = 0
         
-        # First, try to reap any children of this process
-        while True:
-            try:
-                pid, status = os.waitpid(-1, os.WNOHANG)
-                if pid == 0:
-                    break
-                cleaned += 1
-                logger.debug(f"Reaped zombie child process {pid}")
-            except ChildProcessError:
-                break
+        # First, reap zombie children of this process. Children started with
+        # multiprocessing (scrape worker, browser supervisor) are left to their
+        # Process objects - reaping them here would make is_alive() lie forever.
+        import multiprocessing
+        managed = {p.pid for p in multiprocessing.active_children()}
+        try:
+            for child in psutil.Process(os.getpid()).children():
+                if child.pid in managed:
+                    continue
+                try:
+                    if child.status() == psutil.STATUS_ZOMBIE:
+                        os.waitpid(child.pid, os.WNOHANG)
+                        cleaned += 1
+                        logger.debug(f"Reaped zombie child process {child.pid}")
+                except (psutil.NoSuchProcess, ChildProcessError):
+                    continue
+        except Exception as e:
+            logger.debug(f"Error reaping child processes: {e}")
         
         # Check for zombie processes and their parents
         try:
@@ -153,7 +179,12 @@ def kill_chrome_processes() -> int:
             parent = psutil.Process(current_pid)
             children = parent.children(recursive=True)
             
+            # Spare the supervised browser trees - they recycle their own Chrome
+            spared = supervised_process_tree_pids()
+            
             for child in children:
+                if child.pid in spared:
+                    continue
                 try:
                     if 'chrome' in child.name().lower():
                         logger.debug(f"Killing Chrome child process: PID {child.pid}")